@@ -0,0 +1,48 @@
+"""Per call cost of `fryer.path.for_key`, with and without the cached env file.
+
+Run with `uv run python benchmarks/benchmark_config.py`.
+"""
+
+import tempfile
+import timeit
+from pathlib import Path
+
+import fryer.config
+import fryer.path
+from fryer.constants import FRYER_ENV_PATH_DATA, FRYER_ENV_PATH_LOG, FRYER_ENV_TODAY
+
+NUMBER = 2_000
+
+
+def for_key_uncached(path_env: Path) -> None:
+    # Behaves like the env file being parsed on every call
+    fryer.config.clear()
+    fryer.path.for_key("key", path_env=path_env)
+
+
+def for_key_cached(path_env: Path) -> None:
+    fryer.path.for_key("key", path_env=path_env)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_dir:
+        path_env = Path(path_dir) / ".env"
+        path_env.write_text(
+            f"{FRYER_ENV_PATH_LOG}={path_dir}\n"
+            f"{FRYER_ENV_PATH_DATA}={path_dir}\n"
+            f"{FRYER_ENV_TODAY}=2024-12-08\n",
+        )
+        for name, func in [
+            ("uncached", for_key_uncached),
+            ("cached", for_key_cached),
+        ]:
+            seconds = min(
+                timeit.repeat(
+                    lambda func=func: func(path_env), number=NUMBER, repeat=5
+                ),
+            )
+            print(f"fryer.path.for_key {name}: {seconds / NUMBER * 1e6:.1f}us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Startup cost of importing fryer, measured with `python -X importtime`.
+
+Run with `uv run python benchmarks/benchmark_import.py`.
+"""
+
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "fryer",
+    "fryer.all",
+    "fryer.data",
+    "fryer.data.uk_gov_hm_land_registry_price_paid",
+    "fryer.data.uk_police_crime_data",
+]
+REPEAT = 5
+
+
+def get_import_time(module: str) -> int:
+    """Total import time in microseconds for `module` in a fresh interpreter.
+
+    This sums the self time of every module imported, as the cumulative time of a
+    package does not include submodules imported via its `__init__`.
+    """
+    completed = subprocess.run(  # noqa: S603 - Only runs the current interpreter
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time = line.removeprefix("import time:").split("|")[0].strip()
+        if self_time.isdigit():
+            total += int(self_time)
+    return total
+
+
+def main() -> None:
+    for module in MODULES:
+        microseconds = statistics.median(get_import_time(module) for _ in range(REPEAT))
+        print(f"import {module}: {microseconds / 1_000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
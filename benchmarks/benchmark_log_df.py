@@ -0,0 +1,69 @@
+"""Per call cost of logging a large DataFrame, as the dataset writers do, including
+the time for the listener to write the record to the log file and stdout.
+
+Run with `uv run python benchmarks/benchmark_log_df.py > /dev/null`, the results are
+written to stderr.
+"""
+
+import logging
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import polars as pl
+
+import fryer.logger
+
+NUMBER = 20
+NUM_ROWS = 2_000_000
+
+
+def create_df() -> pl.DataFrame:
+    rng = np.random.default_rng(42)
+    return pl.DataFrame(
+        {
+            "id_transaction": [f"{{{i:032X}}}" for i in range(NUM_ROWS)],
+            "price": rng.integers(50_000, 1_000_000, NUM_ROWS).astype(float),
+            "date": pl.date_range(
+                pl.date(1995, 1, 1),
+                pl.date(2024, 12, 31),
+                eager=True,
+            ).sample(NUM_ROWS, with_replacement=True, seed=42),
+            "postcode": rng.choice(["SW1A 1AA", "M1 1AE", None], NUM_ROWS),
+            "street": rng.choice(["HIGH STREET", "STATION ROAD", None], NUM_ROWS),
+            "town_city": rng.choice(["LONDON", "MANCHESTER"], NUM_ROWS),
+        },
+    )
+
+
+def main() -> None:
+    df = create_df()
+    with tempfile.TemporaryDirectory() as path_log:
+        logger = fryer.logger.get(key="benchmark", path_log=path_log)
+
+        def log_repr() -> None:
+            logger.info(
+                f"""{df=
+}""",
+            )
+            fryer.logger.flush()
+
+        def log_summary() -> None:
+            fryer.logger.log_df(logger, df)
+            fryer.logger.flush()
+
+        for level in [logging.DEBUG, logging.INFO, logging.WARNING]:
+            logger.setLevel(level)
+            for name, func in [("repr", log_repr), ("log_df", log_summary)]:
+                seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+                print(
+                    f"{logging.getLevelName(level)} {name}: "
+                    f"{seconds / NUMBER * 1e3:.3f}ms per call",
+                    file=sys.stderr,
+                )
+        fryer.logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Time for selective filters on a year of price paid written unsorted with the
+default profile and sorted with the price paid profile, whose row group statistics
+let the scan skip row groups, and for a lookup of one postcode with the bloom filters.
+
+Run with `uv run python benchmarks/benchmark_parquet_write_profile.py > /dev/null`,
+the results are written to stderr.
+"""
+
+import sys
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+import fryer.data.uk_gov_hm_land_registry_price_paid as price_paid
+import fryer.parquet
+
+NUMBER = 20
+NUM_ROWS = 2_000_000
+NUM_POSTCODES = 500_000
+FILTERS = {
+    "one week": pl.col("date").is_between(pl.date(2024, 3, 1), pl.date(2024, 3, 7)),
+    "one postcode": pl.col("postcode") == "P 123456",
+}
+PROFILES = {
+    "default": fryer.parquet.PROFILE_DEFAULT,
+    "price paid": price_paid.WRITE_PROFILE,
+}
+
+
+def create_df() -> pl.DataFrame:
+    rng = np.random.default_rng(0)
+    return pl.DataFrame(
+        {
+            "price": rng.integers(50_000, 1_000_000, NUM_ROWS).astype(float),
+            "date": pl.date_range(
+                pl.date(2024, 1, 1),
+                pl.date(2024, 12, 31),
+                eager=True,
+            ).sample(NUM_ROWS, with_replacement=True, seed=0),
+            "postcode": [f"P {i}" for i in rng.integers(0, NUM_POSTCODES, NUM_ROWS)],
+        },
+    )
+
+
+def scan(path_file: Path, expr: pl.Expr) -> pl.DataFrame:
+    return pl.scan_parquet(path_file).filter(expr).collect()
+
+
+def lookup(path_file: Path) -> pl.DataFrame:
+    return fryer.parquet.lookup([path_file], column="postcode", values=["P 123456"])
+
+
+def main() -> None:
+    df = create_df()
+    with tempfile.TemporaryDirectory() as path_tmp:
+        for name_profile, profile in PROFILES.items():
+            path_file = Path(path_tmp) / f"{name_profile}.parquet"
+            fryer.parquet.write(df, path_file, profile=profile)
+            size_mb = path_file.stat().st_size / 1024**2
+            print(f"{name_profile}: {size_mb:.1f}MB", file=sys.stderr)
+            for name_filter, expr in FILTERS.items():
+                seconds = min(
+                    timeit.repeat(
+                        partial(scan, path_file, expr),
+                        number=NUMBER,
+                        repeat=3,
+                    ),
+                )
+                print(
+                    f"{name_profile}, {name_filter}: "
+                    f"{seconds / NUMBER * 1e3:.1f}ms per scan",
+                    file=sys.stderr,
+                )
+            seconds = min(
+                timeit.repeat(partial(lookup, path_file), number=NUMBER, repeat=3),
+            )
+            print(
+                f"{name_profile}, lookup one postcode: "
+                f"{seconds / NUMBER * 1e3:.1f}ms per lookup",
+                file=sys.stderr,
+            )
+
+
+if __name__ == "__main__":
+    main()
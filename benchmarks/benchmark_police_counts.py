@@ -0,0 +1,95 @@
+"""Time for counts of street crimes by LSOA, month and crime type, with rolling 3 and
+12 month counts, read from the counts written by `write_counts` and grouped from the
+street files.
+
+Run with `uv run python benchmarks/benchmark_police_counts.py > /dev/null`, the
+results are written to stderr.
+"""
+
+import sys
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+import fryer.data.uk_police_crime_data as police
+import fryer.logger
+
+NUMBER = 5
+MONTHS = pd.date_range("2020-01-01", "2021-12-01", freq="MS")
+NUM_ROWS_PER_MONTH = 200_000
+NUM_AREAS = 35_000
+
+
+def create_df(month: pd.Timestamp) -> pl.DataFrame:
+    rng = np.random.default_rng(month.month)
+    crime_types = sorted(set(police.CRIME_TYPE_MAPPING.values()))
+    return pl.DataFrame(
+        {
+            "lower_layer_super_output_area_code": [
+                f"E{i:08d}" for i in rng.integers(0, NUM_AREAS, NUM_ROWS_PER_MONTH)
+            ],
+            "crime_type": pl.Series(
+                [
+                    crime_types[i]
+                    for i in rng.integers(0, len(crime_types), NUM_ROWS_PER_MONTH)
+                ],
+                dtype=pl.Enum(crime_types),
+            ),
+        },
+    ).with_columns(month=pl.lit(month.date()))
+
+
+def group_street(path_dir: Path) -> pl.DataFrame:
+    return (
+        police.read_street(path_log=path_dir, path_data=path_dir)
+        .group_by(police.COLUMNS_COUNTS)
+        .agg(pl.len().alias("count"))
+        .sort("month")
+        .with_columns(
+            pl.col("count")
+            .rolling_sum_by("month", window_size=f"{window}mo")
+            .over("lower_layer_super_output_area_code", "crime_type")
+            .alias(f"count_{window}mo")
+            for window in police.WINDOWS_COUNTS
+        )
+        .collect()
+    )
+
+
+def read_counts(path_dir: Path) -> pl.DataFrame:
+    return police.read_counts(path_data=path_dir).collect()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_tmp:
+        path_dir = Path(path_tmp)
+        for month in MONTHS:
+            create_df(month).write_parquet(
+                police.path(month=month, path_data=path_dir, mkdir=True),
+            )
+        seconds = timeit.timeit(
+            partial(police.write_counts_all, path_log=path_dir, path_data=path_dir),
+            number=1,
+        )
+        print(f"write counts: {seconds:.1f}s for {len(MONTHS)} months", file=sys.stderr)
+        for name, function in [
+            ("group street", group_street),
+            ("read counts", read_counts),
+        ]:
+            seconds = min(
+                timeit.repeat(partial(function, path_dir), number=NUMBER, repeat=3),
+            )
+            print(
+                f"{name}: {seconds / NUMBER * 1e3:.0f}ms per read",
+                file=sys.stderr,
+            )
+        fryer.logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time for joining outcomes to street crimes on the `id_crime` strings and on the
+integer `crime_key`, with the outcomes sorted by `crime_key` as they are written.
+
+Run with `uv run python benchmarks/benchmark_police_outcomes_join.py > /dev/null`,
+the results are written to stderr.
+"""
+
+import hashlib
+import sys
+import timeit
+from functools import partial
+
+import numpy as np
+import polars as pl
+
+import fryer.data.uk_police_crime_data as police
+
+NUMBER = 5
+NUM_CRIMES = 500_000
+NUM_OUTCOMES = 600_000
+
+
+def create_dfs() -> tuple[pl.DataFrame, pl.DataFrame]:
+    rng = np.random.default_rng(0)
+    df_street = (
+        pl.DataFrame(
+            {
+                "id_crime": [
+                    hashlib.sha256(str(i).encode()).hexdigest()
+                    for i in range(NUM_CRIMES)
+                ],
+                "crime_type": "burglary",
+            },
+        )
+        .with_columns(month=pl.date(2024, 1, 1))
+        .with_columns(police.EXPR_CRIME_KEY)
+    )
+    df_outcomes = (
+        df_street.select("id_crime", "crime_key")
+        .sample(NUM_OUTCOMES, with_replacement=True, seed=0)
+        .with_columns(
+            outcome_type=pl.Series(rng.integers(0, 10, NUM_OUTCOMES)).cast(pl.String),
+        )
+        .sort("crime_key")
+    )
+    return df_street, df_outcomes
+
+
+def join(df_street: pl.DataFrame, df_outcomes: pl.DataFrame, on: str) -> pl.DataFrame:
+    return df_outcomes.join(df_street.drop({"id_crime", "crime_key"} - {on}), on=on)
+
+
+def main() -> None:
+    df_street, df_outcomes = create_dfs()
+    for on in ["id_crime", "crime_key"]:
+        seconds = min(
+            timeit.repeat(
+                partial(join, df_street, df_outcomes, on),
+                number=NUMBER,
+                repeat=3,
+            ),
+        )
+        print(f"join on {on}: {seconds / NUMBER * 1e3:.0f}ms per join", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
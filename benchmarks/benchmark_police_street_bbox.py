@@ -0,0 +1,87 @@
+"""Time for bounding box and radius filters on a month of street crimes written with
+the police profile, sorted by grid cell in smaller row groups, and sorted by area as
+before, where every row group spans the country.
+
+Run with `uv run python benchmarks/benchmark_police_street_bbox.py > /dev/null`, the
+results are written to stderr.
+"""
+
+import sys
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+import fryer.data.uk_police_crime_data as police
+import fryer.grid
+import fryer.parquet
+
+NUMBER = 20
+NUM_ROWS = 500_000
+BBOX = (-0.15, 51.49, -0.1, 51.52)
+RADIUS = (-0.1276, 51.5072, 1_000)
+PROFILES = {
+    "area": fryer.parquet.WriteProfile(
+        sort_by=("lower_layer_super_output_area_code", "month"),
+    ),
+    "cell": police.WRITE_PROFILE,
+}
+
+
+def create_df() -> pl.DataFrame:
+    rng = np.random.default_rng(0)
+    return pl.DataFrame(
+        {
+            "longitude": rng.uniform(-5.5, 1.5, NUM_ROWS).astype(np.float32),
+            "latitude": rng.uniform(50.0, 55.5, NUM_ROWS).astype(np.float32),
+            "lower_layer_super_output_area_code": [
+                f"E{i:08d}" for i in rng.integers(0, 35_000, NUM_ROWS)
+            ],
+        },
+    ).with_columns(police.EXPR_CELL, month=pl.date(2024, 1, 1))
+
+
+def scan(path_file: Path, expr: pl.Expr) -> pl.DataFrame:
+    return pl.scan_parquet(path_file).filter(expr).collect()
+
+
+def main() -> None:
+    df = create_df()
+    lon_lat_cell = [pl.col("longitude"), pl.col("latitude"), pl.col("cell")]
+    longitude, latitude, metres = RADIUS
+    filters = {
+        "bbox": fryer.grid.get_expr_in_bbox(*lon_lat_cell, bbox=BBOX),
+        "radius": fryer.grid.get_expr_in_bbox(
+            *lon_lat_cell,
+            bbox=fryer.grid.get_bbox_radius(longitude, latitude, metres),
+        )
+        & fryer.grid.get_expr_within_radius(
+            *lon_lat_cell[:2],
+            centre=(longitude, latitude),
+            metres=metres,
+        ),
+    }
+    with tempfile.TemporaryDirectory() as path_tmp:
+        for name_profile, profile in PROFILES.items():
+            path_file = Path(path_tmp) / f"{name_profile}.parquet"
+            fryer.parquet.write(df, path_file, profile=profile)
+            for name_filter, expr in filters.items():
+                seconds = min(
+                    timeit.repeat(
+                        partial(scan, path_file, expr),
+                        number=NUMBER,
+                        repeat=3,
+                    ),
+                )
+                print(
+                    f"{name_profile}, {name_filter}: "
+                    f"{seconds / NUMBER * 1e3:.1f}ms per scan",
+                    file=sys.stderr,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Peak RSS of parsing a month of police street files, reading each member into bytes
+and concatenating the parsed frames, and with `parse_street`, which reads the members
+in chunks. Each parse runs in its own process so the peaks are not shared.
+
+Run with `uv run python benchmarks/benchmark_police_street_memory.py > /dev/null`,
+the results are written to stderr.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pandas as pd
+import polars as pl
+
+import fryer.data.uk_police_crime_data as police
+
+MONTH = "2020-01"
+FORCES = list(police.FORCE_MAPPING)[:10]
+NUM_ROWS = 200_000
+
+
+def get_csv(force: str) -> str:
+    header = (
+        "Crime ID,Month,Reported by,Falls within,Longitude,Latitude,Location,"
+        "LSOA code,LSOA name,Crime type,Last outcome category,Context"
+    )
+    rows = [
+        f"{i:064x},{MONTH},{force},{force},-0.1,51.5,On or near Street {i},"
+        f"E01{i:06d},Westminster {i:03d},Burglary,Under investigation,"
+        for i in range(NUM_ROWS)
+    ]
+    return "\n".join([header, *rows])
+
+
+def get_max_rss_mb() -> float:
+    # Unlike ru_maxrss, the high water mark is not inherited from the parent process
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    msg = "VmHWM not found in /proc/self/status"
+    raise ValueError(msg)
+
+
+def parse(path_raw: Path, *, chunked: bool) -> None:
+    datetime_download = pd.Timestamp.fromtimestamp(path_raw.stat().st_mtime)
+    rss_before = get_max_rss_mb()
+    with ZipFile(path_raw) as zip_file:
+        files_to_read = zip_file.namelist()
+        if chunked:
+            df = police.parse_street(
+                zip_file,
+                files_to_read=files_to_read,
+                datetime_download=datetime_download,
+            )
+        else:
+            df = pl.concat(
+                [pl.read_csv(zip_file.read(file_name)) for file_name in files_to_read],
+            ).select(
+                *police.EXPRS_STREET,
+                pl.lit(datetime_download).alias("datetime_download"),
+            )
+    print(
+        f"{chunked=}: peak RSS {rss_before:.0f}MB before and "
+        f"{get_max_rss_mb():.0f}MB after parsing, "
+        f"estimated size {df.estimated_size('mb'):.0f}MB",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_tmp:
+        path_raw = Path(path_tmp) / "raw.zip"
+        with ZipFile(path_raw, "w", compression=ZIP_DEFLATED) as zip_file:
+            for force in FORCES:
+                zip_file.writestr(
+                    f"{MONTH}/{MONTH}-{force.lower().replace(' ', '-')}-street.csv",
+                    get_csv(force),
+                )
+        for chunked in [False, True]:
+            subprocess.run(  # noqa: S603 - Running this script
+                [sys.executable, __file__, str(path_raw), str(chunked)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        main()
+    else:
+        parse(Path(sys.argv[1]), chunked=sys.argv[2] == "True")
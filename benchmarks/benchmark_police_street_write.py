@@ -0,0 +1,92 @@
+"""Time to write every month of an archive of police street files with `write_street`
+per month, which opens the archive and lists its files for each month, and with
+`write_street_archive`, which opens and indexes it once, and in `MAX_WORKERS`
+processes with `write_street_archive_parallel`.
+
+Run with `uv run python benchmarks/benchmark_police_street_write.py > /dev/null`, the
+results are written to stderr.
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from zipfile import ZipFile
+
+import pandas as pd
+
+import fryer.data.uk_police_crime_data as police
+import fryer.logger
+
+MONTHS = pd.date_range("2017-05-01", "2020-04-01", freq="MS")
+FORCES = list(police.FORCE_MAPPING)
+NUM_ROWS = 2_000
+TYPES_FILE = ["street", "outcomes", "stop-and-search"]
+MAX_WORKERS = 4
+
+
+def get_csv(month: pd.Timestamp, force: str) -> str:
+    rows = [
+        f"id-{i},{month:%Y-%m},{force},{force},-0.1,51.5,On or near Street,"
+        f"E01000{i:03d},Westminster {i:03d},Burglary,Under investigation,"
+        for i in range(NUM_ROWS)
+    ]
+    header = (
+        "Crime ID,Month,Reported by,Falls within,Longitude,Latitude,Location,"
+        "LSOA code,LSOA name,Crime type,Last outcome category,Context"
+    )
+    return "\n".join([header, *rows])
+
+
+def write_archive(path_raw: Path) -> None:
+    path_raw.parent.mkdir(parents=True)
+    with ZipFile(path_raw, "w") as zip_file:
+        for month in MONTHS:
+            for force in FORCES:
+                csv = get_csv(month, force)
+                name = force.lower().replace(" ", "-")
+                for type_file in TYPES_FILE:
+                    zip_file.writestr(
+                        f"{month:%Y-%m}/{month:%Y-%m}-{name}-{type_file}.csv",
+                        csv,
+                    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_tmp:
+        path_dir = Path(path_tmp)
+        kwargs = {"path_log": path_dir, "path_data": path_dir}
+        path_raw = path_dir / police.KEY_RAW / "2017-05-01_2020-04-01.zip"
+        write_archive(path_raw)
+
+        seconds_start = time.perf_counter()
+        for month in MONTHS:
+            police.write_street(month=month, path_data_raw=path_dir, **kwargs)
+        seconds = time.perf_counter() - seconds_start
+        print(f"write_street per month: {seconds:.2f}s", file=sys.stderr)
+
+        shutil.rmtree(path_dir / police.KEY)
+        seconds_start = time.perf_counter()
+        police.write_street_archive(path_raw=path_raw, months=list(MONTHS), **kwargs)
+        seconds = time.perf_counter() - seconds_start
+        print(f"write_street_archive: {seconds:.2f}s", file=sys.stderr)
+
+        shutil.rmtree(path_dir / police.KEY)
+        seconds_start = time.perf_counter()
+        police.write_street_archive_parallel(
+            path_raw=path_raw,
+            months=list(MONTHS),
+            max_workers=MAX_WORKERS,
+            **kwargs,
+        )
+        seconds = time.perf_counter() - seconds_start
+        print(
+            f"write_street_archive_parallel, {MAX_WORKERS=}: {seconds:.2f}s",
+            file=sys.stderr,
+        )
+        fryer.logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Peak RSS of `read().collect()` for price paid with the address columns as strings
+and as Enums of the vocabulary, `compact=True`. Each read runs in its own process so
+the peaks are not shared.
+
+Run with `uv run python benchmarks/benchmark_price_paid_memory.py > /dev/null`, the
+results are written to stderr.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+import fryer.data.uk_gov_hm_land_registry_price_paid as price_paid
+import fryer.logger
+
+YEARS = range(1995, 2025)
+NUM_ROWS_PER_YEAR = 200_000
+# Roughly the number of distinct values of each column in the full history
+CARDINALITIES = {
+    "postcode": 500_000,
+    "street": 100_000,
+    "locality": 10_000,
+    "town_city": 1_000,
+    "district": 300,
+    "county": 100,
+}
+
+
+def create_df(year: int) -> pl.DataFrame:
+    rng = np.random.default_rng(year)
+    return pl.DataFrame(
+        {
+            "id_transaction": [
+                f"{{{year}-{i:028X}}}" for i in range(NUM_ROWS_PER_YEAR)
+            ],
+            "price": rng.integers(50_000, 1_000_000, NUM_ROWS_PER_YEAR).astype(float),
+            "date": pl.date_range(
+                pl.date(year, 1, 1),
+                pl.date(year, 12, 31),
+                eager=True,
+            ).sample(NUM_ROWS_PER_YEAR, with_replacement=True, seed=year),
+        }
+        | {
+            column: [
+                f"{column.upper()} {i}"
+                for i in rng.integers(0, cardinality, NUM_ROWS_PER_YEAR)
+            ]
+            for column, cardinality in CARDINALITIES.items()
+        },
+    )
+
+
+def get_max_rss_mb() -> float:
+    # Unlike ru_maxrss, the high water mark is not inherited from the parent process
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    msg = "VmHWM not found in /proc/self/status"
+    raise ValueError(msg)
+
+
+def read(path_dir: Path, *, compact: bool) -> None:
+    rss_before = get_max_rss_mb()
+    df = price_paid.read(compact=compact, path_log=path_dir, path_data=path_dir)
+    df = df.collect()
+    print(
+        f"{compact=}: peak RSS {rss_before:.0f}MB before and "
+        f"{get_max_rss_mb():.0f}MB after collect, "
+        f"estimated size {df.estimated_size('mb'):.0f}MB",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_tmp:
+        path_dir = Path(path_tmp)
+        for year in YEARS:
+            create_df(year).write_parquet(
+                price_paid.path(year=year, path_data=path_dir, mkdir=True),
+            )
+        price_paid.write_vocabulary(path_log=path_dir, path_data=path_dir)
+        fryer.logger.shutdown()
+
+        for compact in [False, True]:
+            subprocess.run(  # noqa: S603 - Running this script
+                [sys.executable, __file__, path_tmp, str(compact)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        main()
+    else:
+        read(Path(sys.argv[1]), compact=sys.argv[2] == "True")
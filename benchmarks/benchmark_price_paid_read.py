@@ -0,0 +1,87 @@
+"""Time for a typical price paid query, the last 24 months of flats, reading from the
+yearly files and from the hive partitioned layout.
+
+Run with `uv run python benchmarks/benchmark_price_paid_read.py > /dev/null`, the
+results are written to stderr.
+"""
+
+import sys
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+import fryer.data.uk_gov_hm_land_registry_price_paid as price_paid
+import fryer.logger
+
+NUMBER = 5
+YEARS = range(1995, 2025)
+NUM_ROWS_PER_YEAR = 200_000
+QUERY = {
+    "date_from": "2023-01-01",
+    "date_to": "2024-12-31",
+    "property_types": ["flats_or_maisonettes"],
+}
+
+
+def create_df(year: int) -> pl.DataFrame:
+    rng = np.random.default_rng(year)
+    return pl.DataFrame(
+        {
+            "id_transaction": [
+                f"{{{year}-{i:028X}}}" for i in range(NUM_ROWS_PER_YEAR)
+            ],
+            "price": rng.integers(50_000, 1_000_000, NUM_ROWS_PER_YEAR).astype(float),
+            "date": pl.date_range(
+                pl.date(year, 1, 1),
+                pl.date(year, 12, 31),
+                eager=True,
+            ).sample(NUM_ROWS_PER_YEAR, with_replacement=True, seed=year),
+            "property_type": pl.Series(
+                rng.choice(
+                    list(price_paid.PROPERTY_TYPE_MAP.values()), NUM_ROWS_PER_YEAR
+                ),
+                dtype=pl.Enum(price_paid.PROPERTY_TYPE_MAP.values()),
+            ),
+            "postcode": rng.choice(
+                ["SW1A 1AA", "M1 1AE", "EH1 1YZ"], NUM_ROWS_PER_YEAR
+            ),
+        },
+    )
+
+
+def read(**kwargs: Any) -> pl.DataFrame:  # noqa: ANN401 - Passed on to read
+    return price_paid.read(**QUERY, **kwargs).collect()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path_tmp:
+        path_dir = Path(path_tmp)
+        kwargs = {"path_log": path_dir, "path_data": path_dir}
+        for year in YEARS:
+            create_df(year).write_parquet(
+                price_paid.path(year=year, path_data=path_dir, mkdir=True),
+            )
+        price_paid.write_partitioned_all(**kwargs)
+
+        for partitioned in [False, True]:
+            seconds = min(
+                timeit.repeat(
+                    partial(read, partitioned=partitioned, **kwargs),
+                    number=NUMBER,
+                    repeat=3,
+                ),
+            )
+            print(
+                f"{partitioned=}: {seconds / NUMBER * 1e3:.1f}ms per query",
+                file=sys.stderr,
+            )
+        fryer.logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,54 @@
-from fryer import (
-    config,
-    constants,
-    counter,
-    data,
-    datetime,
-    logger,
-    map,
-    path,
-    requests,
-    transformer,
-    typing,
-)
+import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fryer import (
+        archive,
+        config,
+        constants,
+        counter,
+        data,
+        datetime,
+        grid,
+        logger,
+        map,
+        parquet,
+        path,
+        requests,
+        sketch,
+        transformer,
+        typing,
+    )
 
 __all__ = [
+    "archive",
     "config",
     "constants",
     "counter",
     "data",
     "datetime",
+    "grid",
     "logger",
     "map",
+    "parquet",
     "path",
     "requests",
+    "sketch",
     "transformer",
     "typing",
 ]
+
+
+def __getattr__(name: str) -> ModuleType:
+    # Submodules are only imported on first access, see PEP 562
+    if name in __all__:
+        module = importlib.import_module(f"fryer.{name}")
+        globals()[name] = module
+        return module
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
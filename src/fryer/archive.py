@@ -0,0 +1,82 @@
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+from zipfile import ZipFile
+
+import polars as pl
+
+__all__ = ["CHUNK_SIZE", "iter_csv_chunks", "read_csv_members"]
+
+CHUNK_SIZE = 16 * 1024**2
+
+
+def get_end_records(chunk: bytes) -> int:
+    """Get the end of the last whole record of `chunk`, which starts with a record, the
+    position after its last line break outside of quotes, or 0 if there is none.
+    """
+    end = chunk.rfind(b"\n")
+    # Escaped quotes are doubled, so a line break is outside of quotes if there are
+    # an even number of quotes before it
+    while end != -1 and chunk.count(b'"', 0, end) % 2:
+        end = chunk.rfind(b"\n", 0, end)
+    return end + 1
+
+
+def iter_csv_chunks(
+    zip_file: ZipFile,
+    name: str,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Decompress the CSV member `name` of `zip_file` in chunks of about `chunk_size`
+    bytes of whole records, each starting with the header, so the whole member is
+    never in memory. A member with a header and no rows is one chunk of the header.
+    """
+    with zip_file.open(name) as file:
+        header = file.readline()
+        remainder = b""
+        is_empty = True
+        while chunk := file.read(chunk_size):
+            chunk = remainder + chunk
+            end = get_end_records(chunk)
+            remainder = chunk[end:]
+            if end:
+                is_empty = False
+                yield header + chunk[:end]
+        if remainder.strip():
+            yield header + remainder
+        elif is_empty and header.strip():
+            yield header
+
+
+def read_csv_members(
+    zip_file: ZipFile,
+    names: Iterable[str],
+    *,
+    transform: Callable[[pl.DataFrame], pl.DataFrame] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to read_csv
+) -> pl.DataFrame:
+    """Read the CSV members `names` of `zip_file` chunk by chunk with `pl.read_csv`
+    and `kwargs`, applying `transform` to each chunk as it is read.
+
+    Only a chunk of the CSVs is in memory at once, alongside the transformed frames,
+    which are concatenated without copying them into one buffer. The columns are read
+    as strings unless `kwargs` says otherwise, and if the schema is inferred it is
+    inferred from the first chunk with rows only, so every chunk has the same schema.
+    """
+    kwargs = {"infer_schema": False, **kwargs}
+    schema_overrides = kwargs.pop("schema_overrides", None) or {}
+    schema_inferred = {}
+    dfs = []
+    for name in names:
+        for chunk in iter_csv_chunks(zip_file, name, chunk_size=chunk_size):
+            df = pl.read_csv(
+                chunk,
+                schema_overrides={**schema_inferred, **schema_overrides},
+                **kwargs,
+            )
+            if kwargs["infer_schema"] and not schema_inferred and not df.is_empty():
+                schema_inferred = dict(df.schema)
+            dfs.append(df if transform is None else transform(df))
+    # Members without rows only give the columns, whose inferred dtypes are strings
+    return pl.concat([df for df in dfs if not df.is_empty()] or dfs, rechunk=False)
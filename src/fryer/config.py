@@ -6,29 +6,70 @@ from dotenv import dotenv_values
 from fryer.typing import TypePathLike
 
 __all__ = [
+    "clear",
     "get",
     "load",
+    "load_env_file",
 ]
 
 
-def load(path_env: TypePathLike | None = None) -> dict[str, str]:
+# Parsed env files keyed on their absolute path, alongside the (mtime, size) of the
+# file when it was parsed so we know when to parse it again
+CACHE: dict[str, tuple[tuple[int, int] | None, dict[str, str]]] = {}
+
+
+def get_signature(path_env: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path_env)  # noqa: PTH116 - os.stat is cheaper than building a Path
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_env_file(
+    path_env: TypePathLike | None = None,
+    *,
+    reload: bool = False,
+) -> dict[str, str]:
+    """Load the values of the env file, only parsing it again if the file's mtime or
+    size have changed since it was last parsed or if `reload` is True.
+    """
     if path_env is None:
         path_env = ".env"
-    environ = {
-        **os.environ,
-        **dotenv_values(path_env),
-    }
-    environ_without_none_values = {
-        key: value for key, value in environ.items() if value is not None
+    path_env = os.path.abspath(path_env)  # noqa: PTH100 - Cheaper than Path.resolve
+    signature = get_signature(path_env)
+
+    cached = CACHE.get(path_env)
+    if not reload and cached is not None and cached[0] == signature:
+        return cached[1]
+
+    values = dotenv_values(path_env)
+    values_without_none_values = {
+        key: value for key, value in values.items() if value is not None
     }
-    if len(environ) != len(environ_without_none_values):
-        msg = (
-            f"Values are None for {environ.keys() - environ_without_none_values.keys()}"
-        )
+    if len(values) != len(values_without_none_values):
+        msg = f"Values are None for {values.keys() - values_without_none_values.keys()}"
         raise ValueError(
             msg,
         )
-    return environ_without_none_values
+    CACHE[path_env] = (signature, values_without_none_values)
+    return values_without_none_values
+
+
+def clear() -> None:
+    """Clear the cache of parsed env files, so they are parsed again on next use."""
+    CACHE.clear()
+
+
+def load(
+    path_env: TypePathLike | None = None,
+    *,
+    reload: bool = False,
+) -> dict[str, str]:
+    return {
+        **os.environ,
+        **load_env_file(path_env=path_env, reload=reload),
+    }
 
 
 T = TypeVar("T")
@@ -38,7 +79,13 @@ def get(
     key: str,
     path_env: TypePathLike | None = None,
     override: T | str | None = None,
+    *,
+    reload: bool = False,
 ) -> T | str:
     if override is not None:
         return override
-    return load(path_env=path_env)[key]
+    # Values in the env file take precedence over the environment, as in load
+    values = load_env_file(path_env=path_env, reload=reload)
+    if key in values:
+        return values[key]
+    return os.environ[key]
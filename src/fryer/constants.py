@@ -1,6 +1,8 @@
 __all__ = [
     "FORMAT_ISO_DATE",
     "FORMAT_YYYYMMDD_DATE",
+    "FRYER_ENV_BACKOFF_FACTOR",
+    "FRYER_ENV_MAX_RETRIES",
     "FRYER_ENV_PATH_DATA",
     "FRYER_ENV_PATH_LOG",
     "FRYER_ENV_TODAY",
@@ -13,6 +15,8 @@ __all__ = [
 FRYER_ENV_PATH_LOG: str = "FRYER_ENV_PATH_LOG"
 FRYER_ENV_PATH_DATA: str = "FRYER_ENV_PATH_DATA"
 FRYER_ENV_TODAY: str = "FRYER_ENV_TODAY"
+FRYER_ENV_MAX_RETRIES: str = "FRYER_ENV_MAX_RETRIES"
+FRYER_ENV_BACKOFF_FACTOR: str = "FRYER_ENV_BACKOFF_FACTOR"
 
 
 YYYYMMDD: str = "YYYY-MM-DD"
@@ -1,13 +1,18 @@
-from fryer.data import (
-    ons_local_authority_district_boundaries,
-    os_codepoint_postcode,
-    uk_gov_compare_school_performance,
-    uk_gov_dept_for_transport_road_accident,
-    uk_gov_hm_land_registry_price_paid,
-    uk_gov_ons_geo,
-    uk_gov_ons_postcode_directory,
-    uk_police_crime_data,
-)
+import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fryer.data import (
+        ons_local_authority_district_boundaries,
+        os_codepoint_postcode,
+        uk_gov_compare_school_performance,
+        uk_gov_dept_for_transport_road_accident,
+        uk_gov_hm_land_registry_price_paid,
+        uk_gov_ons_geo,
+        uk_gov_ons_postcode_directory,
+        uk_police_crime_data,
+    )
 
 __all__ = [
     "ons_local_authority_district_boundaries",
@@ -19,3 +24,15 @@ __all__ = [
     "uk_gov_ons_postcode_directory",
     "uk_police_crime_data",
 ]
+
+
+def __getattr__(name: str) -> ModuleType:
+    # Dataset modules pull in heavy dependencies so are only imported on first access
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
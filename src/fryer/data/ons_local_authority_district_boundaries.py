@@ -1,7 +1,6 @@
 from pathlib import Path
 
 import geopandas as gpd
-import requests
 
 import fryer.data
 import fryer.datetime
@@ -9,7 +8,6 @@ import fryer.logger
 import fryer.path
 import fryer.requests
 import fryer.transformer
-from fryer.constants import TIMEOUT_LONG
 from fryer.typing import TypePathLike
 
 key = Path(__file__).stem
@@ -22,10 +20,8 @@ def download(
     path_env: TypePathLike | None = None,
 ) -> None:
     url = "https://stg-arcgisazurecdataprod1.az.arcgis.com/exportfiles-1559-23740/Local_Authority_Districts_May_2024_Boundaries_UK_BFC_-6788913184658251542.geojson?sv=2018-03-28&sr=b&sig=E2jq3p5CCjWdfSIM8JGdS8c2p%2BNs1%2BvPOsk9VqAOw1Q%3D&se=2025-01-03T21%3A01%3A16Z&sp=r"
-    response = requests.get(url, timeout=TIMEOUT_LONG)
-    fryer.requests.validate_response(
-        response=response,
-        url=url,
+    response = fryer.requests.get(
+        url,
         logger=fryer.logger.get(key=key, path_log=path_log, path_env=path_env),
         key=key,
     )
@@ -1,28 +1,33 @@
-from io import BytesIO
+from collections.abc import Collection
 from pathlib import Path
 from zipfile import ZipFile, is_zipfile
 
 import polars as pl
-import requests
 from convertbng.util import convert_lonlat
 
 import fryer.datetime
 import fryer.logger
+import fryer.parquet
 import fryer.path
 import fryer.requests
-from fryer.constants import TIMEOUT_LONG
 from fryer.typing import TypePathLike
 
 __all__ = [
     "KEY",
+    "WRITE_PROFILE",
     "derive",
     "download",
+    "lookup_postcodes",
     "read",
     "write",
 ]
 
 KEY = Path(__file__).stem
 KEY_RAW = KEY + "_raw"
+WRITE_PROFILE = fryer.parquet.WriteProfile(
+    sort_by=("Postcode",),
+    bloom_filter=("Postcode",),
+)
 
 
 def download(
@@ -37,23 +42,29 @@ def download(
 
     url = "https://api.os.uk/downloads/v1/products/CodePointOpen/downloads?area=GB&format=CSV&redirect"
 
-    response = requests.get(url, allow_redirects=True, timeout=TIMEOUT_LONG)
-    fryer.requests.validate_response(response, url, logger=logger, key=key)
-
-    validate_zipfile(BytesIO(response.content))
-    zip_file = ZipFile(BytesIO(response.content))
-
     path_key = fryer.path.for_key(
         key=key,
         path_data=path_data,
         path_env=path_env,
         mkdir=True,
     )
-    zip_file.extractall(path_key)
+    path_file = path_key / f"{key}.zip"
+
+    fryer.requests.download_file(
+        url,
+        path_file,
+        logger=logger,
+        key=key,
+        allow_redirects=True,
+    )
 
+    validate_zipfile(path_file)
+    with ZipFile(path_file) as zip_file:
+        zip_file.extractall(path_key)
 
-def validate_zipfile(bytes_io: BytesIO) -> None:
-    if not is_zipfile(bytes_io):
+
+def validate_zipfile(path_file: TypePathLike) -> None:
+    if not is_zipfile(path_file):
         msg = "The file is not a zip file."
         raise ValueError(msg)
 
@@ -78,10 +89,7 @@ def derive(
     gps = convert_lonlat(df["Eastings"].to_list(), df["Northings"].to_list())
     df = df.with_columns(pl.Series("Longitude", gps[0]), pl.Series("Latitude", gps[1]))
 
-    logger.info(
-        f"""{df=
-}""",
-    )
+    fryer.logger.log_df(logger, df)
 
     return df
 
@@ -105,7 +113,7 @@ def write(
         path_data=path_data,
         path_env=path_env,
     )
-    df.write_parquet(path_file)
+    fryer.parquet.write(df, path_file, profile=WRITE_PROFILE)
     logger.info(f"Wrote postcode data to {path_file=}")
 
 
@@ -122,6 +130,24 @@ def read(
     return pl.scan_parquet(path_file)
 
 
+def lookup_postcodes(
+    postcodes: Collection[str],
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    """Read the rows of `postcodes`, only reading the row groups which might have
+    them.
+    """
+    key = KEY
+    logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
+    path_key = fryer.path.for_key(key=key, path_data=path_data, path_env=path_env)
+    path_file = path_key / f"{key}.parquet"
+    logger.info(f"Looking up {len(postcodes)} postcodes in {path_file=}")
+    return fryer.parquet.lookup([path_file], column="Postcode", values=postcodes)
+
+
 def main() -> None:
     download()
     write()
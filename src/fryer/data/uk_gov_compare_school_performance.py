@@ -3,13 +3,13 @@ from pathlib import Path
 
 import lxml.html
 import pandas as pd
-import requests
 from tqdm import tqdm
 
 import fryer.datetime
 import fryer.logger
 import fryer.path
-from fryer.constants import FORMAT_ISO_DATE, TIMEOUT_LONG, TIMEOUT_SHORT
+import fryer.requests
+from fryer.constants import FORMAT_ISO_DATE, TIMEOUT_SHORT
 from fryer.typing import TypeDatetimeLike, TypePathLike
 
 __all__ = [
@@ -71,8 +71,10 @@ def write_raw(
     # Get "filters" which are different data types available
     url_download_data_info = f"https://www.compare-school-performance.service.gov.uk/download-data?currentstep=region&downloadYear={year_start}-{year_end}&regiontype=all&la=0"
     logger.info(f"{url_download_data_info=}")
-    response_download_data_info = requests.get(
+    response_download_data_info = fryer.requests.get(
         url_download_data_info,
+        logger=logger,
+        key=key,
         headers=headers,
         timeout=TIMEOUT_SHORT,
     )
@@ -98,13 +100,7 @@ def write_raw(
     logger.info(f"{url_meta=}, {key=}")
 
     logger.info(f"Reading data {url=}")
-    response = requests.get(url, headers=headers, timeout=TIMEOUT_LONG)
-    logger.info(f"{response}")
-    if not response.ok:
-        msg = f"Did not read response correctly for {key=}, {url=}, {response=}"
-        raise ValueError(
-            msg,
-        )
+    response = fryer.requests.get(url, logger=logger, key=key, headers=headers)
 
     logger.info(f"Dumping {key=} data to {path_file=}")
     path_file.write_bytes(response.content)
@@ -112,15 +108,12 @@ def write_raw(
     # Meta
     if year_end > 2010:  # noqa: PLR2004 - Okay to compare a magic number (year)
         logger.info(f"Reading meta {url_meta=}")
-        response = requests.get(url_meta, headers=headers, timeout=TIMEOUT_LONG)
-        logger.info(f"{response}")
-        if not response.ok:
-            msg = (
-                f"Did not read response correctly for {key=}, {url_meta=}, {response=}"
-            )
-            raise ValueError(
-                msg,
-            )
+        response = fryer.requests.get(
+            url_meta,
+            logger=logger,
+            key=key,
+            headers=headers,
+        )
 
         path_file_meta = path_key / f"{year:{FORMAT_ISO_DATE}}_meta.zip"
         logger.info(f"Dumping {key=} meta to {path_file_meta=}")
@@ -1,17 +1,15 @@
 from collections.abc import Iterable
 from pathlib import Path
 
-import pandas as pd
 import polars as pl
-import requests
 
 import fryer.data
 import fryer.datetime
 import fryer.logger
+import fryer.parquet
 import fryer.path
 import fryer.requests
 import fryer.transformer
-from fryer.constants import TIMEOUT_LONG
 from fryer.typing import TypePathLike
 
 guidance_url = (
@@ -20,6 +18,7 @@ guidance_url = (
 
 __all__ = [
     "KEY",
+    "WRITE_PROFILES",
     "derive",
     "download",
     "read",
@@ -30,6 +29,12 @@ __all__ = [
 
 KEY = Path(__file__).stem
 KEY_RAW = KEY + "_raw"
+# Vehicles and casualties are mostly joined to their collision
+WRITE_PROFILES = {
+    "vehicle": fryer.parquet.WriteProfile(sort_by=("accident_index",)),
+    "collision": fryer.parquet.WriteProfile(sort_by=("date", "accident_index")),
+    "casualty": fryer.parquet.WriteProfile(sort_by=("accident_index",)),
+}
 
 DATE_FORMATS = {
     "vehicle": {},
@@ -159,40 +164,6 @@ TRANSFORMATIONS = {
 }
 
 
-def release_schedule(
-    *,
-    path_log: TypePathLike | None = None,
-    path_data: TypePathLike | None = None,
-    path_env: TypePathLike | None = None,
-) -> bool:
-    path_key = fryer.path.for_key(key=KEY_RAW, path_data=path_data, path_env=path_env)
-    logger = fryer.logger.get(key=KEY_RAW, path_log=path_log, path_env=path_env)
-
-    if not path_key.exists():
-        path_key.mkdir(parents=True)
-        return True
-
-    # get and sort a list of the created datetimes of the existing files
-
-    if ts := [
-        pd.Timestamp.fromtimestamp(filepath.stat().st_ctime)
-        for filepath in path_key.rglob("*.csv")
-    ]:
-        ts.sort(reverse=True)
-
-        new_data_available = ts[0] > pd.Timestamp(
-            ts[0].year, 10, 1
-        ) and pd.Timestamp.today() > pd.Timestamp(ts[0].year + 1, 10, 1)
-
-        if not new_data_available:
-            logger.info(f"Data for {ts[0].year - 1} is already downloaded")
-            logger.info(f"Data for {ts[0].year} has not been released yet")
-            logger.info(f"Skipping download of {path_key=}")
-        return new_data_available
-    # if there are no files, then download
-    return True
-
-
 def download(
     *,
     path_log: TypePathLike | None = None,
@@ -207,31 +178,31 @@ def download(
         mkdir=True,
     )
 
-    if not release_schedule(path_data=path_data, path_env=path_env):
-        return
-
     base_url = "https://data.dft.gov.uk/road-accidents-safety-data"
 
     datasets = ["vehicle", "collision", "casualty"]
 
+    # The files are replaced in place upstream when a new year is published, so we
+    # check if each has changed since we downloaded it rather than guessing from the
+    # release schedule
     for dataset in datasets:
         url = f"{base_url}/dft-road-casualty-statistics-{dataset}-1979-latest-published-year.csv"
 
         path_file = path_key / f"{dataset}-1979-latest-published-year.csv"
 
-        response = requests.get(url, allow_redirects=True, timeout=TIMEOUT_LONG)
-        fryer.requests.validate_response(response, url, logger=logger, key=KEY_RAW)
-
-        path_file.write_bytes(response.content)
+        fryer.requests.download_file_if_modified(
+            url,
+            path_file,
+            logger=logger,
+            key=KEY_RAW,
+        )
 
-    response = requests.get(
+    url = (
         base_url
-        + "/dft-road-casualty-statistics-road-safety-open-dataset-data-guide-2024.xlsx",
-        timeout=TIMEOUT_LONG,
+        + "/dft-road-casualty-statistics-road-safety-open-dataset-data-guide-2024.xlsx"
     )
-    fryer.requests.validate_response(response, url, logger=logger, key=KEY_RAW)
     path_file = path_key / "dft-road-safety-open-dataset-guide-2024.xlsx"
-    path_file.write_bytes(response.content)
+    fryer.requests.download_file_if_modified(url, path_file, logger=logger, key=KEY_RAW)
 
 
 def load_data_guide(
@@ -302,8 +273,10 @@ def derive(
         ).exists():
             path_key.mkdir(parents=True)
 
-        df.write_parquet(
+        fryer.parquet.write(
+            df,
             path_key / f"{dataset}.parquet",
+            profile=WRITE_PROFILES[dataset],
         )
 
 
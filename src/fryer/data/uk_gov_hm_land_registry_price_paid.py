@@ -1,29 +1,127 @@
+import shutil
+from collections.abc import Collection, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import StringIO
 from pathlib import Path
 
 import pandas as pd
 import polars as pl
-import requests
+from filelock import FileLock
 from tqdm import tqdm
 
 import fryer.datetime
 import fryer.logger
+import fryer.parquet
 import fryer.path
-from fryer.constants import FORMAT_ISO_DATE, TIMEOUT_LONG
+import fryer.requests
+import fryer.sketch
+from fryer.constants import FORMAT_ISO_DATE
 from fryer.typing import TypeDatetimeLike, TypePathLike
 
 __all__ = [
     "KEY",
+    "KEY_AGGREGATES",
+    "KEY_PARTITIONED",
+    "KEY_PROPERTIES",
+    "KEY_RAW",
+    "KEY_SKETCHES",
+    "KEY_VOCABULARY",
+    "LEVELS_AGGREGATE",
+    "PROPERTY_TYPE_MAP",
+    "SCHEMA_AGGREGATES",
+    "SCHEMA_SKETCHES",
+    "WRITE_PROFILE",
     "download",
+    "get_exprs_compact",
+    "get_paths_vocabulary_missing",
+    "get_schema",
     "get_years",
+    "lookup_postcodes",
     "path",
+    "path_partitioned",
     "read",
+    "read_aggregates",
+    "read_price_quantiles",
+    "read_properties",
+    "read_sale_pairs",
+    "read_sales",
+    "read_vocabulary",
+    "read_vocabulary_years",
+    "update",
+    "update_vocabulary",
     "write",
+    "write_aggregates",
+    "write_aggregates_all",
     "write_all",
+    "write_partitioned",
+    "write_partitioned_all",
+    "write_property_index",
+    "write_property_index_all",
+    "write_sketches",
+    "write_sketches_all",
+    "write_vocabulary",
 ]
 
 
 KEY = Path(__file__).stem
+KEY_RAW = KEY + "_raw"
+
+URL_BASE = (
+    "http://prod.publicdata.landregistry.gov.uk.s3-website-eu-west-1.amazonaws.com"
+)
+# Additions, changes and deletions published in the last month, across all years
+FILENAME_MONTHLY_UPDATE = "pp-monthly-update-new-version.csv"
+KEY_PARTITIONED = KEY + "_partitioned"
+KEY_VOCABULARY = KEY + "_vocabulary"
+KEY_PROPERTIES = KEY + "_properties"
+KEY_AGGREGATES = KEY + "_aggregates"
+KEY_SKETCHES = KEY + "_sketches"
+
+# Levels of the postcode, e.g. for SW1A 1AA the area is SW, the district is SW1A and
+# the sector is SW1A 1
+LEVELS_AGGREGATE = ("area", "district", "sector")
+
+# Address columns repeat heavily across the years, so read can store them as Enums
+# of the values in the vocabulary rather than as one string per row
+COLUMNS_VOCABULARY = (
+    "postcode",
+    "street",
+    "locality",
+    "town_city",
+    "district",
+    "county",
+)
+
+PROPERTY_TYPE_MAP = {
+    "D": "detached",
+    "S": "semi_detached",
+    # end-of-terrace properties are included in the Terraced category above
+    "T": "terraced",
+    "F": "flats_or_maisonettes",
+    # A new "other" property type has been added to the dataset, which identifies non-residential properties.
+    # "Other" is only valid where the transaction relates to a property type that is not covered by existing values, for example where a property comprises more than one large parcel of land.
+    "O": "other",
+}
+# Columns of the aggregates, after the column of their level of the postcode
+SCHEMA_AGGREGATES = {
+    "month": pl.Date,
+    "property_type": pl.Enum(PROPERTY_TYPE_MAP.values()),
+    "count": pl.UInt32,
+    "mean_price": pl.Float64,
+    "median_price": pl.Float64,
+}
+SCHEMA_SKETCHES = {
+    "area": pl.String,
+    "month": pl.Date,
+    "property_type": pl.Enum(PROPERTY_TYPE_MAP.values()),
+    "count": pl.UInt64,
+    "sketch": pl.Binary,
+}
+# Filters are mostly on dates and postcodes
+WRITE_PROFILE = fryer.parquet.WriteProfile(
+    sort_by=("date", "postcode"),
+    bloom_filter=("postcode",),
+)
 
 
 def download(
@@ -48,14 +146,21 @@ def download(
         - Vesting Deeds Transmissions or Assents of more than one property
     """
     logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    url = get_url(year=year)
+    logger.info(f"Reading for {KEY} at {url=}")
+    response = fryer.requests.get(url, logger=logger, key=KEY)
+    df = parse(text=response.text)
+    fryer.logger.log_df(logger, df)
+    return df
 
-    url_base = (
-        "http://prod.publicdata.landregistry.gov.uk.s3-website-eu-west-1.amazonaws.com"
-    )
+
+def get_url(*, year: TypeDatetimeLike) -> str:
     year = fryer.datetime.validate_date(date=year).year
     filename = f"pp-{year}.csv"
-    url = f"{url_base}/{filename}"
+    return f"{URL_BASE}/{filename}"
+
 
+def parse(*, text: str) -> pl.DataFrame:
     datetime_download = fryer.datetime.now()
 
     exprs = [
@@ -65,17 +170,8 @@ def download(
         pl.col("postcode").cast(pl.String).str.strip_chars(" "),
         (
             pl.col("property_type").replace_strict(
-                property_type_map := {
-                    "D": "detached",
-                    "S": "semi_detached",
-                    # end-of-terrace properties are included in the Terraced category above
-                    "T": "terraced",
-                    "F": "flats_or_maisonettes",
-                    # A new "other" property type has been added to the dataset, which identifies non-residential properties.
-                    # "Other" is only valid where the transaction relates to a property type that is not covered by existing values, for example where a property comprises more than one large parcel of land.
-                    "O": "other",
-                },
-                return_dtype=pl.Enum(property_type_map.values()),
+                PROPERTY_TYPE_MAP,
+                return_dtype=pl.Enum(PROPERTY_TYPE_MAP.values()),
             )
         ),
         (
@@ -129,19 +225,18 @@ def download(
     columns = [expr.meta.output_name() for expr in exprs]
     additional_exprs = [pl.lit(datetime_download).alias("datetime_download")]
 
-    logger.info(f"Reading for {KEY} at {url=}")
-    response = requests.get(url, timeout=TIMEOUT_LONG)
-
-    df = pl.read_csv(
-        source=StringIO(response.text),
+    # Read as strings so empty text still gives every column, with the dtypes of `exprs`
+    return pl.read_csv(
+        source=StringIO(text),
         has_header=False,
-        new_columns=columns,
+        schema=dict.fromkeys(columns, pl.String),
+        raise_if_empty=False,
     ).select(*exprs, *additional_exprs)
-    logger.info(
-        f"""{df=
-}""",
-    )
-    return df
+
+
+def get_schema() -> pl.Schema:
+    """Get the schema of the yearly files, which is that of `parse`."""
+    return parse(text="").schema
 
 
 def get_years(
@@ -164,8 +259,14 @@ def path(
     year: TypeDatetimeLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
+    mkdir: bool = False,
 ) -> Path:
-    path_key = fryer.path.for_key(key=KEY, path_data=path_data, path_env=path_env)
+    path_key = fryer.path.for_key(
+        key=KEY,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
     if year is None:
         year = "*"
     else:
@@ -176,62 +277,1178 @@ def path(
 def write(
     *,
     year: TypeDatetimeLike,
+    refresh: bool | None = None,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
 ) -> None:
+    """Write the year, if it does not exist or `refresh` is True and it has changed
+    upstream since it was written. By default only the current year, which is
+    replaced in place upstream every month, is refreshed.
+    """
     logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
     year = fryer.datetime.validate_date(date=year)
+    if refresh is None:
+        refresh = year.year == fryer.datetime.today(path_env=path_env).year
 
-    path_file = path(year=year, path_data=path_data, path_env=path_env)
-    logger.info(f"{path_file=}, {KEY=}")
+    path_file = path(year=year, path_data=path_data, path_env=path_env, mkdir=True)
+    logger.info(f"{path_file=}, {KEY=}, {refresh=}")
 
     # TODO(squid): figure out if this should live here or outside
     # https://github.com/bomtall/chip-shop/issues/35
-    if path_file.exists():
+    if path_file.exists() and not refresh:
         logger.info(
             f"{path_file=} exists for {KEY}, hence we will not download or write the data",
         )
         return
 
-    df = download(year=year, path_log=path_log)
+    url = get_url(year=year)
+    logger.info(f"Reading for {KEY} at {url=}")
+    response = fryer.requests.get_if_modified(
+        url,
+        validators=fryer.requests.read_validators(path_file),
+        logger=logger,
+        key=KEY,
+    )
+    if response is None:
+        logger.info(f"{path_file=} has not changed for {KEY}, hence we will not write")
+        return
+    df = parse(text=response.text)
+    fryer.logger.log_df(logger, df)
 
     logger.info(f"Dumping {KEY}, {year=:{FORMAT_ISO_DATE}} to {path_file=}")
-    df.write_parquet(file=path_file)
+    fryer.parquet.write(df, path_file, profile=WRITE_PROFILE)
+    update_vocabulary(
+        df,
+        years=[year.year],
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    write_property_index(
+        year=year,
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    write_aggregates(
+        year=year,
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    write_sketches(
+        year=year,
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    fryer.requests.write_validators(
+        path_file,
+        fryer.requests.get_validators(response),
+    )
 
 
 def write_all(
     *,
+    max_workers: int = 1,
+    incremental: bool = False,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
 ) -> None:
+    """Write every year, with up to `max_workers` years downloading, parsing and
+    writing at once so the network and the CPU are both kept busy.
+
+    If `incremental` is True, years which exist are not refreshed, instead the
+    monthly update is applied to them with `update`.
+    """
     years = get_years(path_env=path_env)
     logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
-    logger.info(f"Writing {KEY} for {years=}")
-    for year in tqdm(years):
-        write(
+    logger.info(f"Writing {KEY} for {years=}, {max_workers=}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                write,
+                year=year,
+                refresh=False if incremental else None,
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+            for year in years
+        ]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            future.result()
+    # Years written before there was a vocabulary are not written again
+    write_vocabulary(path_log=path_log, path_data=path_data, path_env=path_env)
+    if incremental:
+        update(path_log=path_log, path_data=path_data, path_env=path_env)
+
+
+def apply_update(df: pl.DataFrame, *, df_update: pl.DataFrame) -> pl.DataFrame:
+    """Upsert the additions and changes in `df_update` into `df` and remove the
+    deletions, keyed on `id_transaction`.
+    """
+    return pl.concat(
+        [
+            df.filter(
+                ~pl.col("id_transaction").is_in(df_update.get_column("id_transaction")),
+            ),
+            df_update.filter(pl.col("record_status_monthly_file_only") != "delete"),
+        ],
+    )
+
+
+def update(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Apply the monthly update file to the years which have been written, so they are
+    kept up to date without downloading and parsing each full year again.
+
+    The update is only downloaded if it has changed, and years without a file are
+    left to `write`, as the full year includes the update. Changed and deleted sales
+    are removed from every year which has them, as a change can move a sale to
+    another year.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    path_key_raw = fryer.path.for_key(
+        key=KEY_RAW,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    path_file_raw = path_key_raw / FILENAME_MONTHLY_UPDATE
+    # Marks the update as applied, so an update downloaded by an interrupted run is
+    # still applied by the next one
+    path_file_applied = path_file_raw.with_name(f"{path_file_raw.name}.applied")
+
+    url = f"{URL_BASE}/{FILENAME_MONTHLY_UPDATE}"
+    if fryer.requests.download_file_if_modified(
+        url,
+        path_file_raw,
+        logger=logger,
+        key=KEY,
+    ):
+        path_file_applied.unlink(missing_ok=True)
+    if path_file_applied.exists():
+        logger.info(f"{path_file_raw=} has already been applied for {KEY}")
+        return
+
+    df_update = parse(text=path_file_raw.read_text()).unique(
+        subset="id_transaction",
+        keep="last",
+        maintain_order=True,
+    )
+    fryer.logger.log_df(logger, df_update, name="df_update")
+
+    ids_transaction = df_update.get_column("id_transaction")
+    years_update = set(df_update.get_column("date").dt.year())
+    # The years of the sales in the update, and those which have a sale changed or
+    # deleted by it, whichever year the sale is in now
+    path_file = path(path_data=path_data, path_env=path_env)
+    years = []
+    for path_file_year in sorted(path_file.parent.glob(path_file.name)):
+        year = fryer.datetime.validate_date(date=path_file_year.stem).year
+        if year in years_update or not (
+            pl.scan_parquet(path_file_year)
+            .filter(pl.col("id_transaction").is_in(ids_transaction))
+            .head(1)
+            .collect()
+            .is_empty()
+        ):
+            years.append(year)
+    for year in sorted(years_update - set(years)):
+        logger.info(f"No file for {year=} for {KEY}, not applying update")
+
+    for year in years:
+        path_file = path(
+            year=f"{year}-01-01",
+            path_data=path_data,
+            path_env=path_env,
+        )
+        df_update_year = df_update.filter(pl.col("date").dt.year() == year)
+        df = apply_update(
+            pl.read_parquet(path_file).filter(
+                ~pl.col("id_transaction").is_in(ids_transaction),
+            ),
+            df_update=df_update_year,
+        )
+        logger.info(f"Applying {len(df_update_year)} updates to {path_file=}")
+        fryer.parquet.write(df, path_file, profile=WRITE_PROFILE)
+        update_vocabulary(
+            df_update_year,
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        write_property_index(
+            year=f"{year}-01-01",
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        write_aggregates(
+            year=f"{year}-01-01",
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        write_sketches(
+            year=f"{year}-01-01",
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        path_key_partitioned = path_partitioned(path_data=path_data, path_env=path_env)
+        path_year = path_key_partitioned / f"year={year}"
+        if path_year.exists():
+            write_partitioned(
+                year=f"{year}-01-01",
+                by_property_type=any(path_year.glob("*/property_type=*")),
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+
+    path_file_applied.touch()
+
+
+def path_partitioned(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    return fryer.path.for_key(
+        key=KEY_PARTITIONED,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+
+
+def write_partitioned(
+    *,
+    year: TypeDatetimeLike,
+    by_property_type: bool = True,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the year, from its file written by `write`, in hive style directories
+    `year=YYYY/month=MM/property_type=...` so `read` can prune partitions from their
+    paths without opening them. The partition columns are kept in the files too.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    year = fryer.datetime.validate_date(date=year)
+    df = pl.read_parquet(path(year=year, path_data=path_data, path_env=path_env))
+
+    path_key_partitioned = path_partitioned(
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    path_year = path_key_partitioned / f"year={year.year}"
+    logger.info(f"Writing {KEY} partitioned to {path_year=}, {by_property_type=}")
+    # Write to a temporary directory first so readers never see a partial year, the
+    # leading dot keeps it out of the `year=*` glob in read
+    path_year_tmp = path_year.with_name(f".{path_year.name}.tmp")
+    shutil.rmtree(path_year_tmp, ignore_errors=True)
+    partition_by = [pl.col("date").dt.month().alias("month")]
+    if by_property_type:
+        partition_by.append(pl.col("property_type"))
+    for keys, df_partition in df.group_by(partition_by):
+        path_partition = path_year_tmp / f"month={keys[0]:02d}"
+        if by_property_type:
+            path_partition /= f"property_type={keys[1]}"
+        path_partition.mkdir(parents=True)
+        fryer.parquet.write(
+            df_partition,
+            path_partition / "0.parquet",
+            profile=WRITE_PROFILE,
+        )
+
+    path_year_old = path_year.with_name(f".{path_year.name}.old")
+    # Left behind by a write which was interrupted before removing it
+    shutil.rmtree(path_year_old, ignore_errors=True)
+    if path_year.exists():
+        path_year.replace(path_year_old)
+    path_year_tmp.replace(path_year)
+    shutil.rmtree(path_year_old, ignore_errors=True)
+
+
+def write_partitioned_all(
+    *,
+    by_property_type: bool = True,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    path_file = path(path_data=path_data, path_env=path_env)
+    for path_file_year in tqdm(sorted(path_file.parent.glob(path_file.name))):
+        write_partitioned(
+            year=path_file_year.stem,
+            by_property_type=by_property_type,
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+
+
+def get_partition(path_file: Path) -> dict[str, str]:
+    """Get the hive style `key=value` partitions from the directories of `path_file`,
+    relative to the directory of the key, or the year from the name of a file written
+    by `write`.
+    """
+    partition = dict(
+        part.split("=", 1) for part in path_file.parent.parts if "=" in part
+    )
+    if not partition:
+        partition["year"] = str(fryer.datetime.validate_date(date=path_file.stem).year)
+    return partition
+
+
+def is_partition_selected(
+    partition: dict[str, str],
+    *,
+    date_from: pd.Timestamp | None,
+    date_to: pd.Timestamp | None,
+    property_types: Collection[str] | None,
+) -> bool:
+    """Whether the partition, which may only be part of the way down the directories,
+    can have sales matching the query. Compares (year, month) so no dates are made.
+    """
+    year = int(partition["year"])
+    if "month" in partition:
+        start = end = (year, int(partition["month"]))
+    else:
+        start, end = (year, 1), (year, 12)
+    return (
+        (date_from is None or end >= (date_from.year, date_from.month))
+        and (date_to is None or start <= (date_to.year, date_to.month))
+        and (
+            property_types is None
+            or "property_type" not in partition
+            or partition["property_type"] in property_types
+        )
+    )
+
+
+def select_paths_partitioned(
+    path_dir: Path,
+    *,
+    partition: dict[str, str] | None = None,
+    date_from: pd.Timestamp | None,
+    date_to: pd.Timestamp | None,
+    property_types: Collection[str] | None,
+) -> Iterator[Path]:
+    """Walk the hive style directories under `path_dir`, only listing the directories
+    of partitions which can match the query.
+    """
+    partition = partition or {}
+    for path_child in sorted(path_dir.iterdir()):
+        if path_child.is_file():
+            if path_child.suffix == ".parquet":
+                yield path_child
+            continue
+        key, sep, value = path_child.name.partition("=")
+        # Directories without a partition, like temporary ones, are not read
+        if not sep or key.startswith("."):
+            continue
+        partition_child = {**partition, key: value}
+        if is_partition_selected(
+            partition_child,
+            date_from=date_from,
+            date_to=date_to,
+            property_types=property_types,
+        ):
+            yield from select_paths_partitioned(
+                path_child,
+                partition=partition_child,
+                date_from=date_from,
+                date_to=date_to,
+                property_types=property_types,
+            )
+
+
+def path_vocabulary(
+    *,
+    column: str,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    path_key = fryer.path.for_key(
+        key=KEY_VOCABULARY,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+    return path_key / f"{column}.parquet"
+
+
+def read_vocabulary(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> dict[str, pl.Series]:
+    """Read the values of each of the address columns, in the order they were added."""
+    vocabulary = {}
+    for column in COLUMNS_VOCABULARY:
+        path_file = path_vocabulary(
+            column=column,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        vocabulary[column] = (
+            pl.read_parquet(path_file).get_column(column)
+            if path_file.exists()
+            else pl.Series(column, [], dtype=pl.String)
+        )
+    return vocabulary
+
+
+def read_vocabulary_years(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> list[int]:
+    """Read the years whose values have all been added to the vocabulary."""
+    path_file = path_vocabulary(column="year", path_data=path_data, path_env=path_env)
+    if not path_file.exists():
+        return []
+    return pl.read_parquet(path_file).get_column("year").to_list()
+
+
+def get_paths_vocabulary_missing(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> dict[int, Path]:
+    """Get the yearly files, by year, whose values the vocabulary does not cover."""
+    path_file = path(path_data=path_data, path_env=path_env)
+    years_covered = set(
+        read_vocabulary_years(path_data=path_data, path_env=path_env),
+    )
+    paths_file_years = {
+        int(get_partition(path_file_year.relative_to(path_file.parent))["year"]): (
+            path_file_year
+        )
+        for path_file_year in sorted(path_file.parent.glob(path_file.name))
+    }
+    return {
+        year: path_file_year
+        for year, path_file_year in paths_file_years.items()
+        if year not in years_covered
+    }
+
+
+def update_vocabulary(
+    df: pl.DataFrame | pl.LazyFrame,
+    *,
+    years: Collection[int] = (),
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Add the values of the address columns in `df` which are not in the vocabulary to
+    the end of it. Values are never removed or reordered, so the physical codes of
+    an Enum built from the vocabulary before stay the same.
+
+    `years` are the years `df` has every row of, which are recorded as covered by
+    the vocabulary.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    path_key = fryer.path.for_key(
+        key=KEY_VOCABULARY,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    # Years can be written concurrently, by threads or processes
+    with FileLock(path_key / "vocabulary.lock"):
+        vocabulary = read_vocabulary(path_data=path_data, path_env=path_env)
+        values_new = (
+            df.lazy()
+            .select(
+                pl.col(column).drop_nulls().unique().sort().implode()
+                for column in COLUMNS_VOCABULARY
+            )
+            .collect()
+        )
+        for column, values in vocabulary.items():
+            values_added = values_new.get_column(column).explode().drop_nulls()
+            values_added = values_added.filter(~values_added.is_in(values))
+            if values_added.is_empty():
+                continue
+            logger.info(f"Adding {len(values_added)} values to {column=} vocabulary")
+            path_file = path_vocabulary(
+                column=column,
+                path_data=path_data,
+                path_env=path_env,
+            )
+            # Not sorted, the order of the values is the order of the Enum
+            fryer.parquet.write(pl.concat([values, values_added]).to_frame(), path_file)
+        years_covered = read_vocabulary_years(path_data=path_data, path_env=path_env)
+        if not set(years) <= set(years_covered):
+            fryer.parquet.write(
+                pl.DataFrame(
+                    {"year": sorted({*years_covered, *years})},
+                    schema={"year": pl.Int32},
+                ),
+                path_vocabulary(column="year", path_data=path_data, path_env=path_env),
+            )
+
+
+def write_vocabulary(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Add the values of the years written so far which the vocabulary does not cover
+    yet, such as years written before there was a vocabulary.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    paths_file_missing = get_paths_vocabulary_missing(
+        path_data=path_data,
+        path_env=path_env,
+    )
+    if not paths_file_missing:
+        return
+    logger.info(f"Adding {list(paths_file_missing)} to the vocabulary for {KEY}")
+    update_vocabulary(
+        pl.scan_parquet(list(paths_file_missing.values())).select(COLUMNS_VOCABULARY),
+        years=list(paths_file_missing),
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+
+
+def get_expr_address() -> pl.Expr:
+    """Normalise the address of each sale, so sales of the same property have the same
+    address regardless of case, spacing or missing parts.
+    """
+    return pl.concat_str(
+        [
+            pl.col(column)
+            .str.to_uppercase()
+            .str.replace_all(r"\s+", " ")
+            .str.strip_chars()
+            .fill_null("")
+            for column in (
+                "postcode",
+                "primary_addressable_object_name",
+                "secondary_addressable_object_name",
+                "street",
+            )
+        ],
+        separator="|",
+    ).alias("address")
+
+
+def path_properties(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    return fryer.path.for_key(
+        key=KEY_PROPERTIES,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+
+
+def get_sale_pairs(lf_sales: pl.LazyFrame) -> pl.LazyFrame:
+    """Pair each sale with the previous sale of the same property."""
+    return (
+        lf_sales.sort("property_id", "date", "id_transaction")
+        .select(
+            "property_id",
+            pl.col("date").shift(1).over("property_id").alias("prev_date"),
+            pl.col("price").shift(1).over("property_id").alias("prev_price"),
+            "date",
+            "price",
+        )
+        .drop_nulls("prev_date")
+    )
+
+
+def write_property_index(
+    *,
+    year: TypeDatetimeLike,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Update the property index with the sales of the year from its `write` file.
+
+    The index is made up of:
+        - `properties.parquet`, a stable `property_id` for each normalised address,
+          new addresses are given the next ids and ids are never reused
+        - `sales/{year}.parquet`, the `property_id`, date and price of each sale
+        - `sale_pairs.parquet`, each sale with the previous sale of the property,
+          sorted by property and date, only the pairs of properties sold in the year
+          are derived again
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    year = fryer.datetime.validate_date(date=year)
+    path_key = path_properties(path_data=path_data, path_env=path_env, mkdir=True)
+    path_file_properties = path_key / "properties.parquet"
+    path_file_sale_pairs = path_key / "sale_pairs.parquet"
+    path_key_sales = path_key / "sales"
+    path_key_sales.mkdir(exist_ok=True)
+    path_file_sales = path_key_sales / f"{year:{FORMAT_ISO_DATE}}.parquet"
+
+    df_year = (
+        pl.scan_parquet(path(year=year, path_data=path_data, path_env=path_env))
+        .select("id_transaction", "date", "price", get_expr_address())
+        .collect()
+    )
+
+    # Years can be written concurrently, by threads or processes
+    with FileLock(path_key / "properties.lock"):
+        df_properties = (
+            pl.read_parquet(path_file_properties)
+            if path_file_properties.exists()
+            else pl.DataFrame(schema={"property_id": pl.UInt32, "address": pl.String})
+        )
+        addresses = df_year.get_column("address").unique()
+        addresses_new = addresses.filter(
+            ~addresses.is_in(df_properties.get_column("address")),
+        ).sort()
+        if not addresses_new.is_empty():
+            logger.info(f"Adding {len(addresses_new)} properties for {year=}")
+            id_start = len(df_properties)
+            df_properties = pl.concat(
+                [
+                    df_properties,
+                    addresses_new.to_frame().select(
+                        pl.int_range(
+                            id_start,
+                            id_start + len(addresses_new),
+                            dtype=pl.UInt32,
+                        ).alias("property_id"),
+                        "address",
+                    ),
+                ],
+            )
+            fryer.parquet.write(df_properties, path_file_properties)
+
+        df_sales = (
+            df_year.join(df_properties, on="address", how="left")
+            .select("property_id", "date", "price", "id_transaction")
+            .sort("property_id", "date", "id_transaction")
+        )
+        # Properties sold in the year before it was written again, which may have had
+        # sales removed, and after
+        property_ids = df_sales.get_column("property_id").unique()
+        if path_file_sales.exists():
+            property_ids = pl.concat(
+                [
+                    property_ids,
+                    pl.read_parquet(path_file_sales, columns=["property_id"])
+                    .get_column("property_id")
+                    .unique(),
+                ],
+            ).unique()
+        fryer.parquet.write(df_sales, path_file_sales)
+
+        df_sale_pairs_updated = get_sale_pairs(
+            pl.scan_parquet(path_key_sales / "*.parquet").filter(
+                pl.col("property_id").is_in(property_ids),
+            ),
+        ).collect()
+        df_sale_pairs = df_sale_pairs_updated
+        if path_file_sale_pairs.exists():
+            df_sale_pairs = pl.concat(
+                [
+                    pl.scan_parquet(path_file_sale_pairs)
+                    .filter(~pl.col("property_id").is_in(property_ids))
+                    .collect(),
+                    df_sale_pairs_updated,
+                ],
+            ).sort("property_id", "date")
+        logger.info(
+            f"Writing {len(df_sale_pairs_updated)} updated of {len(df_sale_pairs)} "
+            f"sale pairs for {year=}",
+        )
+        fryer.parquet.write(df_sale_pairs, path_file_sale_pairs)
+
+
+def write_property_index_all(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    path_file = path(path_data=path_data, path_env=path_env)
+    for path_file_year in tqdm(sorted(path_file.parent.glob(path_file.name))):
+        write_property_index(
+            year=path_file_year.stem,
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+
+
+def read_properties(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    path_key = path_properties(path_data=path_data, path_env=path_env)
+    return pl.scan_parquet(path_key / "properties.parquet")
+
+
+def read_sales(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    path_key = path_properties(path_data=path_data, path_env=path_env)
+    return pl.scan_parquet(path_key / "sales" / "*.parquet")
+
+
+def read_sale_pairs(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    """Read each sale with the previous sale of the same property, sorted by property
+    and date, for repeat sales indices.
+    """
+    path_key = path_properties(path_data=path_data, path_env=path_env)
+    return pl.scan_parquet(path_key / "sale_pairs.parquet")
+
+
+def get_expr_postcode_level(level: str) -> pl.Expr:
+    outward = pl.col("postcode").str.split(" ").list.first()
+    if level == "area":
+        expr = outward.str.extract(r"^([A-Z]+)")
+    elif level == "district":
+        expr = outward
+    elif level == "sector":
+        inward = pl.col("postcode").str.split(" ").list.get(1, null_on_oob=True)
+        expr = pl.concat_str([outward, inward.str.slice(0, 1)], separator=" ")
+    else:
+        msg = f"{level=} should be one of {LEVELS_AGGREGATE}"
+        raise ValueError(msg)
+    return expr.alias(level)
+
+
+def path_aggregates(
+    *,
+    level: str,
+    year: TypeDatetimeLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    path_key = fryer.path.for_key(
+        key=KEY_AGGREGATES,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    path_level = path_key / level
+    if mkdir:
+        path_level.mkdir(parents=True, exist_ok=True)
+    if year is None:
+        year = "*"
+    else:
+        year = f"{fryer.datetime.validate_date(date=year):{FORMAT_ISO_DATE}}"
+    return path_level / f"{year}.parquet"
+
+
+def write_aggregates(
+    *,
+    year: TypeDatetimeLike,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the count, mean and median price of the year's sales by postcode area,
+    district and sector, month and property type, from its file written by `write`.
+
+    Medians do not roll up, so each level is aggregated from the sales rather than
+    from the level below.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    year = fryer.datetime.validate_date(date=year)
+    lf = pl.scan_parquet(
+        path(year=year, path_data=path_data, path_env=path_env),
+    ).select(
+        "postcode",
+        pl.col("date").dt.truncate("1mo").alias("month"),
+        "property_type",
+        "price",
+    )
+    for level in LEVELS_AGGREGATE:
+        df = (
+            lf.with_columns(get_expr_postcode_level(level))
+            .drop_nulls(level)
+            .group_by(level, "month", "property_type")
+            .agg(
+                pl.len().alias("count"),
+                pl.col("price").mean().alias("mean_price"),
+                pl.col("price").median().alias("median_price"),
+            )
+            .sort(level, "month", "property_type")
+            .collect()
+        )
+        path_file = path_aggregates(
+            level=level,
             year=year,
+            path_data=path_data,
+            path_env=path_env,
+            mkdir=True,
+        )
+        logger.info(f"Writing {len(df)} {level} aggregates to {path_file=}")
+        fryer.parquet.write(df, path_file)
+
+
+def write_aggregates_all(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    path_file = path(path_data=path_data, path_env=path_env)
+    for path_file_year in tqdm(sorted(path_file.parent.glob(path_file.name))):
+        write_aggregates(
+            year=path_file_year.stem,
             path_log=path_log,
             path_data=path_data,
             path_env=path_env,
         )
 
 
-def read(
+def scan_years(
+    path_file: Path,
+    *,
+    schema: Mapping[str, pl.DataType],
+    date_from: pd.Timestamp | None,
+    date_to: pd.Timestamp | None,
+) -> pl.LazyFrame:
+    """Scan the yearly files matching the glob `path_file` of the years between
+    `date_from` and `date_to`, or an empty frame with `schema` if there are none.
+    """
+    paths_file_selected = [
+        path_file_year
+        for path_file_year in sorted(path_file.parent.glob(path_file.name))
+        if is_partition_selected(
+            get_partition(path_file_year.relative_to(path_file.parent)),
+            date_from=date_from,
+            date_to=date_to,
+            property_types=None,
+        )
+    ]
+    return fryer.parquet.scan(paths_file_selected, schema=schema)
+
+
+def read_aggregates(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    level: str = "district",
+    date_from: TypeDatetimeLike | None = None,
+    date_to: TypeDatetimeLike | None = None,
+    property_types: Collection[str] | None = None,
+    geographies: Collection[str] | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    """Read the count, mean and median price by month and property type for postcode
+    `level`, one of area, district or sector, optionally only for `geographies` of
+    that level. Years outside of the dates are not scanned.
+    """
+    if level not in LEVELS_AGGREGATE:
+        msg = f"{level=} should be one of {LEVELS_AGGREGATE}"
+        raise ValueError(msg)
+    if date_from is not None:
+        date_from = fryer.datetime.validate_date(date=date_from)
+    if date_to is not None:
+        date_to = fryer.datetime.validate_date(date=date_to)
+    lf = scan_years(
+        path_aggregates(level=level, path_data=path_data, path_env=path_env),
+        schema={level: pl.String, **SCHEMA_AGGREGATES},
+        date_from=date_from,
+        date_to=date_to,
+    )
+    if date_from is not None:
+        lf = lf.filter(pl.col("month") >= date_from.date().replace(day=1))
+    if date_to is not None:
+        lf = lf.filter(pl.col("month") <= date_to.date())
+    if property_types is not None:
+        lf = lf.filter(pl.col("property_type").is_in(list(property_types)))
+    if geographies is not None:
+        lf = lf.filter(pl.col(level).is_in(list(geographies)))
+    return lf
+
+
+def path_sketches(
+    *,
+    year: TypeDatetimeLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    path_key = fryer.path.for_key(
+        key=KEY_SKETCHES,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+    if year is None:
+        year = "*"
+    else:
+        year = f"{fryer.datetime.validate_date(date=year):{FORMAT_ISO_DATE}}"
+    return path_key / f"{year}.parquet"
+
+
+def write_sketches(
+    *,
+    year: TypeDatetimeLike,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write a quantile sketch of the price of the year's sales by postcode area, month
+    and property type, from its file written by `write`.
+
+    Unlike the medians of `write_aggregates` the sketches can be merged, so
+    `read_price_quantiles` answers any window of months, areas and property types
+    without reading the sales.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    year = fryer.datetime.validate_date(date=year)
+    lf = (
+        pl.scan_parquet(path(year=year, path_data=path_data, path_env=path_env))
+        .select(
+            get_expr_postcode_level("area"),
+            pl.col("date").dt.truncate("1mo").alias("month"),
+            "property_type",
+            "price",
+        )
+        .drop_nulls("area")
+    )
+    df = fryer.sketch.sketch_by(
+        lf,
+        value="price",
+        by=["area", "month", "property_type"],
+    )
+    path_file = path_sketches(
+        year=year,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    logger.info(f"Writing {len(df)} sketches to {path_file=}")
+    fryer.parquet.write(df, path_file)
+
+
+def write_sketches_all(
     *,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
+) -> None:
+    path_file = path(path_data=path_data, path_env=path_env)
+    for path_file_year in tqdm(sorted(path_file.parent.glob(path_file.name))):
+        write_sketches(
+            year=path_file_year.stem,
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+
+
+def read_price_quantiles(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    quantiles: Collection[float] = (0.5,),
+    by: Collection[str] = ("area",),
+    date_from: TypeDatetimeLike | None = None,
+    date_to: TypeDatetimeLike | None = None,
+    property_types: Collection[str] | None = None,
+    areas: Collection[str] | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    """Read the count and approximate `quantiles` of price, within
+    `fryer.sketch.RELATIVE_ACCURACY` of the true value, by any of area, month and
+    property type, from the sketches written by `write_sketches` of the months between
+    `date_from` and `date_to`.
+    """
+    columns_by = ("area", "month", "property_type")
+    if not set(by) <= set(columns_by):
+        msg = f"{by=} should only be of {columns_by}"
+        raise ValueError(msg)
+    if date_from is not None:
+        date_from = fryer.datetime.validate_date(date=date_from)
+    if date_to is not None:
+        date_to = fryer.datetime.validate_date(date=date_to)
+    lf = scan_years(
+        path_sketches(path_data=path_data, path_env=path_env),
+        schema=SCHEMA_SKETCHES,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    if date_from is not None:
+        lf = lf.filter(pl.col("month") >= date_from.date().replace(day=1))
+    if date_to is not None:
+        lf = lf.filter(pl.col("month") <= date_to.date())
+    if property_types is not None:
+        lf = lf.filter(pl.col("property_type").is_in(list(property_types)))
+    if areas is not None:
+        lf = lf.filter(pl.col("area").is_in(list(areas)))
+
+    df = fryer.sketch.merge_by(lf, by=list(by))
+    sketches = df.get_column("sketch").to_list()
+    return df.drop("sketch").with_columns(
+        pl.Series(
+            f"quantile_{q}",
+            [fryer.sketch.quantile(sketch, q) for sketch in sketches],
+            dtype=pl.Float64,
+        )
+        for q in quantiles
+    )
+
+
+def get_exprs_compact(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> list[pl.Expr]:
+    """Cast the address columns to Enums of the vocabulary of every year, not only
+    those read, so the Enums are the same for any read.
+
+    Reading never writes, the vocabulary is kept up to date by the writers, so this
+    raises if any year written is not covered by it.
+    """
+    years_missing = list(
+        get_paths_vocabulary_missing(path_data=path_data, path_env=path_env),
+    )
+    if years_missing:
+        msg = (
+            f"The vocabulary for {KEY} does not cover {years_missing=}, "
+            "add them with write_vocabulary"
+        )
+        raise ValueError(msg)
+    vocabulary = read_vocabulary(path_data=path_data, path_env=path_env)
+    return [
+        pl.col(column).cast(pl.Enum(values)) for column, values in vocabulary.items()
+    ]
+
+
+def read(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    date_from: TypeDatetimeLike | None = None,
+    date_to: TypeDatetimeLike | None = None,
+    property_types: Collection[str] | None = None,
+    partitioned: bool = False,
+    compact: bool = False,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
 ) -> pl.LazyFrame:
+    """Read the sales between `date_from` and `date_to` inclusive, of `property_types`,
+    from the yearly files or, if `partitioned` is True, from the layout written by
+    `write_partitioned`. Files whose partition cannot match are not scanned at all.
+
+    If `compact` is True the address columns are Enums of the vocabulary, which is
+    the same for every year, so they take a fraction of the memory of strings. It
+    raises if any year written is not covered by the vocabulary.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    if date_from is not None:
+        date_from = fryer.datetime.validate_date(date=date_from)
+    if date_to is not None:
+        date_to = fryer.datetime.validate_date(date=date_to)
+
+    if partitioned:
+        path_key = path_partitioned(path_data=path_data, path_env=path_env)
+        paths_file_selected = (
+            list(
+                select_paths_partitioned(
+                    path_key,
+                    date_from=date_from,
+                    date_to=date_to,
+                    property_types=property_types,
+                ),
+            )
+            if path_key.exists()
+            else []
+        )
+    else:
+        path_file = path(path_data=path_data, path_env=path_env)
+        paths_file_selected = [
+            path_file_year
+            for path_file_year in sorted(path_file.parent.glob(path_file.name))
+            if is_partition_selected(
+                get_partition(path_file_year.relative_to(path_file.parent)),
+                date_from=date_from,
+                date_to=date_to,
+                property_types=property_types,
+            )
+        ]
+    logger.info(
+        f"Reading {KEY} from {len(paths_file_selected)} files, "
+        f"{date_from=}, {date_to=}, {property_types=}",
+    )
+    exprs_compact = (
+        get_exprs_compact(path_data=path_data, path_env=path_env) if compact else []
+    )
+    if not paths_file_selected:
+        # There may be no files at all, so the schema is the one parse declares
+        lf = pl.LazyFrame(schema=get_schema()).with_columns(exprs_compact)
+    elif compact:
+        # Casting each file as it is read means the strings of every file are never
+        # in memory at once
+        lf = pl.concat(
+            pl.scan_parquet(source=path_file_selected).with_columns(exprs_compact)
+            for path_file_selected in paths_file_selected
+        )
+    else:
+        lf = pl.scan_parquet(source=paths_file_selected)
+
+    if date_from is not None:
+        lf = lf.filter(pl.col("date") >= date_from.date())
+    if date_to is not None:
+        lf = lf.filter(pl.col("date") <= date_to.date())
+    if property_types is not None:
+        lf = lf.filter(pl.col("property_type").is_in(list(property_types)))
+    return lf
+
+
+def lookup_postcodes(
+    postcodes: Collection[str],
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    """Read the sales of `postcodes` from the yearly files, only reading the row groups
+    whose bloom filters might have them.
+    """
     logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
     path_file = path(path_data=path_data, path_env=path_env)
-    logger.info(f"Reading {KEY} from {path_file}")
-    return pl.scan_parquet(source=path_file)
+    paths_file = sorted(path_file.parent.glob(path_file.name))
+    logger.info(f"Looking up {len(postcodes)} postcodes in {len(paths_file)} files")
+    return fryer.parquet.lookup(
+        paths_file,
+        column="postcode",
+        values=postcodes,
+        schema=get_schema(),
+    )
 
 
 def main() -> None:
-    write_all()
+    write_all(incremental=True)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
+import hashlib
 import json
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from enum import Enum
 from itertools import batched
@@ -9,13 +12,13 @@ import geopandas as gpd
 import pandas as pd
 import polars as pl
 import pyogrio
-import requests
 from filelock import FileLock
 from tqdm import tqdm
 
 import fryer.logger
 import fryer.path
-from fryer.constants import TIMEOUT_LONG, TIMEOUT_SHORT
+import fryer.requests
+from fryer.constants import TIMEOUT_SHORT
 from fryer.typing import TypePathLike
 
 __all__ = [
@@ -34,10 +37,11 @@ KEY = Path(__file__).stem
 API_KEY_ONS = "ESMARspQHYMw9BZ9"
 URL_SERVICES = f"https://services1.arcgis.com/{API_KEY_ONS}/arcgis/rest/services"
 MAX_QUERY_RECORDS = 2_000
+MAX_WORKERS = 4
 
 
 def get_all_services_available_online() -> pl.DataFrame:
-    response = requests.get(url=f"{URL_SERVICES}?f=pjson", timeout=TIMEOUT_LONG)
+    response = fryer.requests.get(f"{URL_SERVICES}?f=pjson")
     return pl.DataFrame(
         data=response.json()["services"],
         schema={"name": pl.String, "type": pl.String, "url": pl.String},
@@ -337,7 +341,7 @@ class TypeGeoJson(TypedDict):
 
 
 def download_features(*, url: str) -> TypeGeoJson:
-    response = requests.get(url=url, timeout=TIMEOUT_LONG)
+    response = fryer.requests.get(url)
     data = response.json()
     if (
         "properties" in data
@@ -352,13 +356,87 @@ def download_features(*, url: str) -> TypeGeoJson:
     return data
 
 
+def path_hash_chunk(path_chunk: Path) -> Path:
+    return path_chunk.with_name(f"{path_chunk.name}.sha256")
+
+
+def read_hash_chunk(*, path_chunk: Path) -> str | None:
+    """Get the hash of the chunk if it was completely written, otherwise None."""
+    path_hash = path_hash_chunk(path_chunk)
+    if not path_chunk.exists() or not path_hash.exists():
+        return None
+    hash_chunk = path_hash.read_text()
+    if hashlib.sha256(path_chunk.read_bytes()).hexdigest() != hash_chunk:
+        return None
+    return hash_chunk
+
+
+def write_chunk(*, url: str, path_chunk: Path) -> str:
+    """Download the features at `url` and write them to `path_chunk`, alongside the
+    sha256 of its contents, returning the hash.
+    """
+    geo_json = download_features(url=url)
+    # Could zip this in the future
+    contents = json.dumps(geo_json, indent="  ").encode()
+    hash_chunk = hashlib.sha256(contents).hexdigest()
+
+    # Write to a temporary file first so an interrupted write is not seen as done
+    path_chunk_tmp = path_chunk.with_name(f"{path_chunk.name}.tmp")
+    path_chunk_tmp.write_bytes(contents)
+    path_chunk_tmp.replace(path_chunk)
+    path_hash_chunk(path_chunk).write_text(hash_chunk)
+    return hash_chunk
+
+
+def read_manifest(*, path_complete: Path) -> dict[str, str] | None:
+    """Get the sha256 of each chunk in the manifest if they all match the chunks
+    written, otherwise None.
+    """
+    try:
+        hashes = json.loads(path_complete.read_text())["chunks"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+    for name, hash_chunk in hashes.items():
+        path_chunk = path_complete.with_name(name)
+        if (
+            not path_chunk.exists()
+            or hashlib.sha256(path_chunk.read_bytes()).hexdigest() != hash_chunk
+        ):
+            return None
+    return hashes
+
+
+def delete_chunks_unlisted(
+    *,
+    path_all: Path,
+    names: Collection[str],
+    logger: fryer.logger.TypeLogger,
+) -> None:
+    """Delete the chunks, and their hashes, which are not in `names`, such as those
+    left by an earlier run with more chunks.
+    """
+    for path_chunk in sorted(path_all.parent.glob(path_all.name)):
+        if path_chunk.name in names:
+            continue
+        logger.info(f"Deleting {path_chunk!s} as it is not in the manifest")
+        path_chunk.unlink()
+        path_hash_chunk(path_chunk).unlink(missing_ok=True)
+
+
 def write_raw(
     *,
     boundaries_type: BoundariesType,
+    max_workers: int = MAX_WORKERS,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
 ) -> None:
+    """Download the boundaries in chunks, up to `max_workers` at once, skipping chunks
+    already written by an earlier run whose contents match their sha256.
+
+    Nothing is downloaded if every chunk matches the sha256 in the manifest of an
+    earlier complete run. Chunks not in the manifest are deleted.
+    """
     key = boundaries_type.key
     path_all = path_raw(
         boundaries_type=boundaries_type,
@@ -367,6 +445,7 @@ def write_raw(
     )
     logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
 
+    path_all.parent.mkdir(parents=True, exist_ok=True)
     path_complete = path_all.parent / "complete"
     lock = FileLock(path_complete.with_suffix(".lock"))
     # TODO(squid): check this works and make it a test - idea is to make sure only one
@@ -376,15 +455,27 @@ def write_raw(
     # getting much out
     with lock:
         if path_complete.exists():
-            logger.info(
-                f"{path_all!s} exists so we do not download or write anything, checked via {path_complete!s}",
+            hashes = read_manifest(path_complete=path_complete)
+            if hashes is not None:
+                logger.info(
+                    f"{path_all!s} exists so we do not download or write anything, checked via {path_complete!s}",
+                )
+                delete_chunks_unlisted(path_all=path_all, names=hashes, logger=logger)
+                return
+            logger.warning(
+                f"Chunks of {path_all!s} do not match {path_complete!s}, so we download them again",
             )
-            return
+            path_complete.unlink()
 
         url_server = f"{URL_SERVICES}/{boundaries_type.data.url_key}/FeatureServer/0"
         logger.info(f"{boundaries_type=}, {url_server=!s}")
 
-        meta = requests.get(f"{url_server}?f=json", timeout=TIMEOUT_SHORT).json()
+        meta = fryer.requests.get(
+            f"{url_server}?f=json",
+            logger=logger,
+            key=key,
+            timeout=TIMEOUT_SHORT,
+        ).json()
         object_id_field = meta["objectIdField"]
         logger.info(f"{object_id_field=}")
 
@@ -393,37 +484,62 @@ def write_raw(
 
         url_count = f"{url_query}?f=json&returnCountOnly=true&where=1%3D1%20AND%201%3D1"
         logger.info(f"Getting count via {url_count=!s}")
-        count = requests.get(url_count, timeout=TIMEOUT_SHORT).json()["count"]
+        count = fryer.requests.get(
+            url_count,
+            logger=logger,
+            key=key,
+            timeout=TIMEOUT_SHORT,
+        ).json()["count"]
         logger.info(f"{count=}")
 
         batches = list(
             batched(range(1, count + 1), boundaries_type.data.max_query_records),
         )
         num_digits_chunk = len(str(len(batches)))
+        urls_chunk = {}
         for chunk, batch in enumerate(batches):
             path_chunk = path_all.with_stem(
                 path_all.stem.replace("*", str(chunk).zfill(num_digits_chunk)),
             )
-            if path_chunk.exists():
-                logger.info(f"{path_chunk!s} exists so we do not download or write")
-
             batch_start = batch[0]
             batch_end = batch[-1]
             # Use batch start and end to query within max query record count
-            url_chunk = f"{url_query}?outFields=*&where=1%3D1+AND+{object_id_field}+BETWEEN+{batch_start}+AND+{batch_end}&f=geojson"
-            logger.info(f"{url_chunk=!s}, {batch_start=}, {batch_end=}")
-            geo_json = download_features(url=url_chunk)
-
-            logger.info(f"Writing geojson to {path_chunk!s}")
-            # Could zip this in the future
-            path_chunk.write_text(json.dumps(geo_json, indent="  "))
+            urls_chunk[path_chunk] = (
+                f"{url_query}?outFields=*&where=1%3D1+AND+{object_id_field}+BETWEEN+{batch_start}+AND+{batch_end}&f=geojson"
+            )
 
-        path_complete.touch()
+        hashes = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for path_chunk, url_chunk in urls_chunk.items():
+                hash_chunk = read_hash_chunk(path_chunk=path_chunk)
+                if hash_chunk is not None:
+                    logger.info(f"{path_chunk!s} is complete so we do not download")
+                    hashes[path_chunk.name] = hash_chunk
+                    continue
+                logger.info(f"{url_chunk=!s}, {path_chunk=!s}")
+                future = executor.submit(
+                    write_chunk,
+                    url=url_chunk,
+                    path_chunk=path_chunk,
+                )
+                futures[future] = path_chunk
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                path_chunk = futures[future]
+                hashes[path_chunk.name] = future.result()
+                logger.info(f"Wrote geojson to {path_chunk!s}")
+
+        # The manifest lets anything reading the chunks check they are all there
+        path_complete.write_text(
+            json.dumps({"count": count, "chunks": dict(sorted(hashes.items()))}),
+        )
         logger.info(f"Writing complete {path_all!s}")
+        delete_chunks_unlisted(path_all=path_all, names=hashes, logger=logger)
 
 
 def write_raw_all(
     *,
+    max_workers: int = MAX_WORKERS,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
@@ -431,6 +547,7 @@ def write_raw_all(
     for boundaries_type in tqdm(list(BoundariesType)):
         write_raw(
             boundaries_type=boundaries_type,
+            max_workers=max_workers,
             path_log=path_log,
             path_data=path_data,
             path_env=path_env,
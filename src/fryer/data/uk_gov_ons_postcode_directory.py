@@ -1,26 +1,38 @@
-from collections.abc import Sequence
-from io import BytesIO
+from collections.abc import Collection, Sequence
 from pathlib import Path
 from zipfile import ZipFile
 
+import pandas as pd
 import polars as pl
-import requests
 
+import fryer.archive
 import fryer.datetime
 import fryer.logger
+import fryer.parquet
 import fryer.path
-from fryer.constants import FORMAT_ISO_DATE, TIMEOUT_LONG
+import fryer.requests
+from fryer.constants import FORMAT_ISO_DATE
 from fryer.typing import TypePathLike
 
 __all__ = [
     "KEY",
+    "KEY_RAW",
+    "WRITE_PROFILE",
+    "download",
+    "lookup_postcodes",
     "path",
+    "path_raw",
     "read",
     "write",
 ]
 
 
 KEY = Path(__file__).stem
+KEY_RAW = KEY + "_raw"
+WRITE_PROFILE = fryer.parquet.WriteProfile(
+    sort_by=("postcode",),
+    bloom_filter=("postcode",),
+)
 DATE_DOWNLOAD = "2024-11-01"
 URL_DOWNLOAD = "https://www.arcgis.com/sharing/rest/content/items/b54177d3d7264cd6ad89e74dd9c1391d/data"
 
@@ -67,6 +79,39 @@ def path(
     )
 
 
+def path_raw(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> Path:
+    path_key = fryer.path.for_key(key=KEY_RAW, path_data=path_data, path_env=path_env)
+    date_download = fryer.datetime.validate_date(DATE_DOWNLOAD)
+    return path_key / f"{date_download:{FORMAT_ISO_DATE}}.zip"
+
+
+def download(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> Path:
+    """Stream the zip of the postcode directory to disk, unless it already exists."""
+    key = KEY_RAW
+    logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
+
+    fryer.path.for_key(key=key, path_data=path_data, path_env=path_env, mkdir=True)
+    path_file = path_raw(path_data=path_data, path_env=path_env)
+
+    if path_file.exists():
+        logger.info(f"{path_file=} exists and will not download anything for {key=}")
+        return path_file
+
+    # Need to figure out how to get this via https://geoportal.statistics.gov.uk/search?q=PRD_ONSPD&sort=Date%20Created%7Ccreated%7Cdesc
+    logger.info(f"{URL_DOWNLOAD=}, {key=}")
+    fryer.requests.download_file(URL_DOWNLOAD, path_file, logger=logger, key=key)
+    return path_file
+
+
 def get_map_from_zip_file(  # noqa: PLR0913 - Needs all the arguments
     *,
     zip_file: ZipFile,
@@ -88,7 +133,12 @@ def get_map_from_zip_file(  # noqa: PLR0913 - Needs all the arguments
         raise ValueError(msg)
     map_original = {
         **dict(
-            pl.read_csv(zip_file.read(file_names[0]), columns=index_columns)
+            fryer.archive.read_csv_members(
+                zip_file,
+                file_names,
+                columns=index_columns,
+                infer_schema=True,
+            )
             .drop_nulls()
             .iter_rows(),
         ),
@@ -140,13 +190,10 @@ def write(
         )
         return
 
-    datetime_download = fryer.datetime.now()
-    # Need to figure out how to get this via https://geoportal.statistics.gov.uk/search?q=PRD_ONSPD&sort=Date%20Created%7Ccreated%7Cdesc
-    logger.info(f"{URL_DOWNLOAD=}, {datetime_download=}, {key=}")
-
-    # Split off this download into a separate function
-    response = requests.get(URL_DOWNLOAD, timeout=TIMEOUT_LONG)
-    zip_file = ZipFile(BytesIO(response.content))
+    path_file_raw = download(path_log=path_log, path_data=path_data, path_env=path_env)
+    datetime_download = pd.Timestamp.fromtimestamp(path_file_raw.stat().st_mtime)
+    logger.info(f"{path_file_raw=}, {datetime_download=}, {key=}")
+    zip_file = ZipFile(path_file_raw)
 
     date_download = fryer.datetime.validate_date(DATE_DOWNLOAD)
 
@@ -1163,7 +1210,7 @@ def write(
     ]
 
     df = df_raw.select(exprs)
-    df.write_parquet(path_file)
+    fryer.parquet.write(df, path_file, profile=WRITE_PROFILE)
 
 
 def read(
@@ -1179,6 +1226,23 @@ def read(
     return pl.scan_parquet(source=path_file)
 
 
+def lookup_postcodes(
+    postcodes: Collection[str],
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    """Read the rows of `postcodes`, only reading the row groups which might have
+    them.
+    """
+    key = KEY
+    logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
+    path_file = path(path_data=path_data, path_env=path_env)
+    logger.info(f"Looking up {len(postcodes)} postcodes in {path_file}")
+    return fryer.parquet.lookup([path_file], column="postcode", values=postcodes)
+
+
 def main() -> None:
     write()
 
@@ -1,38 +1,102 @@
-from hashlib import md5
+import json
+import multiprocessing
+from collections import deque
+from collections.abc import Collection
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import lru_cache
 from logging import Logger
 from pathlib import Path
 from zipfile import ZipFile
 
 import pandas as pd
 import polars as pl
-import requests
 from tqdm import tqdm
 
+import fryer.archive
 import fryer.datetime
+import fryer.grid
 import fryer.logger
+import fryer.parquet
 import fryer.path
-from fryer.constants import FORMAT_ISO_DATE, TIMEOUT_LONG
+import fryer.requests
+from fryer.constants import FORMAT_ISO_DATE
 from fryer.typing import TypeDatetimeLike, TypePathLike
 
 __all__ = [
     "KEY",
+    "KEY_CONTENT_INDEX",
+    "KEY_COUNTS",
+    "KEY_CRIME_KEYS",
+    "KEY_OUTCOMES",
     "KEY_RAW",
+    "KEY_STOP_AND_SEARCH",
     "RAW_DOWNLOAD_INFO",
+    "SCHEMA_COUNTS",
+    "WINDOWS_COUNTS",
+    "WRITE_PROFILE",
+    "read_content_index",
+    "read_counts",
+    "read_outcomes",
+    "read_stop_and_search",
     "read_street",
+    "update_counts",
+    "update_outcome_keys",
+    "write_content_index",
+    "write_counts",
+    "write_counts_all",
+    "write_outcome_keys",
     "write_raw_all",
     "write_street",
     "write_street_all",
+    "write_street_archive",
+    "write_street_archive_parallel",
 ]
 
 
 KEY = Path(__file__).stem
 KEY_RAW = KEY + "_raw"
+KEY_CONTENT_INDEX = KEY_RAW + "_content_index"
+KEY_COUNTS = KEY + "_counts"
+KEY_OUTCOMES = KEY + "_outcomes"
+KEY_STOP_AND_SEARCH = KEY + "_stop_and_search"
+KEY_CRIME_KEYS = KEY + "_crime_keys"
 
 RAW_DOWNLOAD_INFO = {
     ("2010-12", "2017-04"): "955e065e0f08d67872da9187263dc359",
     ("2017-05", "2020-04"): "eee35279b6828ba49fd2ad7ef3133262",
     ("2020-05", "2023-04"): "b6fc748c2f588cf06e3492a6e4f253ae",
 }
+TYPES_FILE = ["street", "outcomes", "stop-and-search"]
+SCHEMA_CONTENT_INDEX = {
+    "archive": pl.String,
+    "file_name": pl.String,
+    "month": pl.String,
+    "force": pl.String,
+    "type_file": pl.String,
+    "crc": pl.UInt32,
+    "size": pl.UInt64,
+    "date_archive": pl.Date,
+}
+# Peak memory of converting a month, as a multiple of the size of its CSVs
+MEMORY_PER_CSV_BYTE = 4
+# Rows are sorted by their grid cell within each month, so the row groups of a file
+# cover small areas and those outside of a bounding box or radius are skipped
+WRITE_PROFILE = fryer.parquet.WriteProfile(
+    sort_by=("month", "cell"),
+    row_group_size=16 * 1024,
+)
+COLUMNS_COUNTS = ("lower_layer_super_output_area_code", "month", "crime_type")
+WRITE_PROFILE_COUNTS = fryer.parquet.WriteProfile(sort_by=COLUMNS_COUNTS)
+# The months of the rolling counts written alongside the count of each month
+WINDOWS_COUNTS = (3, 12)
+# Outcomes are sorted by the integer key of their crime, so joins to the crimes are on
+# sorted integers, and the crime keys by id so they are looked up in a merge
+WRITE_PROFILE_OUTCOMES = fryer.parquet.WriteProfile(sort_by=("crime_key", "id_crime"))
+WRITE_PROFILE_STOP_AND_SEARCH = fryer.parquet.WriteProfile(sort_by=("datetime",))
+WRITE_PROFILE_CRIME_KEYS = fryer.parquet.WriteProfile(sort_by=("id_crime",))
+# Outcomes are matched to the crimes of this many months up to their month, the span
+# of an archive
+MONTHS_OUTCOME_LOOKBACK = 36
 
 
 def get_and_write_raw_if_not_exists(
@@ -50,18 +114,14 @@ def get_and_write_raw_if_not_exists(
         return
 
     logger.info(f"Getting data from {url=} for {key=}")
-    response = requests.get(url, timeout=TIMEOUT_LONG)
-
-    if expected_hash is not None:
-        actual_hash = md5(response.content, usedforsecurity=False).hexdigest()
-        if expected_hash != actual_hash:
-            msg = f"Hashes don't match for downloading from {url=}\n{expected_hash=}\n  {actual_hash}"
-            raise ValueError(
-                msg,
-            )
-
-    logger.info(f"Writing data to {path_file=} from {url=} for {key=}")
-    path_file.write_bytes(response.content)
+    fryer.requests.download_file(
+        url,
+        path_file,
+        logger=logger,
+        key=key,
+        hash_name="md5",
+        expected_hash=expected_hash,
+    )
 
 
 def get_path_file_raw(
@@ -127,18 +187,26 @@ def write_raw_all(
             logger=logger,
         )
 
-    get_and_write_raw_if_not_exists(
-        key=key,
-        path_file=get_path_file_raw(
-            path_key=path_key,
-            date_start=None,
-            date_end=None,
-            path_env=path_env,
-        ),
-        url="https://data.police.uk/data/archive/latest.zip",
-        # No hash known for latest file
-        expected_hash=None,
+    path_file_latest = get_path_file_raw(
+        path_key=path_key,
+        date_start=None,
+        date_end=None,
+        path_env=path_env,
+    )
+    # latest.zip is replaced in place upstream, so rather than downloading it again
+    # every day we check if it has changed since the last one we downloaded
+    paths_file_latest_previous = sorted(path_key.glob("latest_*.zip"))
+    path_file_latest_previous = (
+        paths_file_latest_previous[-1] if paths_file_latest_previous else None
+    )
+    logger.info(f"Getting latest data for {key=}, {path_file_latest_previous=}")
+    fryer.requests.download_file_if_modified(
+        "https://data.police.uk/data/archive/latest.zip",
+        path_file_latest,
+        path_file_previous=path_file_latest_previous,
         logger=logger,
+        key=key,
+        hash_name="md5",
     )
 
 
@@ -159,13 +227,17 @@ def get_months(
 
 def path(
     *,
+    key: str = KEY,
     month: TypeDatetimeLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
     mkdir: bool = False,
 ) -> Path:
+    """Get the file of `month` of `key`, the street crimes by default or one of the
+    other files derived from the archives, such as `KEY_OUTCOMES`.
+    """
     path_key = fryer.path.for_key(
-        key=KEY,
+        key=key,
         path_data=path_data,
         path_env=path_env,
         mkdir=mkdir,
@@ -263,6 +335,468 @@ CRIME_TYPE_MAPPING = {
     "Public disorder and weapons": "public_order",
 }
 
+# The schema of the counts written by `write_counts`, read when none are written
+SCHEMA_COUNTS = {
+    "lower_layer_super_output_area_code": pl.String,
+    "month": pl.Date,
+    "crime_type": pl.Enum(sorted(set(CRIME_TYPE_MAPPING.values()))),
+    "count": pl.UInt32,
+    **{f"count_{window}mo": pl.UInt32 for window in WINDOWS_COUNTS},
+}
+
+
+EXPRS_STREET = [
+    pl.col("Crime ID").cast(pl.String).alias("id_crime"),
+    pl.col("Month").str.to_date(format="%Y-%m").alias("month"),
+    pl.col("Month").str.to_date(format="%Y-%m").alias("date"),
+    (
+        pl.col("Reported by")
+        .replace_strict(
+            FORCE_MAPPING,
+            return_dtype=pl.Enum(FORCE_MAPPING.values()),
+        )
+        .alias("force_reported_by")
+    ),
+    (
+        pl.col("Falls within")
+        .replace_strict(
+            FORCE_MAPPING,
+            return_dtype=pl.Enum(FORCE_MAPPING.values()),
+        )
+        .alias("force_falls_within")
+    ),
+    pl.col("Longitude").cast(pl.Float32).alias("longitude"),
+    pl.col("Latitude").cast(pl.Float32).alias("latitude"),
+    pl.col("Location").cast(pl.String).alias("location"),
+    pl.col("LSOA code").cast(pl.String).alias("lower_layer_super_output_area_code"),
+    pl.col("LSOA name").cast(pl.String).alias("lower_layer_super_output_area_name"),
+    (
+        pl.col("Crime type")
+        .replace_strict(
+            CRIME_TYPE_MAPPING,
+            return_dtype=pl.Enum(sorted(set(CRIME_TYPE_MAPPING.values()))),
+        )
+        .alias("crime_type")
+    ),
+    pl.col("Last outcome category").cast(pl.String).alias("last_outcome_category"),
+    pl.col("Context").cast(pl.String).alias("context"),
+]
+COLUMNS_OUTCOMES_FROM_STREET = {
+    "id_crime",
+    "month",
+    "force_reported_by",
+    "force_falls_within",
+    "longitude",
+    "latitude",
+    "location",
+    "lower_layer_super_output_area_code",
+    "lower_layer_super_output_area_name",
+}
+EXPRS_OUTCOMES = [
+    *(
+        expr
+        for expr in EXPRS_STREET
+        if expr.meta.output_name() in COLUMNS_OUTCOMES_FROM_STREET
+    ),
+    pl.col("Outcome type").cast(pl.String).alias("outcome_type"),
+]
+EXPRS_STOP_AND_SEARCH = [
+    pl.col("Type").cast(pl.String).alias("type"),
+    (
+        pl.col("Date")
+        .str.to_datetime(format="%Y-%m-%dT%H:%M:%S%z", time_zone="UTC")
+        .alias("datetime")
+    ),
+    pl.col("Date").str.slice(0, 7).str.to_date(format="%Y-%m").alias("month"),
+    (pl.col("Part of a policing operation") == "True").alias(
+        "part_of_policing_operation",
+    ),
+    pl.col("Policing operation").cast(pl.String).alias("policing_operation"),
+    pl.col("Longitude").cast(pl.Float32).alias("longitude"),
+    pl.col("Latitude").cast(pl.Float32).alias("latitude"),
+    pl.col("Gender").cast(pl.String).alias("gender"),
+    pl.col("Age range").cast(pl.String).alias("age_range"),
+    pl.col("Self-defined ethnicity").cast(pl.String).alias("self_defined_ethnicity"),
+    (
+        pl.col("Officer-defined ethnicity")
+        .cast(pl.String)
+        .alias("officer_defined_ethnicity")
+    ),
+    pl.col("Legislation").cast(pl.String).alias("legislation"),
+    pl.col("Object of search").cast(pl.String).alias("object_of_search"),
+    pl.col("Outcome").cast(pl.String).alias("outcome"),
+    (pl.col("Outcome linked to object of search") == "True").alias(
+        "outcome_linked_to_object_of_search",
+    ),
+    (pl.col("Removal of more than just outer clothing") == "True").alias(
+        "removal_of_more_than_outer_clothing",
+    ),
+]
+# The month in the high 32 bits and the dense rank of the id among the month's ids in
+# the low 32 bits, so the key of a crime only depends on the crimes of its month
+EXPR_CRIME_KEY = (
+    (
+        pl.col("month").dt.year().cast(pl.UInt64) * 12
+        + pl.col("month").dt.month().cast(pl.UInt64)
+        - 1
+    )
+    * 2**32
+    + pl.col("id_crime").rank("dense").cast(pl.UInt64)
+).alias("crime_key")
+EXPR_CELL = fryer.grid.get_expr_cell(pl.col("longitude"), pl.col("latitude")).alias(
+    "cell",
+)
+
+
+def get_path_file_raw_for_month(
+    *,
+    month: pd.Timestamp,
+    path_key_raw: Path,
+    path_env: TypePathLike | None = None,
+) -> Path:
+    """Get the archive with `month`, the latest archive if it is not in any of the
+    archives of `RAW_DOWNLOAD_INFO`.
+    """
+    for date_start_, date_end_ in RAW_DOWNLOAD_INFO:
+        date_start = fryer.datetime.validate_date(date=date_start_)
+        date_end = fryer.datetime.validate_date(date=date_end_)
+        if date_start <= month <= date_end:
+            break
+    else:
+        date_start = None
+        date_end = None
+
+    return get_path_file_raw(
+        path_key=path_key_raw,
+        date_start=date_start,
+        date_end=date_end,
+        path_env=path_env,
+    )
+
+
+def get_type_file(file_name: str) -> str | None:
+    for type_file in TYPES_FILE:
+        if file_name.endswith(f"-{type_file}.csv"):
+            return type_file
+    return None
+
+
+def get_force(file_name: str, type_file: str) -> str:
+    """Get the force of a file `YYYY-MM-force-type_file.csv` of the archive."""
+    return Path(file_name).name[8 : -len(f"-{type_file}.csv")]
+
+
+def index_members(zip_file: ZipFile) -> dict[str, dict[str, list[str]]]:
+    """Index the files of the archive by their `YYYY-MM` month and type of file, from
+    its central directory which is only read once when the archive is opened.
+    """
+    index: dict[str, dict[str, list[str]]] = {}
+    for info in zip_file.infolist():
+        type_file = get_type_file(info.filename)
+        # Empty files do not even have a header
+        if type_file is None or not info.file_size:
+            continue
+        month = Path(info.filename).name[:7]
+        index.setdefault(month, {}).setdefault(type_file, []).append(info.filename)
+    return index
+
+
+def parse_street(
+    zip_file: ZipFile,
+    *,
+    files_to_read: list[str],
+    datetime_download: pd.Timestamp,
+) -> pl.DataFrame:
+    additional_exprs = [pl.lit(datetime_download).alias("datetime_download")]
+    # Each chunk is converted as it is read, so only one chunk of the CSVs is ever
+    # in memory as strings
+    return fryer.archive.read_csv_members(
+        zip_file,
+        files_to_read,
+        transform=lambda df: df.select(*EXPRS_STREET, *additional_exprs).with_columns(
+            EXPR_CELL
+        ),
+    )
+
+
+def parse_outcomes(
+    zip_file: ZipFile,
+    *,
+    files_to_read: list[str],
+    datetime_download: pd.Timestamp,
+) -> pl.DataFrame:
+    """Parse the outcomes, whose `crime_key` is null until set by
+    `write_outcome_keys`, as it comes from the crimes of the months before.
+    """
+    additional_exprs = [
+        pl.lit(datetime_download).alias("datetime_download"),
+        pl.lit(None, dtype=pl.UInt64).alias("crime_key"),
+    ]
+    return fryer.archive.read_csv_members(
+        zip_file,
+        files_to_read,
+        transform=lambda df: df.select(*EXPRS_OUTCOMES, *additional_exprs),
+    )
+
+
+def parse_stop_and_search(
+    zip_file: ZipFile,
+    *,
+    files_to_read: list[str],
+    datetime_download: pd.Timestamp,
+) -> pl.DataFrame:
+    """Parse the stops and searches, whose force is only in the name of their file."""
+    dfs = []
+    for file_name in files_to_read:
+        exprs = [
+            *EXPRS_STOP_AND_SEARCH,
+            pl.lit(get_force(file_name, "stop-and-search")).alias("force"),
+            pl.lit(datetime_download).alias("datetime_download"),
+        ]
+        dfs.append(
+            fryer.archive.read_csv_members(
+                zip_file,
+                [file_name],
+                transform=lambda df, exprs=exprs: df.select(exprs),
+            ),
+        )
+    return pl.concat(dfs, rechunk=False)
+
+
+def convert_month(  # noqa: PLR0913 - Needs all the arguments
+    zip_file: ZipFile,
+    *,
+    month: pd.Timestamp,
+    members_month: dict[str, list[str]],
+    path_raw: Path,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    logger: Logger,
+) -> None:
+    """Convert the street, outcomes and stop and search files of `month` in
+    `zip_file`, `members_month` by type of file, and write the integer keys of the
+    month's crimes for `write_outcome_keys`.
+    """
+    datetime_download = pd.Timestamp.fromtimestamp(path_raw.stat().st_mtime)
+    parsers = {
+        "street": parse_street,
+        "outcomes": parse_outcomes,
+        "stop-and-search": parse_stop_and_search,
+    }
+    keys = {
+        "street": KEY,
+        "outcomes": KEY_OUTCOMES,
+        "stop-and-search": KEY_STOP_AND_SEARCH,
+    }
+    profiles = {
+        "street": WRITE_PROFILE,
+        "outcomes": WRITE_PROFILE_OUTCOMES,
+        "stop-and-search": WRITE_PROFILE_STOP_AND_SEARCH,
+    }
+    for type_file in TYPES_FILE:
+        files_to_read = members_month.get(type_file)
+        if not files_to_read:
+            continue
+        logger.info(f"Reading {files_to_read[0]=} and {len(files_to_read) - 1} others")
+        df = parsers[type_file](
+            zip_file,
+            files_to_read=files_to_read,
+            datetime_download=datetime_download,
+        )
+        if type_file == "street":
+            df = df.with_columns(EXPR_CRIME_KEY)
+            fryer.parquet.write(
+                df.select("id_crime", "crime_key").drop_nulls().unique(),
+                path(
+                    key=KEY_CRIME_KEYS,
+                    month=month,
+                    path_data=path_data,
+                    path_env=path_env,
+                    mkdir=True,
+                ),
+                profile=WRITE_PROFILE_CRIME_KEYS,
+            )
+        fryer.logger.log_df(logger, df)
+        path_file = path(
+            key=keys[type_file],
+            month=month,
+            path_data=path_data,
+            path_env=path_env,
+            mkdir=True,
+        )
+        logger.info(f"Writing to {path_file=}")
+        fryer.parquet.write(df, path_file, profile=profiles[type_file])
+
+
+def get_months_to_write(
+    *,
+    months: list[pd.Timestamp],
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> list[pd.Timestamp]:
+    return [
+        month
+        for month in months
+        if not path(month=month, path_data=path_data, path_env=path_env).exists()
+    ]
+
+
+def write_street_archive(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    path_raw: Path,
+    months: list[pd.Timestamp],
+    overwrite: bool = False,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the street, outcomes and stop and search files of each of the `months`
+    which have not been written from the archive at `path_raw`, which is only opened,
+    and its central directory indexed, once. If `overwrite` is True every one of the
+    `months` is written.
+    """
+    key = KEY
+    logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
+    months_to_write = (
+        months
+        if overwrite
+        else get_months_to_write(months=months, path_data=path_data, path_env=path_env)
+    )
+    logger.info(
+        f"Writing {len(months_to_write)} of {len(months)} months from {path_raw=}",
+    )
+    if not months_to_write:
+        return
+
+    with ZipFile(file=path_raw) as zip_file:
+        index = index_members(zip_file)
+        for month in months_to_write:
+            members_month = index.get(f"{month:%Y-%m}", {})
+            if "street" not in members_month:
+                logger.warning(f"No street files for {month=} in {path_raw=}")
+                continue
+            convert_month(
+                zip_file,
+                month=month,
+                members_month=members_month,
+                path_raw=path_raw,
+                path_data=path_data,
+                path_env=path_env,
+                logger=logger,
+            )
+
+
+@lru_cache(maxsize=1)
+def open_archive(path_raw: Path) -> tuple[ZipFile, dict[str, dict[str, list[str]]]]:
+    """Open and index the archive once per process, for the months of the archive
+    each worker of `write_street_archive_parallel` converts.
+    """
+    zip_file = ZipFile(file=path_raw)
+    return zip_file, index_members(zip_file)
+
+
+def write_street_month(
+    *,
+    path_raw: Path,
+    month: pd.Timestamp,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    zip_file, index = open_archive(path_raw)
+    convert_month(
+        zip_file,
+        month=month,
+        members_month=index[f"{month:%Y-%m}"],
+        path_raw=path_raw,
+        path_data=path_data,
+        path_env=path_env,
+        logger=logger,
+    )
+    # The worker processes exit without running the atexit shutdown of the logger
+    fryer.logger.flush()
+
+
+def write_street_archive_parallel(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    path_raw: Path,
+    months: list[pd.Timestamp],
+    max_workers: int,
+    max_memory_mb: float | None = None,
+    overwrite: bool = False,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the `months` as `write_street_archive` does, with up to `max_workers`
+    processes converting a month each.
+
+    Months are only started while the estimated memory of the months being converted,
+    `MEMORY_PER_CSV_BYTE` times the size of their CSVs, is within `max_memory_mb`. A
+    month larger than `max_memory_mb` is converted on its own.
+    """
+    key = KEY
+    logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
+    months_to_write = (
+        months
+        if overwrite
+        else get_months_to_write(months=months, path_data=path_data, path_env=path_env)
+    )
+    logger.info(
+        f"Writing {len(months_to_write)} of {len(months)} months from {path_raw=}, "
+        f"{max_workers=}, {max_memory_mb=}",
+    )
+    with ZipFile(file=path_raw) as zip_file:
+        index = index_members(zip_file)
+        memory_by_month = {
+            month: MEMORY_PER_CSV_BYTE
+            * sum(
+                zip_file.getinfo(file_name).file_size
+                for files_type in index[f"{month:%Y-%m}"].values()
+                for file_name in files_type
+            )
+            for month in months_to_write
+            if "street" in index.get(f"{month:%Y-%m}", {})
+        }
+    for month in months_to_write:
+        if month not in memory_by_month:
+            logger.warning(f"No street files for {month=} in {path_raw=}")
+
+    memory_max = float("inf") if max_memory_mb is None else max_memory_mb * 1024**2
+    memory_used = 0
+    months_pending = deque(memory_by_month)
+    futures: dict[Future, int] = {}
+    # Not forking, as the threads of polars in this process do not survive a fork
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        while months_pending or futures:
+            while (
+                months_pending
+                and len(futures) < max_workers
+                and (
+                    not futures
+                    or memory_used + memory_by_month[months_pending[0]] <= memory_max
+                )
+            ):
+                month = months_pending.popleft()
+                future = executor.submit(
+                    write_street_month,
+                    path_raw=path_raw,
+                    month=month,
+                    path_log=path_log,
+                    path_data=path_data,
+                    path_env=path_env,
+                )
+                futures[future] = memory_by_month[month]
+                memory_used += memory_by_month[month]
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                memory_used -= futures.pop(future)
+                future.result()
+
 
 def write_street(
     *,
@@ -293,114 +827,611 @@ def write_street(
         )
         return
 
-    for date_start_, date_end_ in RAW_DOWNLOAD_INFO:
-        date_start = fryer.datetime.validate_date(date=date_start_)
-        date_end = fryer.datetime.validate_date(date=date_end_)
-        if date_start <= month <= date_end:
-            break
-    else:
-        date_start = None
-        date_end = None
-
-    path_raw = get_path_file_raw(
-        path_key=path_key_raw,
-        date_start=date_start,
-        date_end=date_end,
+    write_street_archive(
+        path_raw=get_path_file_raw_for_month(
+            month=month,
+            path_key_raw=path_key_raw,
+            path_env=path_env,
+        ),
+        months=[month],
+        path_log=path_log,
+        path_data=path_data,
         path_env=path_env,
     )
-    zip_file = ZipFile(file=path_raw)
-    files_to_read = [
-        file_name
-        for file_name in zip_file.namelist()
-        if file_name.startswith(f"{month:%Y-%m}")
-        and file_name.split(".csv")[0].endswith("-street")
-    ]
-    logger.info(f"Reading from {len(files_to_read)=}")
-
-    exprs = [
-        pl.col("Crime ID").cast(pl.String).alias("id_crime"),
-        pl.col("Month").str.to_date(format="%Y-%m").alias("month"),
-        pl.col("Month").str.to_date(format="%Y-%m").alias("date"),
-        (
-            pl.col("Reported by")
-            .replace_strict(
-                FORCE_MAPPING,
-                return_dtype=pl.Enum(FORCE_MAPPING.values()),
-            )
-            .alias("force_reported_by")
-        ),
-        (
-            pl.col("Falls within")
-            .replace_strict(
-                FORCE_MAPPING,
-                return_dtype=pl.Enum(FORCE_MAPPING.values()),
-            )
-            .alias("force_falls_within")
-        ),
-        pl.col("Longitude").cast(pl.Float32).alias("longitude"),
-        pl.col("Latitude").cast(pl.Float32).alias("latitude"),
-        pl.col("Location").cast(pl.String).alias("location"),
-        pl.col("LSOA code").cast(pl.String).alias("lower_layer_super_output_area_code"),
-        pl.col("LSOA name").cast(pl.String).alias("lower_layer_super_output_area_name"),
-        (
-            pl.col("Crime type")
-            .replace_strict(
-                CRIME_TYPE_MAPPING,
-                return_dtype=pl.Enum(sorted(set(CRIME_TYPE_MAPPING.values()))),
+    if path_file.exists():
+        update_counts(
+            months=[month],
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+        update_outcome_keys(
+            months=[month],
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+
+
+def get_date_archive(path_raw: Path) -> pd.Timestamp:
+    """Get the date of the archive from its name, the end of its range or the day the
+    latest archive was downloaded, so later archives have the newer copies.
+    """
+    return fryer.datetime.validate_date(date=path_raw.stem.split("_")[-1])
+
+
+def index_archive(path_raw: Path) -> pl.DataFrame:
+    """Index the CSVs of the archive by month, force and type of file, with their CRC
+    and size from its central directory, without reading any of them.
+    """
+    rows = []
+    with ZipFile(file=path_raw) as zip_file:
+        for info in zip_file.infolist():
+            type_file = get_type_file(info.filename)
+            if type_file is None:
+                continue
+            rows.append(
+                {
+                    "archive": path_raw.name,
+                    "file_name": info.filename,
+                    "month": Path(info.filename).name[:7],
+                    "force": get_force(info.filename, type_file),
+                    "type_file": type_file,
+                    "crc": info.CRC,
+                    "size": info.file_size,
+                },
             )
-            .alias("crime_type")
-        ),
-        pl.col("Last outcome category").cast(pl.String).alias("last_outcome_category"),
-        pl.col("Context").cast(pl.String).alias("context"),
-    ]
+    return pl.DataFrame(rows, schema=SCHEMA_CONTENT_INDEX).with_columns(
+        date_archive=pl.lit(get_date_archive(path_raw).date()),
+    )
+
+
+def path_content_index(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    path_key = fryer.path.for_key(
+        key=KEY_CONTENT_INDEX,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+    return path_key / f"{KEY_CONTENT_INDEX}.parquet"
 
-    datetime_download = pd.Timestamp.fromtimestamp(path_raw.stat().st_mtime)
-    additional_exprs = [pl.lit(datetime_download).alias("datetime_download")]
 
+def write_content_index(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    """Index the members of every raw archive, marking the members of each month in
+    the newest archive with the month with `is_newest`, as a month is read from one
+    archive. Archives are never changed once downloaded, so only the archives not in
+    the index are opened.
+    """
+    logger = fryer.logger.get(key=KEY_RAW, path_log=path_log, path_env=path_env)
+    path_key_raw = fryer.path.for_key(
+        key=KEY_RAW,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    path_file = path_content_index(
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    paths_raw = sorted(path_key_raw.glob("*.zip"))
+    df = (
+        pl.read_parquet(path_file).drop("is_newest")
+        if path_file.exists()
+        else pl.DataFrame(schema=SCHEMA_CONTENT_INDEX)
+    )
+    df = df.filter(
+        pl.col("archive").is_in(pl.Series([path_raw.name for path_raw in paths_raw])),
+    )
+    archives_indexed = set(df.get_column("archive"))
+    paths_raw_new = [p for p in paths_raw if p.name not in archives_indexed]
+    logger.info(f"Indexing {len(paths_raw_new)} of {len(paths_raw)} archives")
     df = pl.concat(
-        [pl.read_csv(zip_file.read(file_to_read)) for file_to_read in files_to_read],
-    ).select(*exprs, *additional_exprs)
-    logger.info(
-        f"""{df=
-}""",
+        [df, *(index_archive(path_raw) for path_raw in paths_raw_new)],
+        how="diagonal_relaxed",
+    ).with_columns(
+        # Archives of the same date are ranked on their name, so only one is newest
+        is_newest=(
+            pl.col("archive")
+            == pl.col("archive").sort_by("date_archive", "archive").last().over("month")
+        ),
+    )
+    fryer.parquet.write(
+        df,
+        path_file,
+        profile=fryer.parquet.WriteProfile(sort_by=("month", "force", "type_file")),
     )
+    return df
+
 
-    logger.info(f"Writing to {path_file=}")
-    df.write_parquet(path_file)
+def read_content_index(
+    *,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.DataFrame:
+    return pl.read_parquet(path_content_index(path_data=path_data, path_env=path_env))
 
 
-def write_street_all(
+def path_members(path_file: Path) -> Path:
+    return path_file.with_name(f"{path_file.name}.members.json")
+
+
+def get_members(df_content_index: pl.DataFrame) -> dict[str, dict]:
+    """Get the archive and the members of each month with street files, from the
+    newest archive with the month marked by `write_content_index`, and their CRCs and
+    sizes which change if the month is changed.
+    """
+    df = (
+        df_content_index.filter("is_newest")
+        .filter((pl.col("type_file") == "street").any().over("month"))
+        .sort("month", "file_name")
+    )
+    return {
+        month: {
+            "archive": df_month.get_column("archive")[0],
+            # Lists rather than tuples, as they are compared to the members read from JSON
+            "members": [
+                list(row) for row in df_month.select("file_name", "crc", "size").rows()
+            ],
+        }
+        for (month,), df_month in df.group_by("month", maintain_order=True)
+    }
+
+
+def get_sidecar(members: dict) -> dict:
+    """Get what a month was written from, its members of every type of file, and
+    how, so months written from other members or with another layout are written
+    again.
+    """
+    return {"members": members["members"], "sort_by": list(WRITE_PROFILE.sort_by)}
+
+
+def write_street_all(  # noqa: PLR0913 - Needs all the arguments
     *,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
+    path_data_raw: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
+    max_workers: int = 1,
+    max_memory_mb: float | None = None,
 ) -> None:
+    """Write every month from the newest archive with the month, see
+    `write_content_index`, opening each archive once for all of its months. Months
+    which have been written are only written again if their members in the newest
+    archive, or `WRITE_PROFILE`, have changed. The counts of `write_counts` are
+    written for the months written and for any months without them.
+
+    If `max_workers` is more than 1 the months are converted in that many processes,
+    within `max_memory_mb`, see `write_street_archive_parallel`.
+    """
     key = KEY
     months = get_months(path_env=path_env)
     logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
     logger.info(f"Writing {key} for {months[0]=}, {months[-1]=}, {len(months)=}")
-    for month in tqdm(months):
-        write_street(
-            month=month,
+    path_key_raw = fryer.path.for_key(
+        key=KEY_RAW,
+        path_data=path_data_raw,
+        path_env=path_env,
+    )
+    members_by_month = get_members(
+        write_content_index(
             path_log=path_log,
-            path_data=path_data,
+            path_data=path_data_raw,
             path_env=path_env,
+        ),
+    )
+    months_by_path_raw: dict[Path, list[pd.Timestamp]] = {}
+    months_missing = []
+    months_counts = []
+    for month in months:
+        members = members_by_month.get(f"{month:%Y-%m}")
+        if members is None:
+            months_missing.append(month)
+            continue
+        path_file_members = path_members(
+            path(month=month, path_data=path_data, path_env=path_env),
         )
+        is_written = path_file_members.exists() and (
+            json.loads(path_file_members.read_text()) == get_sidecar(members)
+        )
+        if is_written:
+            if not path_counts(
+                month=month,
+                path_data=path_data,
+                path_env=path_env,
+            ).exists():
+                months_counts.append(month)
+            continue
+        path_raw = path_key_raw / members["archive"]
+        months_by_path_raw.setdefault(path_raw, []).append(month)
+    if months_missing:
+        logger.warning(f"No street files for {len(months_missing)} months")
+
+    for path_raw, months_archive in tqdm(months_by_path_raw.items()):
+        if max_workers > 1:
+            write_street_archive_parallel(
+                path_raw=path_raw,
+                months=months_archive,
+                max_workers=max_workers,
+                max_memory_mb=max_memory_mb,
+                overwrite=True,
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+        else:
+            write_street_archive(
+                path_raw=path_raw,
+                months=months_archive,
+                overwrite=True,
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+        for month in months_archive:
+            path_file_members = path_members(
+                path(month=month, path_data=path_data, path_env=path_env),
+            )
+            members = members_by_month[f"{month:%Y-%m}"]
+            path_file_members.write_text(json.dumps(get_sidecar(members)))
+        months_counts.extend(months_archive)
+
+    update_counts(
+        months=months_counts,
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    update_outcome_keys(
+        months=[month for months in months_by_path_raw.values() for month in months],
+        path_log=path_log,
+        path_data=path_data,
+        path_env=path_env,
+    )
 
 
 def read_street(
     *,
+    bbox: fryer.grid.TypeBbox | None = None,
+    radius: tuple[float, float, float] | None = None,
     path_log: TypePathLike | None = None,
     path_data: TypePathLike | None = None,
     path_env: TypePathLike | None = None,
 ) -> pl.LazyFrame:
+    """Read the street crimes, only those in `bbox`, as the minimum longitude, minimum
+    latitude, maximum longitude and maximum latitude, and within `radius`, as the
+    longitude and latitude of the centre and the metres from it, if given.
+
+    Both filter on the `cell` column, so row groups of other areas are not read.
+    """
     key = KEY
     logger = fryer.logger.get(key=key, path_log=path_log, path_env=path_env)
     path_file = path(path_data=path_data, path_env=path_env)
     logger.info(f"Reading {key=} from {path_file}")
+    lf = pl.scan_parquet(source=path_file)
+    exprs_lon_lat = [pl.col("longitude"), pl.col("latitude")]
+    if bbox is not None:
+        lf = lf.filter(
+            fryer.grid.get_expr_in_bbox(*exprs_lon_lat, pl.col("cell"), bbox=bbox),
+        )
+    if radius is not None:
+        longitude, latitude, metres = radius
+        lf = lf.filter(
+            fryer.grid.get_expr_in_bbox(
+                *exprs_lon_lat,
+                pl.col("cell"),
+                bbox=fryer.grid.get_bbox_radius(longitude, latitude, metres),
+            ),
+            fryer.grid.get_expr_within_radius(
+                *exprs_lon_lat,
+                centre=(longitude, latitude),
+                metres=metres,
+            ),
+        )
+    return lf
+
+
+def read_outcomes(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    """Read the outcomes, which join to the street crimes on the integer `crime_key`
+    rather than on `id_crime`.
+    """
+    key = KEY_OUTCOMES
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    path_file = path(key=key, path_data=path_data, path_env=path_env)
+    logger.info(f"Reading {key=} from {path_file}")
+    return pl.scan_parquet(source=path_file)
+
+
+def read_stop_and_search(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    key = KEY_STOP_AND_SEARCH
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    path_file = path(key=key, path_data=path_data, path_env=path_env)
+    logger.info(f"Reading {key=} from {path_file}")
     return pl.scan_parquet(source=path_file)
 
 
+def write_outcome_keys(
+    *,
+    month: TypeDatetimeLike,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Set the `crime_key` of the month's outcomes from the crime keys written with
+    the street files of the `MONTHS_OUTCOME_LOOKBACK` months up to the month, which
+    are sorted by id. It is null for outcomes of older crimes or of crimes without a
+    street file.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    month = fryer.datetime.validate_date(date=month)
+    path_file = path(
+        key=KEY_OUTCOMES,
+        month=month,
+        path_data=path_data,
+        path_env=path_env,
+    )
+    paths_file_crime_keys = [
+        path_file_crime_keys
+        for months_before in range(MONTHS_OUTCOME_LOOKBACK)
+        if (
+            path_file_crime_keys := path(
+                key=KEY_CRIME_KEYS,
+                month=month - pd.DateOffset(months=months_before),
+                path_data=path_data,
+                path_env=path_env,
+            )
+        ).exists()
+    ]
+    lf = pl.scan_parquet(path_file).drop("crime_key")
+    if paths_file_crime_keys:
+        # The same id in more than one month is matched to the latest month
+        lf_crime_keys = (
+            pl.scan_parquet(paths_file_crime_keys)
+            .group_by("id_crime")
+            .agg(pl.col("crime_key").max())
+        )
+        lf = lf.join(lf_crime_keys, on="id_crime", how="left")
+    else:
+        lf = lf.with_columns(pl.lit(None, dtype=pl.UInt64).alias("crime_key"))
+    df = lf.collect()
+    logger.info(
+        f"Writing {df.get_column('crime_key').is_not_null().sum()} of {len(df)} "
+        f"outcomes with crime keys to {path_file=}",
+    )
+    fryer.parquet.write(df, path_file, profile=WRITE_PROFILE_OUTCOMES)
+
+
+def update_outcome_keys(
+    *,
+    months: Collection[TypeDatetimeLike],
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Set the crime keys of the outcomes of `months`, and of the written months after
+    them whose outcomes may be of the crimes of `months`, whose keys may have changed.
+    """
+    months_after = {
+        fryer.datetime.validate_date(date=month) + pd.DateOffset(months=months_after)
+        for month in months
+        for months_after in range(MONTHS_OUTCOME_LOOKBACK)
+    }
+    for month in tqdm(sorted(months_after)):
+        if path(
+            key=KEY_OUTCOMES,
+            month=month,
+            path_data=path_data,
+            path_env=path_env,
+        ).exists():
+            write_outcome_keys(
+                month=month,
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+
+
+def path_counts(
+    *,
+    month: TypeDatetimeLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+    mkdir: bool = False,
+) -> Path:
+    path_key = fryer.path.for_key(
+        key=KEY_COUNTS,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=mkdir,
+    )
+    if month is None:
+        month = "*"
+    else:
+        month = f"{fryer.datetime.validate_date(date=month):{FORMAT_ISO_DATE}}"
+    return path_key / f"{month}.parquet"
+
+
+def write_counts(
+    *,
+    month: TypeDatetimeLike,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the count of the month's street crimes by LSOA and crime type, from its
+    file written by `write_street_all` of which only those columns are read, and a
+    `count_{window}mo` column of the count over the `window` months up to and
+    including the month for each of `WINDOWS_COUNTS`.
+
+    There is a row for every LSOA and crime type with a crime in the longest window,
+    whose count is 0 if it had none in the month itself, so its rolling counts are
+    not lost. The rolling counts are summed from the counts written for the months
+    before, so they should be written first, see `update_counts`.
+    """
+    logger = fryer.logger.get(key=KEY, path_log=path_log, path_env=path_env)
+    month = fryer.datetime.validate_date(date=month)
+    lf_month = (
+        pl.scan_parquet(path(month=month, path_data=path_data, path_env=path_env))
+        .group_by(COLUMNS_COUNTS)
+        .agg(pl.len().cast(pl.UInt32).alias("count"))
+    )
+    paths_file_before = [
+        path_file_before
+        for months_before in range(1, max(WINDOWS_COUNTS))
+        if (
+            path_file_before := path_counts(
+                month=month - pd.DateOffset(months=months_before),
+                path_data=path_data,
+                path_env=path_env,
+            )
+        ).exists()
+    ]
+    lf_history = pl.concat(
+        [
+            lf_month,
+            *(
+                pl.scan_parquet(path_file_before).select(*COLUMNS_COUNTS, "count")
+                for path_file_before in paths_file_before
+            ),
+        ],
+    )
+    window_max = max(WINDOWS_COUNTS)
+    df = (
+        lf_history.group_by("lower_layer_super_output_area_code", "crime_type")
+        .agg(
+            pl.col("count")
+            .filter(pl.col("month") == month.date())
+            .sum()
+            .cast(pl.UInt32),
+            *(
+                pl.col("count")
+                .filter(
+                    pl.col("month")
+                    >= (month - pd.DateOffset(months=window - 1)).date(),
+                )
+                .sum()
+                .cast(pl.UInt32)
+                .alias(f"count_{window}mo")
+                for window in WINDOWS_COUNTS
+            ),
+        )
+        # Months before carry rows with a count of 0 within their own windows
+        .filter(pl.col(f"count_{window_max}mo") > 0)
+        .with_columns(pl.lit(month.date()).alias("month"))
+        .select(
+            *COLUMNS_COUNTS,
+            "count",
+            *(f"count_{window}mo" for window in WINDOWS_COUNTS),
+        )
+        .collect()
+    )
+    path_file = path_counts(
+        month=month,
+        path_data=path_data,
+        path_env=path_env,
+        mkdir=True,
+    )
+    logger.info(f"Writing {len(df)} counts to {path_file=}")
+    fryer.parquet.write(df, path_file, profile=WRITE_PROFILE_COUNTS)
+
+
+def update_counts(
+    *,
+    months: Collection[TypeDatetimeLike],
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Write the counts of `months`, and of the written months after them whose
+    rolling counts include them, in order.
+    """
+    months_after = {
+        fryer.datetime.validate_date(date=month) + pd.DateOffset(months=months_after)
+        for month in months
+        for months_after in range(max(WINDOWS_COUNTS))
+    }
+    for month in tqdm(sorted(months_after)):
+        if path(month=month, path_data=path_data, path_env=path_env).exists():
+            write_counts(
+                month=month,
+                path_log=path_log,
+                path_data=path_data,
+                path_env=path_env,
+            )
+
+
+def write_counts_all(
+    *,
+    path_log: TypePathLike | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> None:
+    path_file = path(path_data=path_data, path_env=path_env)
+    for path_file_month in tqdm(sorted(path_file.parent.glob(path_file.name))):
+        write_counts(
+            month=path_file_month.stem,
+            path_log=path_log,
+            path_data=path_data,
+            path_env=path_env,
+        )
+
+
+def read_counts(  # noqa: PLR0913 - Needs all the arguments
+    *,
+    date_from: TypeDatetimeLike | None = None,
+    date_to: TypeDatetimeLike | None = None,
+    crime_types: Collection[str] | None = None,
+    lower_layer_super_output_area_codes: Collection[str] | None = None,
+    path_data: TypePathLike | None = None,
+    path_env: TypePathLike | None = None,
+) -> pl.LazyFrame:
+    """Read the count, and rolling counts, of street crimes by LSOA, month and crime
+    type written by `write_counts`. Months without a crime of a type in an LSOA in the
+    longest window have no row. Months outside of the dates are not scanned.
+    """
+    if date_from is not None:
+        date_from = fryer.datetime.validate_date(date=date_from).replace(day=1)
+    if date_to is not None:
+        date_to = fryer.datetime.validate_date(date=date_to)
+    path_file = path_counts(path_data=path_data, path_env=path_env)
+    paths_file = sorted(path_file.parent.glob(path_file.name))
+    paths_file_selected = [
+        path_file_month
+        for path_file_month in paths_file
+        if (date_from is None or pd.Timestamp(path_file_month.stem) >= date_from)
+        and (date_to is None or pd.Timestamp(path_file_month.stem) <= date_to)
+    ]
+    lf = fryer.parquet.scan(paths_file_selected, schema=SCHEMA_COUNTS)
+    if crime_types is not None:
+        lf = lf.filter(pl.col("crime_type").is_in(list(crime_types)))
+    if lower_layer_super_output_area_codes is not None:
+        lf = lf.filter(
+            pl.col("lower_layer_super_output_area_code").is_in(
+                list(lower_layer_super_output_area_codes),
+            ),
+        )
+    return lf
+
+
 def main() -> None:
     write_raw_all()
     write_street_all()
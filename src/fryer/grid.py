@@ -0,0 +1,141 @@
+import math
+
+import polars as pl
+
+__all__ = [
+    "METRES_PER_DEGREE",
+    "ZOOM",
+    "TypeBbox",
+    "get_bbox_radius",
+    "get_expr_cell",
+    "get_expr_in_bbox",
+    "get_expr_within_radius",
+    "get_range_cells",
+]
+
+# Web mercator tiles of about 380m by 380m in the UK, whose x and y are 16 bits so
+# their cell fits in a UInt32
+ZOOM = 16
+METRES_PER_DEGREE = 111_320
+
+# Minimum longitude, minimum latitude, maximum longitude and maximum latitude
+TypeBbox = tuple[float, float, float, float]
+
+
+def get_expr_tile_x(longitude: pl.Expr, *, zoom: int = ZOOM) -> pl.Expr:
+    num_tiles = 2**zoom
+    return (
+        ((longitude + 180) / 360 * num_tiles)
+        .floor()
+        .clip(0, num_tiles - 1)
+        .cast(pl.UInt64)
+    )
+
+
+def get_expr_tile_y(latitude: pl.Expr, *, zoom: int = ZOOM) -> pl.Expr:
+    num_tiles = 2**zoom
+    latitude_radians = latitude.radians()
+    return (
+        (
+            (1 - (latitude_radians.tan() + 1 / latitude_radians.cos()).log() / math.pi)
+            / 2
+            * num_tiles
+        )
+        .floor()
+        .clip(0, num_tiles - 1)
+        .cast(pl.UInt64)
+    )
+
+
+def spread_bits(expr: pl.Expr) -> pl.Expr:
+    """Spread the 16 bits of `expr` out to the even bits of 32 bits."""
+    # Multiplying by a power of 2 is shifting left
+    expr = (expr | expr * 2**8) & 0x00FF00FF
+    expr = (expr | expr * 2**4) & 0x0F0F0F0F
+    expr = (expr | expr * 2**2) & 0x33333333
+    return (expr | expr * 2**1) & 0x55555555
+
+
+def get_expr_cell(
+    longitude: pl.Expr,
+    latitude: pl.Expr,
+    *,
+    zoom: int = ZOOM,
+) -> pl.Expr:
+    """Get the cell of each point, the quadkey of its web mercator tile at `zoom` as an
+    integer, which interleaves the bits of the tile's y and x.
+
+    Cells are hierarchical, the cell at `zoom - k` is the cell divided by `4**k`, and
+    nearby points mostly have nearby cells, so sorting by cell clusters them.
+    """
+    return (
+        spread_bits(get_expr_tile_y(latitude, zoom=zoom)) * 2
+        | spread_bits(get_expr_tile_x(longitude, zoom=zoom))
+    ).cast(pl.UInt32)
+
+
+def get_range_cells(bbox: TypeBbox, *, zoom: int = ZOOM) -> tuple[int, int]:
+    """Get the smallest and largest cell of the points in `bbox`, the cells of its
+    north west and south east corners as cells increase with both x and y.
+    """
+    longitude_min, latitude_min, longitude_max, latitude_max = bbox
+    return tuple(
+        pl.select(
+            get_expr_cell(pl.lit(longitude), pl.lit(latitude), zoom=zoom),
+        ).item()
+        for longitude, latitude in [
+            (longitude_min, latitude_max),
+            (longitude_max, latitude_min),
+        ]
+    )
+
+
+def get_expr_in_bbox(
+    longitude: pl.Expr,
+    latitude: pl.Expr,
+    cell: pl.Expr,
+    *,
+    bbox: TypeBbox,
+    zoom: int = ZOOM,
+) -> pl.Expr:
+    """Whether each point is in `bbox`, also filtering on `cell` so row groups sorted
+    by cell whose statistics are outside of the range of cells of `bbox` are skipped.
+    """
+    longitude_min, latitude_min, longitude_max, latitude_max = bbox
+    cell_min, cell_max = get_range_cells(bbox, zoom=zoom)
+    return (
+        cell.is_between(cell_min, cell_max)
+        & longitude.is_between(longitude_min, longitude_max)
+        & latitude.is_between(latitude_min, latitude_max)
+    )
+
+
+def get_bbox_radius(longitude: float, latitude: float, metres: float) -> TypeBbox:
+    degrees_latitude = metres / METRES_PER_DEGREE
+    degrees_longitude = metres / (METRES_PER_DEGREE * math.cos(math.radians(latitude)))
+    return (
+        longitude - degrees_longitude,
+        latitude - degrees_latitude,
+        longitude + degrees_longitude,
+        latitude + degrees_latitude,
+    )
+
+
+def get_expr_within_radius(
+    longitude: pl.Expr,
+    latitude: pl.Expr,
+    *,
+    centre: tuple[float, float],
+    metres: float,
+) -> pl.Expr:
+    """Whether each point is within `metres` of the longitude and latitude of `centre`,
+    with an equirectangular approximation which is close at the distances of a city.
+    """
+    longitude_centre, latitude_centre = centre
+    x = (
+        (longitude - longitude_centre)
+        * math.cos(math.radians(latitude_centre))
+        * METRES_PER_DEGREE
+    )
+    y = (latitude - latitude_centre) * METRES_PER_DEGREE
+    return x**2 + y**2 <= metres**2
@@ -1,12 +1,25 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING
 
 import fryer.path
 from fryer.typing import TypePathLike
 
+if TYPE_CHECKING:
+    import polars as pl
+
 __all__ = [
     "TypeLogger",
+    "flush",
     "get",
+    "log_df",
+    "shutdown",
+    "summarise_df",
 ]
 
 TypeLogger = logging.Logger
@@ -14,13 +27,58 @@ TypeLogger = logging.Logger
 
 LOGGING_FORMATTER = logging.Formatter(
     fmt=(
-        "%(asctime)s.%(msecs)03d %(levelname)s "
-        "%(module)s - %(funcName)s: %(message)s"
+        "%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s"
     ),
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
 
+class Logger(logging.Logger):
+    def setLevel(self, level: int | str) -> None:  # noqa: N802 - Overriding logging
+        super().setLevel(level)
+        # The manager only clears the level cache of loggers in the logging hierarchy
+        self._cache.clear()
+
+
+@dataclass(frozen=True, kw_only=True)
+class LoggerEntry:
+    logger: TypeLogger
+    queue: queue.Queue
+    listener: QueueListener
+
+
+# One logger per log file, the file and console handlers are only ever created once
+# and run on the listener thread so callers never wait on disk or stdout
+REGISTRY: dict[tuple[str, str], LoggerEntry] = {}
+REGISTRY_LOCK = threading.Lock()
+
+
+def create(key: str, path_log_file: str) -> LoggerEntry:
+    # Not using logging.getLogger as the same key can log to different paths
+    logger = Logger(key)
+    logger.setLevel(logging.DEBUG)
+
+    file_handler = logging.FileHandler(path_log_file, mode="a")
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(LOGGING_FORMATTER)
+
+    console_handler = logging.StreamHandler(stream=sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(LOGGING_FORMATTER)
+
+    queue_logs: queue.Queue = queue.Queue()
+    listener = QueueListener(
+        queue_logs,
+        file_handler,
+        console_handler,
+        respect_handler_level=True,
+    )
+    listener.start()
+    logger.addHandler(QueueHandler(queue_logs))
+
+    return LoggerEntry(logger=logger, queue=queue_logs, listener=listener)
+
+
 def get(
     key: str,
     *,
@@ -28,20 +86,74 @@ def get(
     path_env: TypePathLike | None = None,
 ) -> TypeLogger:
     path_log = fryer.path.log(override=path_log, path_env=path_env)
-    logger = logging.Logger(key)  # noqa: LOG001 - Does not work if we use logging.getLogger
 
     path_log_file = path_log / key / "log.log"
-    path_log_file.parent.mkdir(parents=True, exist_ok=True)
+    registry_key = (key, str(path_log_file.absolute()))
 
-    file_handler = logging.FileHandler(path_log_file, mode="a")
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(LOGGING_FORMATTER)
+    with REGISTRY_LOCK:
+        if registry_key not in REGISTRY:
+            path_log_file.parent.mkdir(parents=True, exist_ok=True)
+            REGISTRY[registry_key] = create(key=key, path_log_file=registry_key[1])
+        return REGISTRY[registry_key].logger
 
-    console_handler = logging.StreamHandler(stream=sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(LOGGING_FORMATTER)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+def summarise_df(df: "pl.DataFrame") -> str:
+    """Summarise the shape, schema and null counts of `df` without building its repr."""
+    null_counts = {
+        column: count
+        for column, count in zip(
+            df.columns,
+            df.null_count().row(0),
+            strict=True,
+        )
+        if count
+    }
+    return f"shape={df.shape}, schema={dict(df.schema)}, {null_counts=}"
+
+
+def log_df(
+    logger: TypeLogger,
+    df: "pl.DataFrame",
+    *,
+    name: str = "df",
+    level: int = logging.INFO,
+    n_rows_preview: int = 5,
+) -> None:
+    """Log a summary of `df` at `level` and a preview of its first rows at DEBUG.
+
+    Nothing is computed for a level the logger does not have enabled.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, f"{name}: {summarise_df(df)}", stacklevel=2)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{name}=\n{df.head(n_rows_preview)}", stacklevel=2)
+
+
+def flush() -> None:
+    """Block until every queued record has been handled by the listeners."""
+    with REGISTRY_LOCK:
+        entries = list(REGISTRY.values())
+    for entry in entries:
+        entry.queue.join()
+
+
+def shutdown() -> None:
+    """Stop the listeners, handling any queued records, and close their handlers.
+
+    Loggers already handed out log straight to the closed handlers from then on, the
+    file handler reopens its file for any later record so none are lost.
+    """
+    with REGISTRY_LOCK:
+        entries = list(REGISTRY.values())
+        REGISTRY.clear()
+    for entry in entries:
+        entry.listener.stop()
+        for handler in list(entry.logger.handlers):
+            if isinstance(handler, QueueHandler):
+                entry.logger.removeHandler(handler)
+        for handler in entry.listener.handlers:
+            handler.close()
+            entry.logger.addHandler(handler)
+
 
-    return logger
+atexit.register(shutdown)
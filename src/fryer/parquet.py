@@ -0,0 +1,337 @@
+import struct
+from collections.abc import Collection, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import polars as pl
+
+__all__ = [
+    "BLOOM_FILTER_FPP",
+    "PROFILE_DEFAULT",
+    "ROW_GROUP_SIZE",
+    "WriteProfile",
+    "lookup",
+    "might_contain",
+    "scan",
+    "select_row_groups",
+    "write",
+    "xxhash64",
+]
+
+ROW_GROUP_SIZE = 128 * 1024
+BLOOM_FILTER_FPP = 0.01
+
+MASK_64 = (1 << 64) - 1
+PRIMES_XXHASH64 = (
+    11400714785074694791,
+    14029467366897019727,
+    1609587929392839161,
+    9650029242287828579,
+    2870177450012600261,
+)
+# The salts of the split block bloom filter in the parquet format specification
+SALTS_BLOOM_FILTER = (
+    0x47B6137B,
+    0x44974D91,
+    0x8824AD5B,
+    0xA2B7289D,
+    0x705495C7,
+    0x2DF1424B,
+    0x9EFC4947,
+    0x5C6BFB31,
+)
+SIZE_BLOCK_BLOOM_FILTER = 32
+
+
+@dataclass(frozen=True, kw_only=True)
+class WriteProfile:
+    """How a dataset is laid out in its parquet files.
+
+    Rows are sorted by `sort_by` so each row group covers a narrow range of the keys,
+    and the min and max `statistics` of the row groups let filters on the keys skip
+    the ones that cannot match. `dictionary` is whether, or for which columns, to use
+    dictionary encoding, otherwise it is left to the writer.
+
+    The `bloom_filter` columns have a bloom filter per row group, so `lookup` can skip
+    the row groups of columns which are not sorted.
+    """
+
+    sort_by: tuple[str, ...] = ()
+    row_group_size: int = ROW_GROUP_SIZE
+    compression: str = "zstd"
+    compression_level: int | None = None
+    statistics: bool = True
+    dictionary: bool | tuple[str, ...] | None = None
+    bloom_filter: tuple[str, ...] = ()
+
+
+PROFILE_DEFAULT = WriteProfile()
+
+
+def write(
+    df: pl.DataFrame,
+    path_file: Path,
+    *,
+    profile: WriteProfile = PROFILE_DEFAULT,
+) -> None:
+    """Write `df` to `path_file` laid out as `profile`, via a temporary file so an
+    interrupted write is not seen as done.
+
+    Page indexes are not written, as neither polars nor the row group reads of
+    `lookup` use them to skip pages, so they would only make files bigger and slower
+    to write. Row groups are the unit `lookup` skips.
+    """
+    if profile.sort_by:
+        df = df.sort(profile.sort_by, nulls_last=True, maintain_order=True)
+    path_file_tmp = path_file.with_name(f"{path_file.name}.tmp")
+    pyarrow_options = {}
+    # Only the pyarrow writer can choose the columns to dictionary encode, and write
+    # bloom filters, which needs pyarrow 24 or later
+    if profile.dictionary is not None:
+        pyarrow_options["use_dictionary"] = profile.dictionary
+    if profile.bloom_filter:
+        pyarrow_options["bloom_filter_options"] = {
+            # A row group has at most `row_group_size` distinct values
+            column: {"ndv": profile.row_group_size, "fpp": BLOOM_FILTER_FPP}
+            for column in profile.bloom_filter
+        }
+    if pyarrow_options:
+        import pyarrow.parquet as pq  # noqa: PLC0415 - Only needed for these options
+
+        # Not `use_pyarrow` of write_parquet, which drops the field metadata polars
+        # reads Enums back from
+        pq.write_table(
+            df.to_arrow(),
+            path_file_tmp,
+            compression=profile.compression,
+            compression_level=profile.compression_level,
+            write_statistics=profile.statistics,
+            row_group_size=profile.row_group_size,
+            **pyarrow_options,
+        )
+    else:
+        df.write_parquet(
+            file=path_file_tmp,
+            compression=profile.compression,
+            compression_level=profile.compression_level,
+            statistics=profile.statistics,
+            row_group_size=profile.row_group_size,
+        )
+    path_file_tmp.replace(path_file)
+
+
+def scan(
+    paths_file: Sequence[Path],
+    *,
+    schema: Mapping[str, pl.DataType],
+) -> pl.LazyFrame:
+    """Scan `paths_file`, or an empty frame with `schema` if there are none, as
+    `pl.scan_parquet` needs at least one file.
+    """
+    if not paths_file:
+        return pl.LazyFrame(schema=schema)
+    return pl.scan_parquet(source=paths_file)
+
+
+def rotate_left(value: int, bits: int) -> int:
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+def round_xxhash64(accumulator: int, lane: int) -> int:
+    accumulator = (accumulator + lane * PRIMES_XXHASH64[1]) & MASK_64
+    return (rotate_left(accumulator, 31) * PRIMES_XXHASH64[0]) & MASK_64
+
+
+def xxhash64(data: bytes, seed: int = 0) -> int:
+    """Hash `data` with XXH64, the hash of the bloom filters in parquet."""
+    p1, p2, p3, p4, p5 = PRIMES_XXHASH64
+    length = len(data)
+    offset = 0
+    if length >= 32:  # noqa: PLR2004 - Size of a stripe
+        accumulators = [
+            (seed + p1 + p2) & MASK_64,
+            (seed + p2) & MASK_64,
+            seed,
+            (seed - p1) & MASK_64,
+        ]
+        while offset <= length - 32:
+            lanes = struct.unpack_from("<4Q", data, offset)
+            accumulators = [
+                round_xxhash64(accumulator, lane)
+                for accumulator, lane in zip(accumulators, lanes, strict=True)
+            ]
+            offset += 32
+        hashed = sum(
+            rotate_left(accumulator, bits)
+            for accumulator, bits in zip(accumulators, (1, 7, 12, 18), strict=True)
+        )
+        for accumulator in accumulators:
+            hashed ^= round_xxhash64(0, accumulator)
+            hashed = (hashed * p1 + p4) & MASK_64
+    else:
+        hashed = (seed + p5) & MASK_64
+    hashed = (hashed + length) & MASK_64
+
+    while offset <= length - 8:
+        (lane,) = struct.unpack_from("<Q", data, offset)
+        hashed ^= round_xxhash64(0, lane)
+        hashed = (rotate_left(hashed, 27) * p1 + p4) & MASK_64
+        offset += 8
+    if offset <= length - 4:
+        (lane,) = struct.unpack_from("<I", data, offset)
+        hashed ^= (lane * p1) & MASK_64
+        hashed = (rotate_left(hashed, 23) * p2 + p3) & MASK_64
+        offset += 4
+    for byte in data[offset:]:
+        hashed ^= (byte * p5) & MASK_64
+        hashed = (rotate_left(hashed, 11) * p1) & MASK_64
+
+    hashed ^= hashed >> 33
+    hashed = (hashed * p2) & MASK_64
+    hashed ^= hashed >> 29
+    hashed = (hashed * p3) & MASK_64
+    return hashed ^ (hashed >> 32)
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def read_bloom_filter(file: BinaryIO, offset: int, length: int) -> bytes:
+    """Read the bitset of the bloom filter at `offset` in `file`, raising a ValueError
+    if its header cannot be parsed.
+    """
+    file.seek(offset)
+    data = file.read(length)
+    # The header is a thrift compact struct which starts with the i32 field numBytes,
+    # the size of the bitset which follows the rest of the header
+    if not data or data[0] != 0x15:  # noqa: PLR2004 - Field 1 of type i32
+        msg = f"Unexpected bloom filter header {data[:8]!r}"
+        raise ValueError(msg)
+    try:
+        zigzag, end_header = read_varint(data, 1)
+    except IndexError as error:
+        msg = f"Truncated bloom filter header {data[:8]!r}"
+        raise ValueError(msg) from error
+    num_bytes = (zigzag >> 1) ^ -(zigzag & 1)
+    if (
+        num_bytes <= 0
+        or num_bytes % SIZE_BLOCK_BLOOM_FILTER
+        or num_bytes > len(data) - end_header
+    ):
+        msg = f"Unexpected bloom filter size {num_bytes=} of {length=}"
+        raise ValueError(msg)
+    return data[-num_bytes:]
+
+
+def might_contain(bitset: bytes, value: bytes) -> bool:
+    """Whether the split block bloom filter `bitset` might contain `value`, it
+    certainly does not if False.
+    """
+    hashed = xxhash64(value)
+    num_blocks = len(bitset) // SIZE_BLOCK_BLOOM_FILTER
+    index_block = ((hashed >> 32) * num_blocks) >> 32
+    words = struct.unpack_from("<8I", bitset, index_block * SIZE_BLOCK_BLOOM_FILTER)
+    key = hashed & 0xFFFFFFFF
+    return all(
+        word & (1 << (((key * salt) & 0xFFFFFFFF) >> 27))
+        for word, salt in zip(words, SALTS_BLOOM_FILTER, strict=True)
+    )
+
+
+def select_row_groups(
+    path_file: Path,
+    *,
+    column: str,
+    values: Collection[str],
+) -> list[tuple[int, int]]:
+    """Select the row groups of `path_file` which might have any of the `values` of
+    the string `column`, from their min and max statistics and bloom filters, as the
+    offset of their first row and their number of rows.
+    """
+    import pyarrow.parquet as pq  # noqa: PLC0415 - Only needed for lookups
+
+    row_groups = []
+    offset = 0
+    with path_file.open("rb") as file:
+        metadata = pq.ParquetFile(file).metadata
+        index_column = metadata.schema.to_arrow_schema().get_field_index(column)
+        for index in range(metadata.num_row_groups):
+            metadata_row_group = metadata.row_group(index)
+            metadata_column = metadata_row_group.column(index_column)
+            offset_row_group = offset
+            offset += metadata_row_group.num_rows
+
+            statistics = metadata_column.statistics
+            candidates = [
+                value
+                for value in values
+                if statistics is None
+                or not statistics.has_min_max
+                or statistics.min <= value <= statistics.max
+            ]
+            if candidates and metadata_column.bloom_filter_length:
+                try:
+                    bitset = read_bloom_filter(
+                        file,
+                        metadata_column.bloom_filter_offset,
+                        metadata_column.bloom_filter_length,
+                    )
+                except ValueError:
+                    # The row group is read rather than skipped on a filter which
+                    # cannot be parsed
+                    bitset = None
+                if bitset is not None:
+                    candidates = [
+                        value
+                        for value in candidates
+                        if might_contain(bitset, value.encode())
+                    ]
+            if candidates:
+                row_groups.append((offset_row_group, metadata_row_group.num_rows))
+    return row_groups
+
+
+def lookup(
+    paths_file: Sequence[Path],
+    *,
+    column: str,
+    values: Collection[str],
+    schema: Mapping[str, pl.DataType] | None = None,
+) -> pl.DataFrame:
+    """Read the rows of `paths_file` whose string `column` is one of `values`, only
+    reading the row groups selected by `select_row_groups`.
+
+    Without any rows the frame is empty with `schema`, or the schema of the first file
+    if `schema` is not given.
+    """
+    values = sorted(set(values))
+    expr = pl.col(column).is_in(values)
+    # Each row group is collected on its own, as a concatenation of the slices reads
+    # far more than the slices
+    lfs = [
+        pl.scan_parquet(path_file).slice(offset, length).filter(expr)
+        for path_file in paths_file
+        for offset, length in select_row_groups(
+            path_file,
+            column=column,
+            values=values,
+        )
+    ]
+    if not lfs:
+        if schema is not None:
+            return pl.DataFrame(schema=schema)
+        if not paths_file:
+            msg = f"No files to look up {column=} in and no {schema=}"
+            raise ValueError(msg)
+        return pl.scan_parquet(paths_file[0]).clear().collect()
+    return pl.concat(pl.collect_all(lfs))
@@ -1,26 +1,553 @@
+import hashlib
+import json
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from logging import Logger
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import fryer.config
+from fryer.constants import (
+    FRYER_ENV_BACKOFF_FACTOR,
+    FRYER_ENV_MAX_RETRIES,
+    TIMEOUT_LONG,
+)
+from fryer.typing import TypePathLike
 
 __all__ = [
+    "configure",
+    "create_session",
+    "download_file",
+    "download_file_if_modified",
+    "get",
+    "get_if_modified",
+    "get_retry_options",
+    "get_session",
+    "get_validators",
+    "limit_host",
+    "read_validators",
     "validate_response",
+    "write_validators",
 ]
 
 
 STATUS_CODE_OKAY = 200
+STATUS_CODE_PARTIAL_CONTENT = 206
+STATUS_CODE_NOT_MODIFIED = 304
+STATUS_CODE_RANGE_NOT_SATISFIABLE = 416
+# Too many requests and server errors are worth trying again after backing off
+STATUS_CODES_RETRY = (429, 500, 502, 503, 504)
+
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 1.0
+POOL_MAXSIZE = 16
+MAX_CONCURRENCY_PER_HOST = 4
+
+CHUNK_SIZE = 1024 * 1024
+MAX_RESUMES = 10
+
+
+def create_session(
+    *,
+    max_retries: int = MAX_RETRIES,
+    backoff_factor: float = BACKOFF_FACTOR,
+    pool_maxsize: int = POOL_MAXSIZE,
+) -> requests.Session:
+    """Create a session which keeps connections alive in a pool per host and retries
+    with exponential backoff on connection errors, 429 and 5xx responses.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=STATUS_CODES_RETRY,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        # Return the last response so validate_response can log and raise for it
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION: requests.Session | None = None
+SESSION_LOCK = threading.Lock()
+
+HOST_SEMAPHORES: dict[str, threading.BoundedSemaphore] = {}
+HOST_SEMAPHORES_LOCK = threading.Lock()
+max_concurrency_per_host = MAX_CONCURRENCY_PER_HOST
+
+
+def get_retry_options(
+    *,
+    path_env: TypePathLike | None = None,
+) -> dict[str, int | float]:
+    """Get the retries and backoff of the shared session, from the env file or the
+    environment if they are set there, otherwise the defaults.
+    """
+    values = fryer.config.load(path_env=path_env)
+    return {
+        "max_retries": int(values.get(FRYER_ENV_MAX_RETRIES, MAX_RETRIES)),
+        "backoff_factor": float(values.get(FRYER_ENV_BACKOFF_FACTOR, BACKOFF_FACTOR)),
+    }
+
+
+def get_session() -> requests.Session:
+    """Get the session shared by all the dataset modules, creating it on first use."""
+    global SESSION  # noqa: PLW0603 - Shared session is created lazily
+    with SESSION_LOCK:
+        if SESSION is None:
+            SESSION = create_session(**get_retry_options())
+        return SESSION
+
+
+def configure(
+    *,
+    max_retries: int | None = None,
+    backoff_factor: float | None = None,
+    pool_maxsize: int = POOL_MAXSIZE,
+    max_concurrency: int = MAX_CONCURRENCY_PER_HOST,
+    path_env: TypePathLike | None = None,
+) -> None:
+    """Replace the shared session and per host concurrency limit. The retries and
+    backoff not given are those of `get_retry_options`.
+    """
+    global SESSION, max_concurrency_per_host  # noqa: PLW0603 - Replacing the shared session
+    retry_options = get_retry_options(path_env=path_env)
+    with SESSION_LOCK:
+        if SESSION is not None:
+            SESSION.close()
+        SESSION = create_session(
+            max_retries=(
+                retry_options["max_retries"] if max_retries is None else max_retries
+            ),
+            backoff_factor=(
+                retry_options["backoff_factor"]
+                if backoff_factor is None
+                else backoff_factor
+            ),
+            pool_maxsize=pool_maxsize,
+        )
+    with HOST_SEMAPHORES_LOCK:
+        max_concurrency_per_host = max_concurrency
+        HOST_SEMAPHORES.clear()
+
+
+@contextmanager
+def limit_host(url: str) -> Iterator[None]:
+    """Limit the number of concurrent requests to the host of `url`."""
+    host = urlsplit(url).netloc
+    with HOST_SEMAPHORES_LOCK:
+        if host not in HOST_SEMAPHORES:
+            HOST_SEMAPHORES[host] = threading.BoundedSemaphore(
+                max_concurrency_per_host,
+            )
+        semaphore = HOST_SEMAPHORES[host]
+    with semaphore:
+        yield
 
 
 def validate_response(
     response: requests.Response,
     url: str,
-    logger: Logger,
-    key: str,
+    logger: Logger | None = None,
+    key: str | None = None,
 ) -> None:
     """Validate the response from a request."""
     if response.status_code != STATUS_CODE_OKAY:
-        logger.error(f"Failed to download {key=} {url=}, {response=}")
+        if logger is not None:
+            logger.error(f"Failed to download {key=} {url=}, {response=}")
         msg = f"Did not read response correctly for {key=}, {url=}, {response=}"
         raise ValueError(
             msg,
         )
-    logger.info(f"Downloaded {key=} {url=}, {response=}")
+    if logger is not None:
+        logger.info(f"Downloaded {key=} {url=}, {response=}")
+
+
+def get(
+    url: str,
+    *,
+    logger: Logger | None = None,
+    key: str | None = None,
+    validate: bool = True,
+    timeout: int = TIMEOUT_LONG,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to requests
+) -> requests.Response:
+    """Get `url` with the shared session, within the concurrency limit for its host,
+    and validate the response unless `validate` is False.
+    """
+    with limit_host(url):
+        response = get_session().get(url, timeout=timeout, **kwargs)
+    if validate:
+        validate_response(response=response, url=url, logger=logger, key=key)
+    return response
+
+
+def get_validators(response: requests.Response) -> dict[str, str | int | None]:
+    """Get the validators of the file being downloaded, which tell us if a partial
+    download can be resumed, from the headers of `response`.
+    """
+    content_length = response.headers.get("Content-Length")
+    if response.status_code in {
+        STATUS_CODE_PARTIAL_CONTENT,
+        STATUS_CODE_RANGE_NOT_SATISFIABLE,
+    }:
+        # Content-Range looks like "bytes 100-199/200", or "bytes */200" for a 416
+        content_length = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": (
+            int(content_length)
+            if content_length is not None and content_length.isdigit()
+            else None
+        ),
+    }
+
+
+def path_validators(path_file: Path) -> Path:
+    return path_file.with_name(f"{path_file.name}.http.json")
+
+
+def read_validators(path_file: Path) -> dict[str, str | int | None] | None:
+    """Read the validators stored next to `path_file` when it was downloaded, if the
+    file and its validators both exist.
+    """
+    path_file_validators = path_validators(path_file)
+    if not path_file.exists() or not path_file_validators.exists():
+        return None
+    return json.loads(path_file_validators.read_text())
+
+
+def write_validators(
+    path_file: Path,
+    validators: dict[str, str | int | None],
+) -> None:
+    path_validators(path_file).write_text(json.dumps(validators))
+
+
+def get_conditional_headers(
+    validators: dict[str, str | int | None] | None,
+) -> dict[str, str]:
+    if validators is None:
+        return {}
+    headers = {}
+    if validators["etag"]:
+        headers["If-None-Match"] = validators["etag"]
+    if validators["last_modified"]:
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def get_if_modified(
+    url: str,
+    *,
+    validators: dict[str, str | int | None] | None,
+    logger: Logger | None = None,
+    key: str | None = None,
+    timeout: int = TIMEOUT_LONG,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to requests
+) -> requests.Response | None:
+    """Get `url` unless it has not changed since it was downloaded with `validators`,
+    in which case the server only sends a 304 and None is returned.
+    """
+    headers = kwargs.pop("headers", None) or {}
+    response = get(
+        url,
+        validate=False,
+        timeout=timeout,
+        headers={**headers, **get_conditional_headers(validators)},
+        **kwargs,
+    )
+    if response.status_code == STATUS_CODE_NOT_MODIFIED:
+        if logger is not None:
+            logger.info(f"Not modified {url=} for {key=}, {validators=}")
+        return None
+    validate_response(response=response, url=url, logger=logger, key=key)
+    return response
+
+
+def get_range_start(response: requests.Response) -> int | None:
+    # Content-Range looks like "bytes 100-199/200"
+    content_range = response.headers.get("Content-Range", "")
+    start = content_range.removeprefix("bytes ").partition("-")[0]
+    return int(start) if start.isdigit() else None
+
+
+def hash_file(
+    path_file: Path,
+    *,
+    hash_name: str,
+    chunk_size: int = CHUNK_SIZE,
+) -> "hashlib._Hash":
+    hash_contents = hashlib.new(hash_name, usedforsecurity=False)
+    with path_file.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            hash_contents.update(chunk)
+    return hash_contents
+
+
+def download_file(  # noqa: C901, PLR0912, PLR0913, PLR0915 - Needs all the arguments and branches
+    url: str,
+    path_file: Path,
+    *,
+    logger: Logger | None = None,
+    key: str | None = None,
+    hash_name: str = "sha256",
+    expected_hash: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_resumes: int = MAX_RESUMES,
+    timeout: int = TIMEOUT_LONG,
+    validators_previous: dict[str, str | int | None] | None = None,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to requests
+) -> str | None:
+    """Stream `url` to `path_file` in chunks of `chunk_size`, so memory use does not
+    grow with the size of the file, and return the hex digest of the contents.
+
+    If `validators_previous` is given the requests are conditional on the file having
+    changed since it was downloaded with them, and None is returned if the server
+    says it has not, without writing anything.
+
+    The chunks are written to a `.part` file next to `path_file` which is only renamed
+    to `path_file` once complete and, if `expected_hash` is given, the hashes match.
+    The validators (ETag, Last-Modified and size) of the file are kept in a
+    `.part.json` file, so an interrupted download, in this call or an earlier one, is
+    resumed with a Range request. The server only sends the remaining bytes if the
+    validators still match, otherwise the download restarts from the beginning, as it
+    does once if the range the server sends does not match the `.part` file. Once
+    complete the validators are kept in a `.http.json` file next to `path_file`, see
+    `download_file_if_modified`.
+    """
+    path_part = path_file.with_name(f"{path_file.name}.part")
+    path_part_validators = path_file.with_name(f"{path_file.name}.part.json")
+    headers = {
+        **(kwargs.pop("headers", None) or {}),
+        **get_conditional_headers(validators_previous),
+    }
+
+    hash_contents = hashlib.new(hash_name, usedforsecurity=False)
+    size_hashed = 0
+    num_resumes = 0
+    restarted = False
+    while True:
+        validators = None
+        size_part = 0
+        if path_part.exists() and path_part_validators.exists():
+            validators = json.loads(path_part_validators.read_text())
+            size_part = path_part.stat().st_size
+
+        headers_range = {}
+        if_range = validators and (validators["etag"] or validators["last_modified"])
+        if size_part and if_range:
+            headers_range = {"Range": f"bytes={size_part}-", "If-Range": if_range}
+
+        try:
+            with (
+                limit_host(url),
+                get_session().get(
+                    url,
+                    stream=True,
+                    timeout=timeout,
+                    headers={**headers, **headers_range},
+                    **kwargs,
+                ) as response,
+            ):
+                if (
+                    validators_previous is not None
+                    and response.status_code == STATUS_CODE_NOT_MODIFIED
+                ):
+                    if logger is not None:
+                        logger.info(f"Not modified {url=} for {key=}")
+                    return None
+                is_range_response = headers_range and response.status_code in {
+                    STATUS_CODE_PARTIAL_CONTENT,
+                    STATUS_CODE_RANGE_NOT_SATISFIABLE,
+                }
+                if (
+                    is_range_response
+                    and validators is not None
+                    and response.status_code == STATUS_CODE_RANGE_NOT_SATISFIABLE
+                    and validators["content_length"] == size_part
+                    and get_validators(response)["content_length"] == size_part
+                ):
+                    # Everything was downloaded before we got interrupted
+                    mode = None
+                elif (
+                    is_range_response
+                    and validators is not None
+                    and response.status_code == STATUS_CODE_PARTIAL_CONTENT
+                    and get_range_start(response) == size_part
+                    and get_validators(response)["content_length"]
+                    == validators["content_length"]
+                ):
+                    if logger is not None:
+                        logger.info(f"Resuming {url=} from {size_part=} for {key=}")
+                    mode = "ab"
+                elif is_range_response and not restarted:
+                    # The range does not match the part, or we never knew the size
+                    # of the file, so the part cannot be trusted
+                    if logger is not None:
+                        logger.warning(
+                            f"Range of {response=} for {url=} does not match "
+                            f"{size_part=}, {validators=} for {key=}, restarting",
+                        )
+                    path_part.unlink()
+                    path_part_validators.unlink()
+                    restarted = True
+                    continue
+                else:
+                    validate_response(
+                        response=response,
+                        url=url,
+                        logger=logger,
+                        key=key,
+                    )
+                    if logger is not None:
+                        logger.info(f"Streaming {url=} to {path_part=} for {key=}")
+                    mode = "wb"
+                    validators = get_validators(response)
+                    path_part_validators.write_text(json.dumps(validators))
+
+                if mode == "wb":
+                    hash_contents = hashlib.new(hash_name, usedforsecurity=False)
+                    size_hashed = 0
+                elif size_hashed != size_part:
+                    # The part was written by an earlier call so we have not hashed it
+                    hash_contents = hash_file(path_part, hash_name=hash_name)
+                    size_hashed = size_part
+
+                if mode is not None:
+                    with path_part.open(mode) as file:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            file.write(chunk)
+                            hash_contents.update(chunk)
+                            size_hashed += len(chunk)
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+        ) as error:
+            num_resumes += 1
+            if num_resumes > max_resumes:
+                raise
+            if logger is not None:
+                logger.warning(
+                    f"Interrupted downloading {url=} for {key=} at {size_hashed=}, resuming {num_resumes=}, {error=}",
+                )
+            continue
+        break
+
+    actual_hash = hash_contents.hexdigest()
+    if expected_hash is not None and expected_hash != actual_hash:
+        path_part.unlink()
+        path_part_validators.unlink()
+        msg = f"Hashes don't match for downloading from {url=}\n{expected_hash=}\n  {actual_hash}"
+        raise ValueError(
+            msg,
+        )
+
+    path_part.replace(path_file)
+    path_part_validators.replace(path_validators(path_file))
+    if logger is not None:
+        logger.info(f"Wrote {path_file=} from {url=} for {key=}, {actual_hash=}")
+    return actual_hash
+
+
+def get_validators_if_same_size(
+    url: str,
+    path_file: Path,
+    *,
+    timeout: int = TIMEOUT_LONG,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to requests
+) -> dict[str, str | int | None] | None:
+    """Get the validators of `url` from a HEAD request, if its size is the size of
+    `path_file`, which is then taken to be the same file.
+    """
+    with limit_host(url):
+        response = get_session().head(
+            url,
+            allow_redirects=True,
+            timeout=timeout,
+            **kwargs,
+        )
+    validators = get_validators(response)
+    if (
+        response.status_code != STATUS_CODE_OKAY
+        or validators["content_length"] != path_file.stat().st_size
+    ):
+        return None
+    return validators
+
+
+def download_file_if_modified(  # noqa: PLR0913 - Needs all the arguments
+    url: str,
+    path_file: Path,
+    *,
+    path_file_previous: Path | None = None,
+    logger: Logger | None = None,
+    key: str | None = None,
+    timeout: int = TIMEOUT_LONG,
+    **kwargs: Any,  # noqa: ANN401 - Passed on to download_file
+) -> bool:
+    """Download `url` to `path_file` with `download_file`, unless the file downloaded
+    before, `path_file_previous` if given otherwise `path_file`, has not changed
+    according to the validators stored next to it. Returns whether it was downloaded.
+
+    The download is a conditional request, so a changed file is only requested once.
+    A file downloaded before without validators, such as one written before they were
+    stored, is unchanged if a HEAD request gives its size, whose validators are then
+    stored next to it.
+
+    An unchanged `path_file_previous` is moved to `path_file`, so a file that is
+    republished in place upstream can be stored under the date it was checked.
+    """
+    if path_file_previous is None:
+        path_file_previous = path_file
+    validators = read_validators(path_file_previous)
+    if validators is None:
+        if path_file_previous.exists():
+            validators = get_validators_if_same_size(
+                url,
+                path_file_previous,
+                timeout=timeout,
+                **kwargs,
+            )
+        if validators is None:
+            download_file(
+                url,
+                path_file,
+                logger=logger,
+                key=key,
+                timeout=timeout,
+                **kwargs,
+            )
+            return True
+        write_validators(path_file_previous, validators)
+    elif (
+        download_file(
+            url,
+            path_file,
+            logger=logger,
+            key=key,
+            timeout=timeout,
+            validators_previous=validators,
+            **kwargs,
+        )
+        is not None
+    ):
+        return True
+
+    if logger is not None:
+        logger.info(f"Not modified {url=} since {path_file_previous=}")
+    if path_file_previous != path_file:
+        path_file_previous.replace(path_file)
+        path_validators(path_file_previous).replace(path_validators(path_file))
+    return False
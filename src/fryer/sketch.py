@@ -0,0 +1,190 @@
+"""Mergeable quantile sketches with a relative error guarantee, as in DDSketch.
+
+A value x is counted in bucket ceil(log(x) / log(gamma)), with
+gamma = (1 + relative_accuracy) / (1 - relative_accuracy), so every value in a bucket
+is within `relative_accuracy` of the bucket's representative value. Merging sketches
+is adding the counts of their buckets, so a quantile of any union of groups is
+answered from their sketches to within `relative_accuracy` of the true value.
+
+A sketch is stored as bytes, the sorted int32 bucket indices followed by the uint32
+counts of the buckets, so it fits in a polars Binary column.
+"""
+
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import polars as pl
+
+__all__ = [
+    "RELATIVE_ACCURACY",
+    "decode",
+    "encode",
+    "from_values",
+    "get_expr_bucket",
+    "merge",
+    "merge_by",
+    "quantile",
+    "sketch_by",
+]
+
+RELATIVE_ACCURACY = 0.01
+
+DTYPE_BUCKET = np.dtype("<i4")
+DTYPE_COUNT = np.dtype("<u4")
+
+
+def get_gamma(relative_accuracy: float = RELATIVE_ACCURACY) -> float:
+    if not 0 < relative_accuracy < 1:
+        msg = f"{relative_accuracy=} should be between 0 and 1"
+        raise ValueError(msg)
+    return (1 + relative_accuracy) / (1 - relative_accuracy)
+
+
+def get_expr_bucket(
+    expr: pl.Expr,
+    *,
+    relative_accuracy: float = RELATIVE_ACCURACY,
+) -> pl.Expr:
+    """Get the bucket of each value of `expr`, which is null for values that are not
+    positive as they cannot be sketched.
+    """
+    log_gamma = np.log(get_gamma(relative_accuracy))
+    return (
+        pl.when(expr > 0)
+        .then((expr.log() / log_gamma).ceil())
+        .cast(pl.Int32)
+        .alias("bucket")
+    )
+
+
+def encode(buckets: np.ndarray, counts: np.ndarray) -> bytes:
+    order = np.argsort(buckets, kind="stable")
+    return (
+        buckets[order].astype(DTYPE_BUCKET).tobytes()
+        + counts[order].astype(DTYPE_COUNT).tobytes()
+    )
+
+
+def decode(sketch: bytes) -> tuple[np.ndarray, np.ndarray]:
+    num_buckets = len(sketch) // (DTYPE_BUCKET.itemsize + DTYPE_COUNT.itemsize)
+    size_buckets = num_buckets * DTYPE_BUCKET.itemsize
+    return (
+        np.frombuffer(sketch[:size_buckets], dtype=DTYPE_BUCKET),
+        np.frombuffer(sketch[size_buckets:], dtype=DTYPE_COUNT),
+    )
+
+
+def from_values(
+    values: Iterable[float],
+    *,
+    relative_accuracy: float = RELATIVE_ACCURACY,
+) -> bytes:
+    buckets = (
+        pl.Series("value", values, dtype=pl.Float64)
+        .to_frame()
+        .select(get_expr_bucket(pl.col("value"), relative_accuracy=relative_accuracy))
+        .get_column("bucket")
+        .drop_nulls()
+        .value_counts()
+    )
+    return encode(
+        buckets.get_column("bucket").to_numpy(),
+        buckets.get_column("count").to_numpy(),
+    )
+
+
+def merge(sketches: Iterable[bytes]) -> bytes:
+    decoded = [decode(sketch) for sketch in sketches]
+    if not decoded:
+        return b""
+    buckets = np.concatenate([buckets for buckets, _ in decoded])
+    counts = np.concatenate([counts for _, counts in decoded]).astype(np.uint64)
+    buckets_unique, inverse = np.unique(buckets, return_inverse=True)
+    return encode(buckets_unique, np.bincount(inverse, weights=counts))
+
+
+def quantile(
+    sketch: bytes,
+    q: float,
+    *,
+    relative_accuracy: float = RELATIVE_ACCURACY,
+) -> float | None:
+    """Get the `q` quantile, within `relative_accuracy` of the value of rank
+    q * (count - 1) in the sketched values, or None for an empty sketch.
+    """
+    if not 0 <= q <= 1:
+        msg = f"{q=} should be between 0 and 1"
+        raise ValueError(msg)
+    buckets, counts = decode(sketch)
+    if not len(counts):
+        return None
+    cumulative = np.cumsum(counts, dtype=np.uint64)
+    rank = q * (int(cumulative[-1]) - 1)
+    index = int(np.searchsorted(cumulative, rank, side="right"))
+    gamma = get_gamma(relative_accuracy)
+    return float(2 * gamma ** int(buckets[index]) / (gamma + 1))
+
+
+def sketch_by(
+    lf: pl.LazyFrame | pl.DataFrame,
+    *,
+    value: str,
+    by: Sequence[str],
+    relative_accuracy: float = RELATIVE_ACCURACY,
+) -> pl.DataFrame:
+    """Sketch the positive values of column `value` for each group of `by`, into a
+    Binary column `sketch` alongside the `count` of values sketched.
+    """
+    counts = (
+        lf.lazy()
+        .select(
+            *by,
+            get_expr_bucket(pl.col(value), relative_accuracy=relative_accuracy),
+        )
+        .drop_nulls("bucket")
+        .group_by(*by, "bucket")
+        .len("count")
+        .group_by(by, maintain_order=True)
+        .agg("bucket", "count")
+        .sort(by)
+        .collect()
+    )
+    return counts.select(
+        *by,
+        pl.col("count").list.sum().cast(pl.UInt64),
+        pl.Series(
+            "sketch",
+            [
+                encode(np.asarray(buckets), np.asarray(counts_bucket))
+                for buckets, counts_bucket in zip(
+                    counts.get_column("bucket").to_list(),
+                    counts.get_column("count").to_list(),
+                    strict=True,
+                )
+            ],
+            dtype=pl.Binary,
+        ),
+    )
+
+
+def merge_by(
+    df: pl.LazyFrame | pl.DataFrame,
+    *,
+    by: Sequence[str],
+) -> pl.DataFrame:
+    """Merge the sketches, and sum the counts, of each group of `by`, or of every row
+    if `by` is empty.
+    """
+    exprs = [pl.col("count").sum(), pl.col("sketch")]
+    if by:
+        lf = df.lazy().group_by(by, maintain_order=True).agg(exprs).sort(by)
+    else:
+        lf = df.lazy().select(exprs[0], exprs[1].implode())
+    sketches = lf.collect()
+    return sketches.with_columns(
+        pl.Series(
+            "sketch",
+            [merge(group) for group in sketches.get_column("sketch").to_list()],
+            dtype=pl.Binary,
+        ),
+    )
@@ -5,6 +5,14 @@ from pathlib import Path
 import pytest
 
 import fryer.constants
+import fryer.requests
+
+
+@pytest.fixture(autouse=True)
+def requests_retries():
+    # Failing requests are retried once without backing off, rather than for about
+    # 30 seconds, so failing integration tests fail fast
+    fryer.requests.configure(max_retries=1, backoff_factor=0)
 
 
 @pytest.fixture
@@ -20,6 +28,8 @@ def test_env(temp_dir: Path):
         fryer.constants.FRYER_ENV_PATH_LOG: str(temp_dir),
         fryer.constants.FRYER_ENV_PATH_DATA: str(temp_dir),
         fryer.constants.FRYER_ENV_TODAY: "2022-03-14",
+        fryer.constants.FRYER_ENV_MAX_RETRIES: "2",
+        fryer.constants.FRYER_ENV_BACKOFF_FACTOR: "0.25",
     }
 
 
@@ -1,7 +1,21 @@
+import subprocess
+import sys
 from pathlib import Path
 
+import pytest
+
 import fryer.all
 
+HEAVY_MODULES = [
+    "convertbng",
+    "folium",
+    "geopandas",
+    "lxml",
+    "pyogrio",
+    "requests",
+    "tqdm",
+]
+
 
 def test_import():
     path_file = Path(__file__)
@@ -10,3 +24,28 @@ def test_import():
         module = path_module.stem
         if path_module.suffix == ".py" and module not in {"all", "__init__"}:
             assert module in fryer.all.__all__
+
+
+@pytest.mark.parametrize("module", ["fryer", "fryer.all", "fryer.data"])
+def test_import_is_lazy(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(sorted(set(sys.modules) & set({HEAVY_MODULES!r}))))"
+    )
+    completed = subprocess.run(  # noqa: S603 - Only runs the current interpreter
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert completed.stdout.strip() == ""
+
+
+@pytest.mark.parametrize("module", fryer.all.__all__)
+def test_getattr(module):
+    assert getattr(fryer.all, module).__name__ == f"fryer.{module}"
+
+
+def test_getattr_missing():
+    with pytest.raises(AttributeError, match="has no attribute"):
+        fryer.all.missing  # noqa: B018 - Accessing the attribute is the test
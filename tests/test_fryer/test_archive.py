@@ -0,0 +1,84 @@
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import polars as pl
+import pytest
+
+import fryer.archive
+
+
+@pytest.fixture
+def zip_file(temp_dir):
+    path_file = temp_dir / "test.zip"
+    with ZipFile(path_file, "w", compression=ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("a.csv", "x,y\n" + "".join(f"{i},a{i}\n" for i in range(100)))
+        zip_file.writestr("b.csv", "x,y\n100,b\n101,")
+        zip_file.writestr("c.csv", "x,y\n")
+        zip_file.writestr(
+            "d.csv",
+            "x,y\n" + "".join(f'{i},"line {i}\n""quoted""\nend"\n' for i in range(20)),
+        )
+        zip_file.writestr("e.csv", "x,y\n" + "".join(f"{i},{i}\n" for i in range(200)))
+        zip_file.writestr("f.csv", "x,y\nf,1.5\n")
+    with ZipFile(path_file) as zip_file:
+        yield zip_file
+
+
+def test_iter_csv_chunks(zip_file):
+    chunks = list(fryer.archive.iter_csv_chunks(zip_file, "a.csv", chunk_size=50))
+    assert len(chunks) > 1
+    assert all(chunk.startswith(b"x,y\n") for chunk in chunks)
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert b"".join(chunk.removeprefix(b"x,y\n") for chunk in chunks) == (
+        zip_file.read("a.csv").removeprefix(b"x,y\n")
+    )
+    # The last line has no line break
+    assert list(fryer.archive.iter_csv_chunks(zip_file, "b.csv")) == [
+        b"x,y\n100,b\n",
+        b"x,y\n101,",
+    ]
+    # A header without rows is still read as a frame with its columns
+    assert list(fryer.archive.iter_csv_chunks(zip_file, "c.csv")) == [b"x,y\n"]
+
+
+@pytest.mark.parametrize("chunk_size", [5, 50])
+def test_iter_csv_chunks_quoted_line_breaks(zip_file, chunk_size):
+    chunks = list(
+        fryer.archive.iter_csv_chunks(zip_file, "d.csv", chunk_size=chunk_size),
+    )
+    assert len(chunks) > 1
+    df = pl.concat(pl.read_csv(chunk) for chunk in chunks)
+    assert df.equals(pl.read_csv(zip_file.read("d.csv")))
+    assert df.get_column("y").to_list()[-1] == 'line 19\n"quoted"\nend'
+
+
+@pytest.mark.parametrize("chunk_size", [10, 50, fryer.archive.CHUNK_SIZE])
+def test_read_csv_members(zip_file, chunk_size):
+    df = fryer.archive.read_csv_members(
+        zip_file,
+        ["a.csv", "b.csv", "c.csv"],
+        transform=lambda df: df.with_columns(pl.col("x").cast(pl.Int64)),
+        chunk_size=chunk_size,
+    )
+    assert df.schema == {"x": pl.Int64, "y": pl.String}
+    assert df.get_column("x").to_list() == list(range(102))
+    assert df.get_column("y").to_list()[-2:] == ["b", None]
+
+
+def test_read_csv_members_infer_schema(zip_file):
+    # Inferred from the first chunk, otherwise a chunk of small integers has a
+    # different dtype from a chunk with larger ones
+    df = fryer.archive.read_csv_members(
+        zip_file,
+        ["c.csv", "e.csv"],
+        chunk_size=10,
+        infer_schema=True,
+        schema_overrides={"y": pl.Int16},
+    )
+    assert df.schema == {"x": pl.Int64, "y": pl.Int16}
+    assert df.get_column("x").to_list() == list(range(200))
+    with pytest.raises(pl.exceptions.ComputeError):
+        fryer.archive.read_csv_members(
+            zip_file,
+            ["e.csv", "f.csv"],
+            infer_schema=True,
+        )
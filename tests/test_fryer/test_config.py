@@ -25,3 +25,43 @@ def test_get(key, override, test_env, path_test_env):
 @pytest.mark.parametrize("key", ENV_KEYS)
 def test_get_integration(key):
     assert fryer.config.get(key=key) is not None
+
+
+def test_load_env_file_cached(path_test_env):
+    first = fryer.config.load_env_file(path_env=path_test_env)
+    second = fryer.config.load_env_file(path_env=path_test_env)
+    assert first is second
+
+
+def test_load_env_file_reloads_on_change(path_test_env):
+    fryer.config.load_env_file(path_env=path_test_env)
+    path_test_env.write_text(f"{path_test_env.read_text()}\nFRYER_TEST_NEW=new")
+    assert fryer.config.get(key="FRYER_TEST_NEW", path_env=path_test_env) == "new"
+
+
+def test_load_env_file_reload(path_test_env):
+    first = fryer.config.load_env_file(path_env=path_test_env)
+    second = fryer.config.load_env_file(path_env=path_test_env, reload=True)
+    assert first is not second
+    assert first == second
+
+
+def test_clear(path_test_env):
+    first = fryer.config.load_env_file(path_env=path_test_env)
+    fryer.config.clear()
+    assert fryer.config.load_env_file(path_env=path_test_env) is not first
+
+
+def test_get_falls_back_to_environ(path_test_env, monkeypatch):
+    fryer.config.load_env_file(path_env=path_test_env)
+    monkeypatch.setenv("FRYER_TEST_ENVIRON", "environ")
+    assert (
+        fryer.config.get(key="FRYER_TEST_ENVIRON", path_env=path_test_env) == "environ"
+    )
+
+
+def test_load_none_value(temp_dir):
+    path_env = temp_dir / ".env"
+    path_env.write_text("FRYER_TEST_NONE")
+    with pytest.raises(ValueError, match="Values are None for"):
+        fryer.config.load(path_env=path_env)
@@ -1,7 +1,15 @@
+import re
+from datetime import date
+from pathlib import Path
+
 import polars as pl
 import pytest
+import requests_mock
 
 import fryer.data
+import fryer.parquet
+
+URL_YEAR = re.compile(r".*/pp-(\d{4})\.csv$")
 
 
 @pytest.mark.integration
@@ -27,3 +35,633 @@ def test_read(temp_dir):
         path_data=temp_dir,
     )
     assert isinstance(df.collect(), pl.DataFrame)
+
+
+def get_csv(year):
+    return "\n".join(
+        f'"{{{year}-{i}}}","{100_000 + i}","{year}-0{i}-01 00:00","AB1 2CD","F","N",'
+        f'"L","{i}","FLAT {i}","HIGH STREET","","LONDON","CITY OF LONDON",'
+        f'"GREATER LONDON","A","A"'
+        for i in range(1, 4)
+    )
+
+
+@pytest.fixture
+def mock_years():
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            URL_YEAR,
+            text=lambda request, _: get_csv(URL_YEAR.match(request.url).group(1)),
+        )
+        yield mocker
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_write_all(max_workers, mock_years, temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    years = module.get_years(path_env=path_test_env)
+    path_existing = module.path(
+        year=years[0],
+        path_data=temp_dir,
+        path_env=path_test_env,
+        mkdir=True,
+    )
+    df_existing = module.parse(text=get_row("existing", 1, f"{years[0]:%Y}-01-15"))
+    df_existing.write_parquet(path_existing)
+
+    module.write_all(
+        max_workers=max_workers,
+        path_log=temp_dir,
+        path_data=temp_dir,
+        path_env=path_test_env,
+    )
+
+    # Years which already exist are not downloaded again
+    assert mock_years.call_count == len(years) - 1
+    assert pl.read_parquet(path_existing).equals(df_existing)
+    for year in years[1:]:
+        df = pl.read_parquet(
+            module.path(year=year, path_data=temp_dir, path_env=path_test_env),
+        )
+        assert df["date"].dt.year().unique().to_list() == [year.year]
+    assert not list(path_existing.parent.glob("*.tmp"))
+    # The year which already existed is added to the vocabulary too
+    assert module.read_vocabulary_years(
+        path_data=temp_dir,
+        path_env=path_test_env,
+    ) == [year.year for year in years]
+
+
+def test_write_refreshes_current_year(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    # The current year is 2022 in the test env
+    url = module.get_url(year=2022)
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            url,
+            [
+                {"text": get_csv(2022), "headers": {"ETag": '"etag-1"'}},
+                {"status_code": 304},
+            ],
+        )
+        module.write(year=2022, **kwargs)
+        path_file = module.path(year=2022, path_data=temp_dir, path_env=path_test_env)
+        mtime = path_file.stat().st_mtime_ns
+
+        module.write(year=2022, **kwargs)
+        assert mocker.call_count == 2
+        assert mocker.last_request.headers["If-None-Match"] == '"etag-1"'
+        assert path_file.stat().st_mtime_ns == mtime
+
+        module.write(year=2022, refresh=False, **kwargs)
+        assert mocker.call_count == 2
+
+
+def get_row(
+    id_transaction,
+    price,
+    date,
+    record_status="A",
+    property_type="F",
+    paon="1",
+    street="HIGH STREET",
+):
+    return (
+        f'"{{{id_transaction}}}","{price}","{date} 00:00","AB1 2CD","{property_type}",'
+        f'"N","L","{paon}",'
+        f'"","{street}","","LONDON","CITY OF LONDON","GREATER LONDON","A",'
+        f'"{record_status}"'
+    )
+
+
+def read_prices(year, path_data, path_env):
+    return dict(
+        pl.read_parquet(
+            fryer.data.uk_gov_hm_land_registry_price_paid.path(
+                year=year,
+                path_data=path_data,
+                path_env=path_env,
+            ),
+        )
+        .select("id_transaction", "price")
+        .sort("id_transaction")
+        .iter_rows(),
+    )
+
+
+def test_update(mock_years, temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    for year in (2021, 2022):
+        module.write(year=year, **kwargs)
+
+    url = f"{module.URL_BASE}/{module.FILENAME_MONTHLY_UPDATE}"
+    update = "\n".join(
+        [
+            get_row("2022-1", 1, "2022-01-01", "C"),
+            get_row("2021-2", 2, "2021-02-01", "D"),
+            get_row("2022-4", 4, "2022-03-01", "A"),
+            # No file for this year so it is not written
+            get_row("2019-1", 5, "2019-01-01", "A"),
+        ],
+    )
+    mock_years.get(
+        url,
+        [
+            {"text": update, "headers": {"ETag": '"etag-1"'}},
+            {"status_code": 304},
+        ],
+    )
+    module.update(**kwargs)
+
+    assert read_prices(2021, temp_dir, path_test_env) == {
+        "{2021-1}": 100_001.0,
+        "{2021-3}": 100_003.0,
+    }
+    assert read_prices(2022, temp_dir, path_test_env) == {
+        "{2022-1}": 1.0,
+        "{2022-2}": 100_002.0,
+        "{2022-3}": 100_003.0,
+        "{2022-4}": 4.0,
+    }
+    assert not module.path(
+        year=2019,
+        path_data=temp_dir,
+        path_env=path_test_env,
+    ).exists()
+
+    # Not modified so nothing is applied again
+    mtime = module.path(year=2022, path_data=temp_dir, path_env=path_test_env).stat()
+    module.update(**kwargs)
+    assert mock_years.last_request.headers["If-None-Match"] == '"etag-1"'
+    assert (
+        module.path(year=2022, path_data=temp_dir, path_env=path_test_env).stat()
+        == mtime
+    )
+
+
+def test_update_across_years(mock_years, temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    for year in (2021, 2022):
+        module.write(year=year, **kwargs)
+
+    url = f"{module.URL_BASE}/{module.FILENAME_MONTHLY_UPDATE}"
+    update = "\n".join(
+        [
+            # Moved to the next year
+            get_row("2021-3", 3, "2022-01-01", "C"),
+            # Deleted with a date in another year
+            get_row("2022-2", 2, "2021-06-01", "D"),
+        ],
+    )
+    mock_years.get(url, text=update, headers={"ETag": '"etag-1"'})
+    module.update(**kwargs)
+
+    assert read_prices(2021, temp_dir, path_test_env) == {
+        "{2021-1}": 100_001.0,
+        "{2021-2}": 100_002.0,
+    }
+    assert read_prices(2022, temp_dir, path_test_env) == {
+        "{2021-3}": 3.0,
+        "{2022-1}": 100_001.0,
+        "{2022-3}": 100_003.0,
+    }
+
+
+@pytest.fixture
+def path_data_years(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    for year in (2020, 2021, 2022):
+        df = module.parse(
+            text="\n".join(
+                get_row(
+                    f"{year}-{month}-{property_type}",
+                    1,
+                    f"{year}-{month:02d}-15",
+                    property_type=property_type,
+                )
+                for month in range(1, 13)
+                for property_type in ("D", "F")
+            ),
+        )
+        df.write_parquet(
+            module.path(
+                year=year,
+                path_data=temp_dir,
+                path_env=path_test_env,
+                mkdir=True,
+            ),
+        )
+    return temp_dir
+
+
+@pytest.mark.parametrize(
+    ("path_file", "expected"),
+    [
+        ("2021-01-01.parquet", {"year": "2021"}),
+        ("year=2021/month=03/0.parquet", {"year": "2021", "month": "03"}),
+        (
+            "year=2021/month=03/property_type=detached/0.parquet",
+            {"year": "2021", "month": "03", "property_type": "detached"},
+        ),
+    ],
+)
+def test_get_partition(path_file, expected):
+    actual = fryer.data.uk_gov_hm_land_registry_price_paid.get_partition(
+        Path(path_file),
+    )
+    assert actual == expected
+
+
+@pytest.mark.parametrize("by_property_type", [True, False])
+def test_read_partitioned(by_property_type, path_data_years, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {
+        "path_log": path_data_years,
+        "path_data": path_data_years,
+        "path_env": path_test_env,
+    }
+    module.write_partitioned_all(by_property_type=by_property_type, **kwargs)
+    path_key = module.path_partitioned(
+        path_data=path_data_years,
+        path_env=path_test_env,
+    )
+    assert len(list(path_key.glob("year=*/**/*.parquet"))) == (
+        3 * 12 * (2 if by_property_type else 1)
+    )
+    df_empty = module.read(
+        partitioned=True,
+        date_from="2030-01-01",
+        **kwargs,
+    ).collect()
+    assert df_empty.is_empty()
+    assert df_empty.schema == module.read(**kwargs).collect_schema()
+
+    # A write interrupted after moving the old year aside is written over
+    path_year_old = path_key / ".year=2021.old"
+    path_year_old.mkdir()
+    module.write_partitioned(
+        year=2021,
+        by_property_type=by_property_type,
+        **kwargs,
+    )
+    assert not path_year_old.exists()
+
+    # Partitions outside the query are pruned so are never opened
+    for path_file in (path_key / "year=2020").glob("**/*.parquet"):
+        path_file.write_bytes(b"not parquet")
+
+    query = {
+        "date_from": "2021-06-01",
+        "date_to": "2022-03-31",
+        "property_types": ["flats_or_maisonettes"],
+    }
+    df = module.read(partitioned=True, **query, **kwargs).collect()
+    expected = module.read(**query, **kwargs).collect()
+    assert df.sort("id_transaction").equals(expected.sort("id_transaction"))
+    assert df["date"].min() == date(2021, 6, 15)
+    assert df["date"].max() == date(2022, 3, 15)
+    assert df["property_type"].unique().to_list() == ["flats_or_maisonettes"]
+    assert df.height == 7 + 3
+
+
+def test_read_compact(path_data_years, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {
+        "path_log": path_data_years,
+        "path_data": path_data_years,
+        "path_env": path_test_env,
+    }
+    # Years written before the vocabulary existed are added by the writers, not read
+    with pytest.raises(ValueError, match="does not cover"):
+        module.read(compact=True, **kwargs)
+    assert not module.path_vocabulary(
+        column="street",
+        path_data=path_data_years,
+        path_env=path_test_env,
+    ).exists()
+    module.write_vocabulary(**kwargs)
+    df = module.read(compact=True, **kwargs).collect()
+    expected = module.read(**kwargs).collect()
+    for column in module.COLUMNS_VOCABULARY:
+        assert isinstance(df.schema[column], pl.Enum)
+    assert df.with_columns(
+        pl.col(module.COLUMNS_VOCABULARY).cast(pl.String),
+    ).equals(expected)
+
+    # New values are added to the end so the existing codes do not change
+    module.update_vocabulary(
+        expected.head(1).with_columns(street=pl.lit("ACACIA AVENUE")),
+        **kwargs,
+    )
+    vocabulary = module.read_vocabulary(
+        path_data=path_data_years,
+        path_env=path_test_env,
+    )
+    assert vocabulary["street"].to_list() == ["HIGH STREET", "ACACIA AVENUE"]
+
+    # Years read separately have the same dtypes so can be concatenated
+    df_concat = pl.concat(
+        [
+            module.read(date_to="2020-12-31", compact=True, **kwargs).collect(),
+            module.read(date_from="2021-01-01", compact=True, **kwargs).collect(),
+        ],
+    )
+    assert df_concat.height == df.height
+
+
+def test_read_compact_vocabulary_years(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {
+        "path_log": temp_dir,
+        "path_data": temp_dir,
+        "path_env": path_test_env,
+    }
+    write_year(
+        2020,
+        [get_row("a", 1, "2020-01-15", street="HIGH STREET")],
+        temp_dir,
+        path_test_env,
+    )
+    df_2021 = module.parse(
+        text=get_row("b", 2, "2021-01-15", street="ACACIA AVENUE"),
+    )
+    # The vocabulary is created from a later year than one already written
+    module.update_vocabulary(df_2021, years=[2021], **kwargs)
+    write_year(
+        2021,
+        [get_row("b", 2, "2021-01-15", street="ACACIA AVENUE")],
+        temp_dir,
+        path_test_env,
+    )
+    assert module.read_vocabulary_years(
+        path_data=temp_dir,
+        path_env=path_test_env,
+    ) == [2021]
+
+    with pytest.raises(ValueError, match=r"years_missing=\[2020\]"):
+        module.read(compact=True, **kwargs)
+    module.write_vocabulary(**kwargs)
+    df = module.read(compact=True, **kwargs).collect()
+    assert isinstance(df.schema["street"], pl.Enum)
+    assert df.sort("date").get_column("street").cast(pl.String).to_list() == [
+        "HIGH STREET",
+        "ACACIA AVENUE",
+    ]
+    assert module.read_vocabulary_years(
+        path_data=temp_dir,
+        path_env=path_test_env,
+    ) == [2020, 2021]
+    vocabulary = module.read_vocabulary(path_data=temp_dir, path_env=path_test_env)
+    assert vocabulary["street"].to_list() == ["ACACIA AVENUE", "HIGH STREET"]
+
+
+def test_read_partitioned_empty(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    write_year(2021, [get_row("a", 1, "2021-01-15")], temp_dir, path_test_env)
+    module.write_vocabulary(**kwargs)
+    expected = module.read(**kwargs).collect_schema()
+    # Only the yearly files exist
+    for compact in (False, True):
+        df = module.read(partitioned=True, compact=compact, **kwargs).collect()
+        assert df.is_empty()
+        assert df.columns == expected.names()
+    assert df.schema["street"] == pl.Enum(["HIGH STREET"])
+
+    # Only the partitioned files exist
+    module.write_partitioned(year=2021, **kwargs)
+    module.path(year=2021, path_data=temp_dir, path_env=path_test_env).unlink()
+    df = module.read(partitioned=True, date_from="2030-01-01", **kwargs).collect()
+    assert df.is_empty()
+    assert df.schema == expected
+
+
+def write_year(year, rows, path_data, path_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    module.parse(text="\n".join(rows)).write_parquet(
+        module.path(year=year, path_data=path_data, path_env=path_env, mkdir=True),
+    )
+
+
+def test_write_property_index(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    kwargs_read = {"path_data": temp_dir, "path_env": path_test_env}
+    write_year(
+        2020,
+        [
+            get_row("a-2020", 100, "2020-01-15", paon="1"),
+            get_row("b-2020", 200, "2020-02-15", paon="2"),
+        ],
+        temp_dir,
+        path_test_env,
+    )
+    write_year(
+        2021,
+        [
+            # The same property as a-2020 once normalised
+            get_row("a-2021", 150, "2021-03-15", paon=" 1", street="high  street"),
+            get_row("c-2021", 300, "2021-04-15", paon="3"),
+        ],
+        temp_dir,
+        path_test_env,
+    )
+    module.write_property_index_all(**kwargs)
+
+    properties = module.read_properties(**kwargs_read).collect()
+    assert properties.to_dict(as_series=False) == {
+        "property_id": [0, 1, 2],
+        "address": [
+            "AB1 2CD|1||HIGH STREET",
+            "AB1 2CD|2||HIGH STREET",
+            "AB1 2CD|3||HIGH STREET",
+        ],
+    }
+    sale_pairs = module.read_sale_pairs(**kwargs_read).collect()
+    assert sale_pairs.rows() == [
+        (0, date(2020, 1, 15), 100.0, date(2021, 3, 15), 150.0),
+    ]
+
+    # A new year only adds properties and pairs
+    write_year(
+        2022,
+        [
+            get_row("b-2022", 250, "2022-01-15", paon="2"),
+            get_row("d-2022", 400, "2022-02-15", paon="4"),
+        ],
+        temp_dir,
+        path_test_env,
+    )
+    module.write_property_index(year=2022, **kwargs)
+    properties_new = module.read_properties(**kwargs_read).collect()
+    assert properties_new.head(3).equals(properties)
+    assert properties_new["property_id"].to_list() == [0, 1, 2, 3]
+    assert module.read_sale_pairs(**kwargs_read).collect().rows() == [
+        (0, date(2020, 1, 15), 100.0, date(2021, 3, 15), 150.0),
+        (1, date(2020, 2, 15), 200.0, date(2022, 1, 15), 250.0),
+    ]
+
+    # A year written again with a sale removed removes its pair
+    write_year(
+        2021,
+        [get_row("c-2021", 300, "2021-04-15", paon="3")],
+        temp_dir,
+        path_test_env,
+    )
+    module.write_property_index(year=2021, **kwargs)
+    assert module.read_sale_pairs(**kwargs_read).collect().rows() == [
+        (1, date(2020, 2, 15), 200.0, date(2022, 1, 15), 250.0),
+    ]
+    assert module.read_sales(**kwargs_read).collect().height == 5
+
+
+def test_read_aggregates(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs_read = {"path_data": temp_dir, "path_env": path_test_env}
+    # No aggregates have been written yet
+    df_empty = module.read_aggregates(level="sector", **kwargs_read).collect()
+    assert df_empty.is_empty()
+    assert df_empty.columns == ["sector", *module.SCHEMA_AGGREGATES]
+
+    df = module.parse(
+        text="\n".join(
+            [
+                get_row("1", 100, "2021-01-15", property_type="F"),
+                get_row("2", 300, "2021-01-16", property_type="F"),
+                get_row("3", 200, "2021-01-17", property_type="F"),
+                get_row("4", 400, "2021-02-15", property_type="D"),
+                get_row("5", 500, "2021-01-15", property_type="F"),
+            ],
+        ),
+    ).with_columns(
+        postcode=pl.Series(["SW1A 1AA", "SW1A 1AB", "SW1A 2AA", "SW2 1AA", None]),
+    )
+    df.write_parquet(module.path(year=2021, mkdir=True, **kwargs_read))
+    module.write_aggregates_all(path_log=temp_dir, **kwargs_read)
+
+    columns = ["month", "property_type", "count", "mean_price", "median_price"]
+    january = date(2021, 1, 1)
+    february = date(2021, 2, 1)
+    assert module.read_aggregates(level="district", **kwargs_read).select(
+        "district",
+        *columns,
+    ).collect().rows() == [
+        ("SW1A", january, "flats_or_maisonettes", 3, 200.0, 200.0),
+        ("SW2", february, "detached", 1, 400.0, 400.0),
+    ]
+    assert module.read_aggregates(level="sector", **kwargs_read).select(
+        "sector",
+        "count",
+    ).collect().rows() == [("SW1A 1", 2), ("SW1A 2", 1), ("SW2 1", 1)]
+    assert module.read_aggregates(
+        level="area",
+        property_types=["detached"],
+        **kwargs_read,
+    ).select("area", "count").collect().rows() == [("SW", 1)]
+    assert module.read_aggregates(
+        level="sector",
+        date_from="2021-02-01",
+        geographies=["SW2 1"],
+        **kwargs_read,
+    ).select("sector", "count").collect().rows() == [("SW2 1", 1)]
+    df_empty = module.read_aggregates(date_from="2022-01-01", **kwargs_read)
+    assert df_empty.collect().is_empty()
+    assert df_empty.collect_schema() == (
+        module.read_aggregates(**kwargs_read).collect().schema
+    )
+
+    with pytest.raises(ValueError, match="should be one of"):
+        module.read_aggregates(level="region", **kwargs_read)
+
+
+def test_read_price_quantiles(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs_read = {"path_data": temp_dir, "path_env": path_test_env}
+    # No sketches have been written yet
+    df_empty = module.read_price_quantiles(**kwargs_read)
+    assert df_empty.is_empty()
+    assert df_empty.columns == ["area", "count", "quantile_0.5"]
+
+    for year, rows in [
+        (
+            2020,
+            [
+                get_row("1", 100, "2020-12-15", property_type="F"),
+                get_row("2", 1_000, "2020-12-16", property_type="D"),
+            ],
+        ),
+        (
+            2021,
+            [
+                get_row("3", 300, "2021-01-15", property_type="F"),
+                get_row("4", 200, "2021-02-16", property_type="F"),
+                get_row("5", 400, "2021-02-17", property_type="D"),
+            ],
+        ),
+    ]:
+        module.parse(text="\n".join(rows)).write_parquet(
+            module.path(year=year, mkdir=True, **kwargs_read),
+        )
+    module.write_sketches_all(path_log=temp_dir, **kwargs_read)
+    assert (
+        pl.read_parquet(module.path_sketches(year=2021, **kwargs_read)).schema
+        == module.SCHEMA_SKETCHES
+    )
+
+    df = module.read_price_quantiles(quantiles=[0, 0.5, 1], **kwargs_read)
+    assert df.select("area", "count").rows() == [("AB", 5)]
+    assert df.row(0)[2:] == pytest.approx([100, 300, 1_000], rel=0.01)
+
+    df = module.read_price_quantiles(
+        by=["property_type"],
+        date_from="2021-01-01",
+        property_types=["flats_or_maisonettes"],
+        **kwargs_read,
+    )
+    assert df.select("property_type", "count").rows() == [
+        ("flats_or_maisonettes", 2),
+    ]
+    assert df.get_column("quantile_0.5").item() == pytest.approx(200, rel=0.01)
+
+    df = module.read_price_quantiles(by=[], date_to="2020-12-31", **kwargs_read)
+    assert df.get_column("count").to_list() == [2]
+    assert module.read_price_quantiles(areas=["SW"], **kwargs_read).is_empty()
+
+    with pytest.raises(ValueError, match="should only be of"):
+        module.read_price_quantiles(by=["district"], **kwargs_read)
+
+
+def test_lookup_postcodes(temp_dir, path_test_env):
+    module = fryer.data.uk_gov_hm_land_registry_price_paid
+    kwargs_read = {"path_data": temp_dir, "path_env": path_test_env}
+    # No years have been written yet
+    df = module.lookup_postcodes(["SW1A 1AA"], path_log=temp_dir, **kwargs_read)
+    assert df.is_empty()
+    assert df.schema == module.get_schema()
+
+    for year, postcodes in [(2020, ["SW1A 1AA", "M1 1AE"]), (2021, ["SW1A 1AA"])]:
+        df = module.parse(
+            text="\n".join(
+                get_row(f"{year}-{i}", 100, f"{year}-01-15")
+                for i in range(len(postcodes))
+            ),
+        ).with_columns(postcode=pl.Series(postcodes))
+        fryer.parquet.write(
+            df,
+            module.path(year=year, mkdir=True, **kwargs_read),
+            profile=module.WRITE_PROFILE,
+        )
+
+    df = module.lookup_postcodes(
+        ["SW1A 1AA", "EH1 1YZ"], path_log=temp_dir, **kwargs_read
+    )
+    assert df.select("id_transaction", "postcode").sort("id_transaction").rows() == [
+        ("{2020-0}", "SW1A 1AA"),
+        ("{2021-0}", "SW1A 1AA"),
+    ]
+    assert module.lookup_postcodes(
+        ["EH1 1YZ"], path_log=temp_dir, **kwargs_read
+    ).is_empty()
@@ -1,7 +1,13 @@
+import json
+import re
+
 import pytest
+import requests_mock
 
 import fryer.data
 
+URL_CHUNK = re.compile(r".*BETWEEN\+(\d+)\+AND\+(\d+)&f=geojson$")
+
 
 @pytest.mark.integration
 def test_get_all_services_available_online():
@@ -43,3 +49,94 @@ def test_read_raw(temp_dir):
         path_log=temp_dir,
     )
     assert len(gdf) == 4
+
+
+def get_features(request, _):
+    start, end = URL_CHUNK.match(request.url).groups()
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": i, "geometry": None, "properties": {"FID": i}}
+            for i in range(int(start), int(end) + 1)
+        ],
+    }
+
+
+@pytest.fixture
+def mock_server():
+    boundaries_type = fryer.data.uk_gov_ons_geo.BoundariesType.LAD_MAY_2024_UK_BFC
+    url_server = f"{fryer.data.uk_gov_ons_geo.URL_SERVICES}/{boundaries_type.data.url_key}/FeatureServer/0"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(f"{url_server}?f=json", json={"objectIdField": "FID"})
+        mocker.get(
+            re.compile(f"{re.escape(url_server)}/query.*returnCountOnly=true.*"),
+            json={"count": 120},
+        )
+        chunk = mocker.get(URL_CHUNK, json=get_features)
+        yield boundaries_type, chunk
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_write_raw_resumes(max_workers, mock_server, temp_dir):
+    boundaries_type, mock_chunk = mock_server
+    path = fryer.data.uk_gov_ons_geo.path_raw(
+        boundaries_type=boundaries_type,
+        path_data=temp_dir,
+    )
+    path.parent.mkdir(parents=True)
+    # A complete chunk from an earlier run and one that was interrupted mid write
+    fryer.data.uk_gov_ons_geo.write_chunk(
+        url=f"{fryer.data.uk_gov_ons_geo.URL_SERVICES}/query?BETWEEN+1+AND+50&f=geojson",
+        path_chunk=path.with_stem(path.stem.replace("*", "0")),
+    )
+    path.with_stem(path.stem.replace("*", "1")).write_text('{"type": "Feat')
+    assert mock_chunk.call_count == 1
+
+    fryer.data.uk_gov_ons_geo.write_raw(
+        boundaries_type=boundaries_type,
+        max_workers=max_workers,
+        path_log=temp_dir,
+        path_data=temp_dir,
+    )
+
+    # Only the interrupted and missing chunks are downloaded
+    assert mock_chunk.call_count == 1 + 2
+    manifest = json.loads((path.parent / "complete").read_text())
+    assert manifest["count"] == 120
+    assert sorted(manifest["chunks"]) == [
+        path.with_stem(path.stem.replace("*", str(chunk))).name for chunk in range(3)
+    ]
+    ids = [
+        feature["id"]
+        for path_chunk in sorted(path.parent.glob(path.name))
+        for feature in json.loads(path_chunk.read_text())["features"]
+    ]
+    assert ids == list(range(1, 121))
+
+
+def test_write_raw_verifies_manifest(mock_server, temp_dir):
+    boundaries_type, mock_chunk = mock_server
+    kwargs = {"boundaries_type": boundaries_type, "path_log": temp_dir}
+    path = fryer.data.uk_gov_ons_geo.path_raw(
+        boundaries_type=boundaries_type,
+        path_data=temp_dir,
+    )
+    fryer.data.uk_gov_ons_geo.write_raw(path_data=temp_dir, **kwargs)
+    assert mock_chunk.call_count == 3
+    paths_chunk = sorted(path.parent.glob(path.name))
+    contents = paths_chunk[1].read_text()
+
+    # A chunk left by an earlier run with more chunks is deleted without downloading
+    path_chunk_extra = path.with_stem(path.stem.replace("*", "3"))
+    path_chunk_extra.write_text(contents)
+    fryer.data.uk_gov_ons_geo.path_hash_chunk(path_chunk_extra).write_text("hash")
+    fryer.data.uk_gov_ons_geo.write_raw(path_data=temp_dir, **kwargs)
+    assert mock_chunk.call_count == 3
+    assert sorted(path.parent.glob(path.name)) == paths_chunk
+    assert not fryer.data.uk_gov_ons_geo.path_hash_chunk(path_chunk_extra).exists()
+
+    # A chunk which does not match the manifest is downloaded again
+    paths_chunk[1].write_text('{"type": "Feat')
+    fryer.data.uk_gov_ons_geo.write_raw(path_data=temp_dir, **kwargs)
+    assert mock_chunk.call_count == 3 + 1
+    assert paths_chunk[1].read_text() == contents
@@ -1,6 +1,9 @@
+import json
 from pathlib import Path
+from zipfile import ZipFile
 
 import pandas as pd
+import polars as pl
 import pytest
 
 import fryer.data
@@ -74,7 +77,8 @@ def test_get_path_file_raw(path_key, date_start, date_end, expected, path_test_e
 def test_write_raw_all(temp_dir):
     fryer.data.uk_police_crime_data.write_raw_all(path_log=temp_dir, path_data=temp_dir)
     assert (
-        len(list((temp_dir / fryer.data.uk_police_crime_data.KEY_RAW).iterdir())) == 5
+        len(list((temp_dir / fryer.data.uk_police_crime_data.KEY_RAW).glob("*.zip")))
+        == 4
     )
 
 
@@ -96,3 +100,464 @@ def test_read_street():
     df = fryer.data.uk_police_crime_data.read_street()
     assert not df.head().collect().is_empty()
     assert not df.tail().collect().is_empty()
+
+
+COLUMNS_STREET = [
+    "Crime ID",
+    "Month",
+    "Reported by",
+    "Falls within",
+    "Longitude",
+    "Latitude",
+    "Location",
+    "LSOA code",
+    "LSOA name",
+    "Crime type",
+    "Last outcome category",
+    "Context",
+]
+
+
+def get_street_csv(month: str, force: str, num_rows: int) -> str:
+    rows = [
+        f"id-{month}-{i},{month},{force},{force},{-0.1 + i / 20},51.5,On or near Street,"
+        f"E0100000{i},Westminster 00{i},Burglary,Under investigation,"
+        for i in range(num_rows)
+    ]
+    return "\n".join([",".join(COLUMNS_STREET), *rows])
+
+
+COLUMNS_OUTCOMES = [*COLUMNS_STREET[:9], "Outcome type"]
+COLUMNS_STOP_AND_SEARCH = [
+    "Type",
+    "Date",
+    "Part of a policing operation",
+    "Policing operation",
+    "Latitude",
+    "Longitude",
+    "Gender",
+    "Age range",
+    "Self-defined ethnicity",
+    "Officer-defined ethnicity",
+    "Legislation",
+    "Object of search",
+    "Outcome",
+    "Outcome linked to object of search",
+    "Removal of more than just outer clothing",
+]
+
+
+def get_outcomes_csv(month: str, force: str, ids_crime: list[str]) -> str:
+    rows = [
+        f"{id_crime},{month},{force},{force},-0.1,51.5,On or near Street,"
+        "E01000000,Westminster 000,Investigation complete"
+        for id_crime in ids_crime
+    ]
+    return "\n".join([",".join(COLUMNS_OUTCOMES), *rows])
+
+
+def get_stop_and_search_csv(month: str) -> str:
+    rows = [
+        (
+            f"Person search,{month}-15T10:30:00+00:00,False,,51.5,-0.1,Male,18-24,,"
+            "White,Misuse of Drugs Act 1971 (section 23),Controlled drugs,"
+            "A no further action disposal,False,"
+        ),
+        (
+            f"Vehicle search,{month}-16T23:00:00+01:00,True,Operation X,,,,,,,,,"
+            "Arrest,True,True"
+        ),
+    ]
+    return "\n".join([",".join(COLUMNS_STOP_AND_SEARCH), *rows])
+
+
+def write_archive(path_raw: Path, months: list[str]) -> None:
+    """Write an archive whose outcomes of each month are of a crime of the month, a
+    crime of the first month and an unknown crime.
+    """
+    path_raw.parent.mkdir(parents=True, exist_ok=True)
+    with ZipFile(path_raw, "w") as zip_file:
+        for month in months:
+            for force, num_rows in [
+                ("Metropolitan Police Service", 2),
+                ("City of London Police", 1),
+            ]:
+                name = force.lower().replace(" ", "-")
+                zip_file.writestr(
+                    f"{month}/{month}-{name}-street.csv",
+                    get_street_csv(month, force, num_rows),
+                )
+                zip_file.writestr(
+                    f"{month}/{month}-{name}-outcomes.csv",
+                    get_outcomes_csv(
+                        month,
+                        force,
+                        [f"id-{month}-0", f"id-{months[0]}-1", "id-unknown"],
+                    ),
+                )
+            zip_file.writestr(
+                f"{month}/{month}-metropolitan-stop-and-search.csv",
+                get_stop_and_search_csv(month),
+            )
+
+
+def test_write_street_archive(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    path_raw = temp_dir / module.KEY_RAW / "2020-05-01_2023-04-01.zip"
+    write_archive(path_raw, ["2021-01", "2021-02"])
+    with ZipFile(path_raw) as zip_file:
+        index = module.index_members(zip_file)
+        assert {
+            month: members_month["street"] for month, members_month in index.items()
+        } == {
+            "2021-01": [
+                "2021-01/2021-01-metropolitan-police-service-street.csv",
+                "2021-01/2021-01-city-of-london-police-street.csv",
+            ],
+            "2021-02": [
+                "2021-02/2021-02-metropolitan-police-service-street.csv",
+                "2021-02/2021-02-city-of-london-police-street.csv",
+            ],
+        }
+        assert index["2021-01"]["stop-and-search"] == [
+            "2021-01/2021-01-metropolitan-stop-and-search.csv",
+        ]
+
+    module.write_street(month="2021-01-01", path_data_raw=temp_dir, **kwargs)
+    path_january = module.path(month="2021-01-01", path_data=temp_dir)
+    path_february = module.path(month="2021-02-01", path_data=temp_dir)
+    assert path_january.exists()
+    assert not path_february.exists()
+    mtime_january = path_january.stat().st_mtime_ns
+
+    months = [pd.Timestamp("2021-01-01"), pd.Timestamp("2021-02-01")]
+    module.write_street_archive(path_raw=path_raw, months=months, **kwargs)
+    assert path_january.stat().st_mtime_ns == mtime_january
+    df = module.read_street(**kwargs).collect().sort("id_crime")
+    assert df.get_column("id_crime").to_list() == [
+        "id-2021-01-0",
+        "id-2021-01-0",
+        "id-2021-01-1",
+        "id-2021-02-0",
+        "id-2021-02-0",
+        "id-2021-02-1",
+    ]
+    assert set(df.get_column("force_reported_by").cast(pl.String)) == {
+        "metropolitan_police_service",
+        "city_of_london_police",
+    }
+
+
+@pytest.mark.parametrize("max_memory_mb", [None, 1e-6])
+def test_write_street_archive_parallel(max_memory_mb, temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    path_raw = temp_dir / module.KEY_RAW / "2020-05-01_2023-04-01.zip"
+    write_archive(path_raw, ["2021-01", "2021-02", "2021-03"])
+    months = [pd.Timestamp(f"2021-0{i}-01") for i in range(1, 5)]
+    kwargs_serial = {"path_log": temp_dir, "path_data": temp_dir / "serial"}
+    kwargs_parallel = {"path_log": temp_dir, "path_data": temp_dir / "parallel"}
+    module.write_street_archive(
+        path_raw=path_raw,
+        months=months,
+        path_env=path_test_env,
+        **kwargs_serial,
+    )
+    module.write_street_archive_parallel(
+        path_raw=path_raw,
+        months=months,
+        max_workers=2,
+        max_memory_mb=max_memory_mb,
+        path_env=path_test_env,
+        **kwargs_parallel,
+    )
+
+    for month in months[:3]:
+        assert pl.read_parquet(
+            module.path(month=month, path_data=temp_dir / "parallel"),
+        ).equals(
+            pl.read_parquet(module.path(month=month, path_data=temp_dir / "serial")),
+        )
+    assert not module.path(month=months[3], path_data=temp_dir / "parallel").exists()
+
+
+def test_read_street_bbox_radius(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    path_raw = temp_dir / module.KEY_RAW / "2020-05-01_2023-04-01.zip"
+    write_archive(path_raw, ["2021-01", "2021-02"])
+    months = [pd.Timestamp("2021-01-01"), pd.Timestamp("2021-02-01")]
+    module.write_street_archive(path_raw=path_raw, months=months, **kwargs)
+
+    df = pl.read_parquet(module.path(month=months[0], path_data=temp_dir))
+    assert df.get_column("cell").is_sorted()
+    assert df.get_column("cell").n_unique() == 2  # Two locations
+
+    df = module.read_street(bbox=(-0.11, 51.49, -0.09, 51.51), **kwargs).collect()
+    assert df.get_column("id_crime").sort().to_list() == [
+        "id-2021-01-0",
+        "id-2021-01-0",
+        "id-2021-02-0",
+        "id-2021-02-0",
+    ]
+    # The second location is about 3.5km east of the first
+    df = module.read_street(radius=(-0.05, 51.5, 1_000), **kwargs).collect()
+    assert df.get_column("id_crime").to_list() == ["id-2021-01-1", "id-2021-02-1"]
+    df = module.read_street(radius=(-0.1, 51.5, 5_000), **kwargs).collect()
+    assert len(df) == 6  # Every crime
+    df = module.read_street(bbox=(1.0, 52.0, 1.1, 52.1), **kwargs).collect()
+    assert df.is_empty()
+
+
+def test_read_counts(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    path_key_raw = temp_dir / module.KEY_RAW
+    write_archive(
+        path_key_raw / "2020-05-01_2023-04-01.zip",
+        ["2021-01", "2021-02", "2021-03"],
+    )
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    path_file = module.path_counts(month="2021-01-01", path_data=temp_dir)
+    assert path_file.exists()
+
+    df = module.read_counts(path_data=temp_dir).collect()
+    assert df.schema == pl.Schema(module.SCHEMA_COUNTS)
+    # Two crimes in the first area and one in the second each month
+    assert df.filter(
+        pl.col("lower_layer_super_output_area_code") == "E01000000",
+    ).sort("month").select("count", "count_3mo", "count_12mo").rows() == [
+        (2, 2, 2),
+        (2, 4, 4),
+        (2, 6, 6),
+    ]
+
+    df = module.read_counts(
+        date_from="2021-02-01",
+        date_to="2021-02-28",
+        crime_types=["burglary"],
+        lower_layer_super_output_area_codes=["E01000001"],
+        path_data=temp_dir,
+    ).collect()
+    assert df.select("month", "count", "count_3mo").rows() == [
+        (pd.Timestamp("2021-02-01").date(), 1, 2),
+    ]
+    assert (
+        module.read_counts(
+            crime_types=["robbery"],
+            path_data=temp_dir,
+        )
+        .collect()
+        .is_empty()
+    )
+
+    # Counts missing for a month which is not written again are written, and so are
+    # the rolling counts of the months after it
+    path_file.unlink()
+    path_file_march = module.path_counts(month="2021-03-01", path_data=temp_dir)
+    mtime_march = path_file_march.stat().st_mtime_ns
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    assert path_file.exists()
+    assert path_file_march.stat().st_mtime_ns != mtime_march
+
+
+def test_read_counts_empty(temp_dir):
+    module = fryer.data.uk_police_crime_data
+    df = module.read_counts(path_data=temp_dir).collect()
+    assert df.is_empty()
+    assert df.schema == pl.Schema(module.SCHEMA_COUNTS)
+
+
+def test_write_counts_absent(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    write_archive(
+        temp_dir / module.KEY_RAW / "2020-05-01_2023-04-01.zip",
+        ["2021-01", "2021-02", "2021-03"],
+    )
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    # The second area has no crimes in the latest month
+    path_file_march = module.path(month="2021-03-01", path_data=temp_dir)
+    pl.read_parquet(path_file_march).filter(
+        pl.col("lower_layer_super_output_area_code") != "E01000001",
+    ).write_parquet(path_file_march)
+    module.write_counts(month="2021-03-01", **kwargs)
+
+    df = module.read_counts(date_from="2021-03-01", path_data=temp_dir).collect()
+    assert df.sort("lower_layer_super_output_area_code").select(
+        "lower_layer_super_output_area_code",
+        "count",
+        "count_3mo",
+        "count_12mo",
+    ).rows() == [
+        ("E01000000", 2, 6, 6),
+        ("E01000001", 0, 2, 2),
+    ]
+
+
+def test_write_outcomes_stop_and_search(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    write_archive(
+        temp_dir / module.KEY_RAW / "2020-05-01_2023-04-01.zip",
+        ["2021-01", "2021-02"],
+    )
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+
+    df_street = module.read_street(**kwargs).collect()
+    df_crime_keys = df_street.select("id_crime", "crime_key").unique()
+    assert df_crime_keys.get_column("crime_key").n_unique() == len(df_crime_keys)
+    assert df_crime_keys.sort("crime_key").get_column("id_crime").to_list() == [
+        "id-2021-01-0",
+        "id-2021-01-1",
+        "id-2021-02-0",
+        "id-2021-02-1",
+    ]
+
+    df_outcomes = module.read_outcomes(**kwargs).collect()
+    assert len(df_outcomes) == 12  # 3 outcomes of 2 forces in 2 months
+    assert df_outcomes.filter(pl.col("crime_key").is_null()).get_column(
+        "id_crime",
+    ).unique().to_list() == ["id-unknown"]
+    # The outcomes of February of crimes of January have the keys of January
+    df_joined = df_outcomes.join(
+        df_crime_keys.rename({"id_crime": "id_crime_street"}),
+        on="crime_key",
+    )
+    assert len(df_joined) == 8  # The outcomes of known crimes
+    assert (
+        df_joined.get_column("id_crime") == df_joined.get_column("id_crime_street")
+    ).all()
+    path_file_outcomes = module.path(
+        key=module.KEY_OUTCOMES,
+        month="2021-02-01",
+        path_data=temp_dir,
+    )
+    assert (
+        pl.read_parquet(path_file_outcomes)
+        .get_column("crime_key")
+        .is_sorted(nulls_last=True)
+    )
+
+    df_stop_and_search = (
+        module.read_stop_and_search(**kwargs).collect().sort("datetime")
+    )
+    assert df_stop_and_search.height == 4  # 2 searches in 2 months
+    assert set(df_stop_and_search.get_column("force")) == {"metropolitan"}
+    assert df_stop_and_search.row(1, named=True) | {"datetime_download": None} == {
+        "type": "Vehicle search",
+        "datetime": pd.Timestamp("2021-01-16T22:00:00", tz="UTC"),
+        "month": pd.Timestamp("2021-01-01").date(),
+        "part_of_policing_operation": True,
+        "policing_operation": "Operation X",
+        "longitude": None,
+        "latitude": None,
+        "gender": None,
+        "age_range": None,
+        "self_defined_ethnicity": None,
+        "officer_defined_ethnicity": None,
+        "legislation": None,
+        "object_of_search": None,
+        "outcome": "Arrest",
+        "outcome_linked_to_object_of_search": True,
+        "removal_of_more_than_outer_clothing": True,
+        "force": "metropolitan",
+        "datetime_download": None,
+    }
+
+
+def test_write_street_all_content_index(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    path_key_raw = temp_dir / module.KEY_RAW
+    write_archive(path_key_raw / "2017-05-01_2020-04-01.zip", ["2020-03", "2020-04"])
+    write_archive(path_key_raw / "latest_2022-03-14.zip", ["2020-04", "2020-05"])
+
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    df_index = module.read_content_index(path_data=temp_dir)
+    assert df_index.filter("is_newest").select(
+        "month",
+        "archive",
+    ).unique().sort("month").rows() == [
+        ("2020-03", "2017-05-01_2020-04-01.zip"),
+        ("2020-04", "latest_2022-03-14.zip"),
+        ("2020-05", "latest_2022-03-14.zip"),
+    ]
+    assert set(df_index.get_column("type_file")) == {
+        "street",
+        "outcomes",
+        "stop-and-search",
+    }
+    # The members of a month are those marked as newest
+    members = module.get_members(df_index)
+    assert {month: m["archive"] for month, m in members.items()} == {
+        "2020-03": "2017-05-01_2020-04-01.zip",
+        "2020-04": "latest_2022-03-14.zip",
+        "2020-05": "latest_2022-03-14.zip",
+    }
+    members = module.get_members(
+        df_index.with_columns(
+            is_newest=pl.col("archive") == "2017-05-01_2020-04-01.zip",
+        ),
+    )
+    assert {month: m["archive"] for month, m in members.items()} == {
+        "2020-03": "2017-05-01_2020-04-01.zip",
+        "2020-04": "2017-05-01_2020-04-01.zip",
+    }
+    paths_file = {
+        month: module.path(month=f"{month}-01", path_data=temp_dir)
+        for month in ["2020-03", "2020-04", "2020-05"]
+    }
+    mtimes = {month: p.stat().st_mtime_ns for month, p in paths_file.items()}
+
+    # Nothing has changed so nothing is written again
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    assert {m: p.stat().st_mtime_ns for m, p in paths_file.items()} == mtimes
+
+    # Only the month which has changed in the newer archive is written again
+    name_changed = "2020-05/2020-05-metropolitan-police-service-street.csv"
+    with (
+        ZipFile(path_key_raw / "latest_2022-03-14.zip") as zip_file_old,
+        ZipFile(path_key_raw / "latest_2022-04-14.zip", "w") as zip_file,
+    ):
+        for name in zip_file_old.namelist():
+            if name != name_changed:
+                zip_file.writestr(name, zip_file_old.read(name))
+        zip_file.writestr(
+            name_changed,
+            get_street_csv("2020-05", "Metropolitan Police Service", 5),
+        )
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    mtimes_updated = {m: p.stat().st_mtime_ns for m, p in paths_file.items()}
+    assert mtimes_updated["2020-03"] == mtimes["2020-03"]
+    assert mtimes_updated["2020-04"] == mtimes["2020-04"]
+    assert mtimes_updated["2020-05"] != mtimes["2020-05"]
+    # 5 crimes of the Metropolitan Police Service and 1 of the City of London Police
+    assert pl.read_parquet(paths_file["2020-05"]).height == 6
+
+    # A month written with another layout is written again
+    path_file_members = module.path_members(paths_file["2020-03"])
+    sidecar = json.loads(path_file_members.read_text())
+    path_file_members.write_text(json.dumps(sidecar["members"]))
+    module.write_street_all(path_data_raw=temp_dir, **kwargs)
+    assert paths_file["2020-03"].stat().st_mtime_ns != mtimes["2020-03"]
+    assert json.loads(path_file_members.read_text()) == sidecar
+
+
+def test_write_content_index_same_date(temp_dir, path_test_env):
+    module = fryer.data.uk_police_crime_data
+    kwargs = {"path_log": temp_dir, "path_data": temp_dir, "path_env": path_test_env}
+    path_key_raw = temp_dir / module.KEY_RAW
+    write_archive(path_key_raw / "2019-04-01_2022-03-14.zip", ["2020-04"])
+    write_archive(path_key_raw / "latest_2022-03-14.zip", ["2020-04"])
+
+    # Archives of the same date are ranked on their name
+    df_index = module.write_content_index(**kwargs)
+    assert df_index.filter("is_newest").get_column("archive").unique().to_list() == [
+        "latest_2022-03-14.zip",
+    ]
+    members = module.get_members(df_index)
+    assert members["2020-04"]["archive"] == "latest_2022-03-14.zip"
+    assert len(members["2020-04"]["members"]) == len(
+        df_index.filter(pl.col("archive") == "latest_2022-03-14.zip"),
+    )
@@ -0,0 +1,73 @@
+import polars as pl
+import pytest
+
+import fryer.grid
+
+
+def get_quadkey(x: int, y: int, zoom: int) -> int:
+    quadkey = 0
+    for i in reversed(range(zoom)):
+        quadkey = quadkey * 4 + ((x >> i) & 1) + 2 * ((y >> i) & 1)
+    return quadkey
+
+
+@pytest.mark.parametrize(
+    ("longitude", "latitude", "x", "y"),
+    [
+        (-0.1276, 51.5072, 32744, 21792),
+        (-3.1883, 55.9533, 32187, 20422),
+        (0.0, 0.0, 32768, 32768),
+    ],
+)
+def test_get_expr_cell(longitude, latitude, x, y):
+    df = pl.DataFrame({"longitude": [longitude], "latitude": [latitude]})
+    cell = df.select(
+        fryer.grid.get_expr_cell(pl.col("longitude"), pl.col("latitude")),
+    ).item()
+    assert cell == get_quadkey(x, y, fryer.grid.ZOOM)
+    # The cell of a lower zoom is a prefix of the quadkey
+    cell_parent = df.select(
+        fryer.grid.get_expr_cell(pl.col("longitude"), pl.col("latitude"), zoom=10),
+    ).item()
+    assert cell_parent == cell // 4**6
+
+
+def test_get_expr_cell_null():
+    df = pl.DataFrame({"longitude": [None, 1.0], "latitude": [1.0, 1.0]})
+    cells = df.select(
+        fryer.grid.get_expr_cell(pl.col("longitude"), pl.col("latitude")),
+    ).to_series()
+    assert cells.dtype == pl.UInt32
+    assert cells.null_count() == 1
+
+
+def test_get_expr_in_bbox_radius():
+    df = pl.DataFrame(
+        {
+            "longitude": [-0.1, -0.1, -0.09, 0.1],
+            "latitude": [51.5, 51.51, 51.5, 51.5],
+        },
+    )
+    df = df.with_columns(
+        fryer.grid.get_expr_cell(pl.col("longitude"), pl.col("latitude")).alias("cell"),
+    )
+    bbox = fryer.grid.get_bbox_radius(-0.1, 51.5, 1_000)
+    assert df.select(
+        fryer.grid.get_expr_in_bbox(
+            pl.col("longitude"),
+            pl.col("latitude"),
+            pl.col("cell"),
+            bbox=bbox,
+        ),
+    ).to_series().to_list() == [True, False, True, False]
+    # About 1.1km north and 0.7km east
+    assert df.select(
+        fryer.grid.get_expr_within_radius(
+            pl.col("longitude"),
+            pl.col("latitude"),
+            centre=(-0.1, 51.5),
+            metres=1_000,
+        ),
+    ).to_series().to_list() == [True, False, True, False]
+    cell_min, cell_max = fryer.grid.get_range_cells(bbox)
+    assert cell_min <= df.get_column("cell")[0] <= cell_max
@@ -1,5 +1,8 @@
+import logging
+import logging.handlers
 from pathlib import Path
 
+import polars as pl
 import pytest
 
 import fryer.logger
@@ -59,6 +62,7 @@ def test_get_messages(key, messages_with_level, temp_dir, logger):
     for message, level in messages_with_level.items():
         getattr(logger, level)(message)
         messages_logged.append(message)
+        fryer.logger.flush()
 
         # Check all the messages logged are in the log file
         log_contents = path_log_file.read_text()
@@ -78,6 +82,7 @@ def test_get_multiple(key, temp_dir, logger):
 
     message = "message 1"
     logger.info(message)
+    fryer.logger.flush()
     assert message in path_log_file.read_text()
 
     another_logger = fryer.logger.get(
@@ -87,6 +92,7 @@ def test_get_multiple(key, temp_dir, logger):
 
     another_message = "message 2"
     another_logger.info(another_message)
+    fryer.logger.flush()
     log_contents = path_log_file.read_text()
     assert message in log_contents
     assert another_message in log_contents
@@ -97,3 +103,80 @@ def test_get_via_path_env(test_env, path_test_env):
     fryer.logger.get(key=key, path_env=path_test_env)
     path_log_file = Path(test_env[FRYER_ENV_PATH_LOG]) / key / "log.log"
     assert path_log_file.exists()
+
+
+def test_get_reuses_logger(temp_dir):
+    logger = fryer.logger.get(key="key", path_log=temp_dir)
+    assert fryer.logger.get(key="key", path_log=temp_dir) is logger
+    assert len(logger.handlers) == 1
+    assert fryer.logger.get(key="other_key", path_log=temp_dir) is not logger
+
+
+def test_shutdown(temp_dir):
+    key = "key"
+    logger = fryer.logger.get(key=key, path_log=temp_dir)
+    message = "message before shutdown"
+    logger.info(message)
+    fryer.logger.shutdown()
+    assert message in (temp_dir / key / "log.log").read_text()
+    assert fryer.logger.get(key=key, path_log=temp_dir) is not logger
+
+
+def test_shutdown_logger_handed_out(temp_dir):
+    key = "key"
+    logger = fryer.logger.get(key=key, path_log=temp_dir)
+    fryer.logger.shutdown()
+    message = "message after shutdown"
+    logger.info(message)
+    assert not any(
+        isinstance(handler, logging.handlers.QueueHandler)
+        for handler in logger.handlers
+    )
+    assert message in (temp_dir / key / "log.log").read_text()
+    logger.debug("debug after shutdown")
+    assert "debug after shutdown" in (temp_dir / key / "log.log").read_text()
+    for handler in logger.handlers:
+        handler.close()
+
+
+@pytest.fixture
+def df():
+    return pl.DataFrame(
+        {"a": [1, None, 3], "b": ["x", "y", None], "c": [1.0, 2.0, 3.0]},
+    )
+
+
+@pytest.mark.parametrize("key", ["key"])
+def test_log_df(key, temp_dir, logger, df):
+    fryer.logger.log_df(logger, df, name="test_df")
+    fryer.logger.flush()
+    log_contents = (temp_dir / key / "log.log").read_text()
+    assert f"test_df: {fryer.logger.summarise_df(df)}" in log_contents
+    assert "null_counts={'a': 1, 'b': 1}" in log_contents
+    assert f"test_df=\n{df.head()}" in log_contents
+    assert "test_log_df" in log_contents
+
+
+@pytest.mark.parametrize("key", ["key"])
+def test_log_df_level_not_enabled(key, temp_dir, logger, df):
+    logger.setLevel(logging.WARNING)
+    fryer.logger.log_df(logger, df, name="test_df")
+    fryer.logger.flush()
+    assert "test_df" not in (temp_dir / key / "log.log").read_text()
+
+
+@pytest.mark.parametrize("key", ["key"])
+def test_log_df_without_preview(key, temp_dir, logger, df):
+    logger.setLevel(logging.INFO)
+    fryer.logger.log_df(logger, df, name="test_df")
+    fryer.logger.flush()
+    log_contents = (temp_dir / key / "log.log").read_text()
+    assert "test_df: shape=(3, 3)" in log_contents
+    assert "test_df=" not in log_contents
+
+
+def test_set_level(temp_dir):
+    logger = fryer.logger.get(key="key", path_log=temp_dir)
+    assert logger.isEnabledFor(logging.INFO)
+    logger.setLevel(logging.WARNING)
+    assert not logger.isEnabledFor(logging.INFO)
@@ -0,0 +1,176 @@
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+import pytest
+
+import fryer.parquet
+
+
+def test_write(temp_dir):
+    path_file = temp_dir / "test.parquet"
+    df = pl.DataFrame({"key": [3, None, 1, 2] * 1_000, "value": range(4_000)})
+    profile = fryer.parquet.WriteProfile(sort_by=("key",), row_group_size=1_000)
+    fryer.parquet.write(df, path_file, profile=profile)
+
+    assert list(temp_dir.iterdir()) == [path_file]
+    df_read = pl.read_parquet(path_file)
+    assert df_read.get_column("key").to_list() == (
+        [1] * 1_000 + [2] * 1_000 + [3] * 1_000 + [None] * 1_000
+    )
+    assert df_read.sort("value").equals(df)
+
+    metadata = pq.ParquetFile(path_file).metadata
+    assert metadata.num_row_groups == 4
+    statistics = [metadata.row_group(i).column(0).statistics for i in range(3)]
+    assert [(s.min, s.max) for s in statistics] == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_write_dictionary(temp_dir):
+    path_file = temp_dir / "test.parquet"
+    df = pl.DataFrame({"a": ["x", "y"] * 100, "b": ["x", "y"] * 100})
+    profile = fryer.parquet.WriteProfile(dictionary=("a",))
+    fryer.parquet.write(df, path_file, profile=profile)
+
+    row_group = pq.ParquetFile(path_file).metadata.row_group(0)
+    assert "RLE_DICTIONARY" in row_group.column(0).encodings
+    assert "RLE_DICTIONARY" not in row_group.column(1).encodings
+    assert pl.read_parquet(path_file).equals(df)
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (b"", 0xEF46DB3751D8E999),
+        (b"a", 0xD24EC4F1A98C6E5B),
+        (b"abc", 0x44BC2CF5AD770999),
+        (b"Nobody inspects the spammish repetition", 0xFBCEA83C8A378BF1),
+    ],
+)
+def test_xxhash64(data, expected):
+    assert fryer.parquet.xxhash64(data) == expected
+
+
+def test_lookup(temp_dir):
+    path_file = temp_dir / "test.parquet"
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame(
+        {
+            "postcode": [f"P {i}" for i in rng.integers(0, 10_000, 10_000)],
+            "value": range(10_000),
+        },
+    )
+    profile = fryer.parquet.WriteProfile(
+        row_group_size=1_000,
+        bloom_filter=("postcode",),
+    )
+    fryer.parquet.write(df, path_file, profile=profile)
+
+    metadata_column = pq.ParquetFile(path_file).metadata.row_group(0).column(0)
+    assert not metadata_column.has_column_index
+    postcodes = df.get_column("postcode").unique().sort().to_list()
+    row_groups = fryer.parquet.select_row_groups(
+        path_file,
+        column="postcode",
+        values=postcodes[:1],
+    )
+    # Every row group spans almost all postcodes, only the bloom filters can skip any
+    assert 1 <= len(row_groups) < 3
+    assert (
+        fryer.parquet.select_row_groups(
+            path_file,
+            column="postcode",
+            values=["P 10000"],
+        )
+        == []
+    )
+
+    df_lookup = fryer.parquet.lookup(
+        [path_file],
+        column="postcode",
+        values=[*postcodes[:3], "P 10000"],
+    )
+    assert df_lookup.sort("value").equals(
+        df.filter(pl.col("postcode").is_in(postcodes[:3])),
+    )
+    assert (
+        fryer.parquet.lookup(
+            [path_file],
+            column="postcode",
+            values=["P 10000"],
+        ).schema
+        == df.schema
+    )
+    # Without any files the schema is the one given
+    assert fryer.parquet.lookup(
+        [],
+        column="postcode",
+        values=["P 1"],
+        schema=df.schema,
+    ).equals(df.clear())
+    with pytest.raises(ValueError, match="No files to look up"):
+        fryer.parquet.lookup([], column="postcode", values=["P 1"])
+
+
+def test_might_contain_pyarrow(temp_dir):
+    # Every value in a row group is in the bloom filter pyarrow wrote for it, so the
+    # hash and the parsing of the filters agree with pyarrow's
+    path_file = temp_dir / "test.parquet"
+    df = pl.DataFrame({"postcode": [f"P {i}" for i in range(5_000)]})
+    profile = fryer.parquet.WriteProfile(
+        row_group_size=1_000,
+        bloom_filter=("postcode",),
+    )
+    fryer.parquet.write(df, path_file, profile=profile)
+    metadata = pq.ParquetFile(path_file).metadata
+    with path_file.open("rb") as file:
+        for index in range(metadata.num_row_groups):
+            metadata_column = metadata.row_group(index).column(0)
+            bitset = fryer.parquet.read_bloom_filter(
+                file,
+                metadata_column.bloom_filter_offset,
+                metadata_column.bloom_filter_length,
+            )
+            values = df.slice(index * 1_000, 1_000).get_column("postcode")
+            assert all(
+                fryer.parquet.might_contain(bitset, value.encode()) for value in values
+            )
+            # About 1% false positives
+            assert (
+                sum(
+                    fryer.parquet.might_contain(bitset, f"Q {i}".encode())
+                    for i in range(1_000)
+                )
+                < 50
+            )
+
+
+def test_select_row_groups_unparsable_bloom_filter(temp_dir):
+    path_file = temp_dir / "test.parquet"
+    df = pl.DataFrame({"postcode": ["P 1", "P 2", "P 3", "P 4"]})
+    profile = fryer.parquet.WriteProfile(row_group_size=2, bloom_filter=("postcode",))
+    fryer.parquet.write(df, path_file, profile=profile)
+    assert fryer.parquet.select_row_groups(
+        path_file,
+        column="postcode",
+        values=["P 1"],
+    ) == [(0, 2)]
+
+    metadata = pq.ParquetFile(path_file).metadata
+    with path_file.open("r+b") as file:
+        for index in range(metadata.num_row_groups):
+            file.seek(metadata.row_group(index).column(0).bloom_filter_offset)
+            file.write(b"\x00")
+        with pytest.raises(ValueError, match="Unexpected bloom filter header"):
+            fryer.parquet.read_bloom_filter(
+                file,
+                metadata.row_group(0).column(0).bloom_filter_offset,
+                metadata.row_group(0).column(0).bloom_filter_length,
+            )
+    # Only the statistics skip row groups, the row group of P 1 is still read
+    assert fryer.parquet.select_row_groups(
+        path_file,
+        column="postcode",
+        values=["P 1"],
+    ) == [(0, 2)]
+    df_lookup = fryer.parquet.lookup([path_file], column="postcode", values=["P 2"])
+    assert df_lookup.get_column("postcode").to_list() == ["P 2"]
@@ -1,3 +1,8 @@
+import hashlib
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pytest
@@ -5,6 +10,7 @@ import requests
 import requests_mock
 
 import fryer.logger
+import fryer.requests
 from fryer.requests import validate_response
 
 KEY = Path(__file__).stem
@@ -44,3 +50,434 @@ def test_error_requests_validate_response(response, url, key, expected, temp_dir
     logger = fryer.logger.get(key=key, path_log=temp_dir)
     with pytest.raises(expected):
         validate_response(key=key, response=response, url=url, logger=logger)
+
+
+def test_create_session():
+    session = fryer.requests.create_session(
+        max_retries=3,
+        backoff_factor=0.5,
+        pool_maxsize=2,
+    )
+    for prefix in ["http://", "https://"]:
+        adapter = session.get_adapter(prefix)
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.backoff_factor == 0.5
+        assert 429 in adapter.max_retries.status_forcelist
+        assert adapter._pool_maxsize == 2  # noqa: SLF001 - No public accessor
+
+
+def test_configure(path_test_env):
+    adapter = fryer.requests.get_session().get_adapter("https://")
+    assert adapter.max_retries.total == 1
+    assert adapter.max_retries.backoff_factor == 0
+
+    fryer.requests.configure(path_env=path_test_env)
+    adapter = fryer.requests.get_session().get_adapter("https://")
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.25
+
+    fryer.requests.configure(backoff_factor=0.5, path_env=path_test_env)
+    adapter = fryer.requests.get_session().get_adapter("https://")
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.5
+
+
+def test_get_session_is_shared():
+    assert fryer.requests.get_session() is fryer.requests.get_session()
+
+
+def test_get(temp_dir):
+    logger = fryer.logger.get(key=KEY, path_log=temp_dir)
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/success", text="success")
+        response = fryer.requests.get(
+            "https://test.com/success",
+            logger=logger,
+            key=KEY,
+        )
+    assert response.text == "success"
+
+
+def test_get_error():
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/fail", text="fail", status_code=404)
+        with pytest.raises(ValueError, match="Did not read response correctly"):
+            fryer.requests.get("https://test.com/fail")
+        response = fryer.requests.get("https://test.com/fail", validate=False)
+    assert response.status_code == 404
+
+
+def test_limit_host():
+    fryer.requests.configure(max_concurrency=2)
+    try:
+        with (
+            fryer.requests.limit_host("https://test.com/a"),
+            fryer.requests.limit_host("https://test.com/b"),
+        ):
+            semaphore = fryer.requests.HOST_SEMAPHORES["test.com"]
+            assert not semaphore.acquire(blocking=False)
+        assert semaphore.acquire(blocking=False)
+        semaphore.release()
+    finally:
+        fryer.requests.configure()
+
+
+@pytest.mark.parametrize("hash_name", ["md5", "sha256"])
+def test_download_file(hash_name, temp_dir):
+    content = b"0123456789" * 1_000
+    path_file = temp_dir / "file.zip"
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/file.zip", content=content)
+        actual_hash = fryer.requests.download_file(
+            "https://test.com/file.zip",
+            path_file,
+            hash_name=hash_name,
+            expected_hash=hashlib.new(hash_name, content).hexdigest(),
+            chunk_size=64,
+        )
+    assert actual_hash == hashlib.new(hash_name, content).hexdigest()
+    assert path_file.read_bytes() == content
+    assert sorted(temp_dir.iterdir()) == [
+        path_file,
+        path_file.with_name("file.zip.http.json"),
+    ]
+
+
+def test_download_file_hash_mismatch(temp_dir):
+    path_file = temp_dir / "file.zip"
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/file.zip", content=b"content")
+        with pytest.raises(ValueError, match="Hashes don't match"):
+            fryer.requests.download_file(
+                "https://test.com/file.zip",
+                path_file,
+                expected_hash="not the hash",
+            )
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_download_file_error(temp_dir):
+    path_file = temp_dir / "file.zip"
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/file.zip", status_code=404)
+        with pytest.raises(ValueError, match="Did not read response correctly"):
+            fryer.requests.download_file("https://test.com/file.zip", path_file)
+    assert not path_file.exists()
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serves `server.content` with Range support, dropping the connection after
+    `server.drop_after` bytes for the first `server.num_drops` requests, and a 304
+    when the ETag is unchanged. The start of ranges sent is off by `server.range_shift`.
+    """
+
+    def log_message(self, format, *args): ...  # noqa: ANN002 - Silences the server
+
+    def do_HEAD(self):
+        server = self.server
+        server.requests.append({**self.headers, "method": "HEAD", "path": self.path})
+        self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(server.content)))
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append({**self.headers, "method": "GET", "path": self.path})
+        content = server.content
+        start = 0
+        range_ = self.headers.get("Range")
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if (
+            server.support_range
+            and range_ is not None
+            and self.headers.get("If-Range") == server.etag
+        ):
+            start = int(range_.removeprefix("bytes=").removesuffix("-"))
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range",
+                f"bytes {start + server.range_shift}-{len(content) - 1}/{len(content)}",
+            )
+        else:
+            self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(content) - start))
+        self.end_headers()
+
+        body = content[start:]
+        if server.num_drops > 0:
+            server.num_drops -= 1
+            self.wfile.write(body[: server.drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    server.content = bytes(range(256)) * 400
+    server.etag = '"etag-1"'
+    server.support_range = True
+    server.num_drops = 0
+    server.drop_after = 10_000
+    server.range_shift = 0
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/file.zip"
+
+
+def test_download_file_resumes(server, temp_dir):
+    server.num_drops = 3
+    path_file = temp_dir / "file.zip"
+    actual_hash = fryer.requests.download_file(
+        get_url(server),
+        path_file,
+        expected_hash=hashlib.sha256(server.content).hexdigest(),
+        chunk_size=1_000,
+    )
+    assert actual_hash == hashlib.sha256(server.content).hexdigest()
+    assert path_file.read_bytes() == server.content
+    assert sorted(temp_dir.iterdir()) == [
+        path_file,
+        path_file.with_name("file.zip.http.json"),
+    ]
+    assert [request.get("Range") for request in server.requests] == [
+        None,
+        "bytes=10000-",
+        "bytes=20000-",
+        "bytes=30000-",
+    ]
+
+
+def test_download_file_resumes_earlier_part(server, temp_dir):
+    server.num_drops = 1
+    path_file = temp_dir / "file.zip"
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        fryer.requests.download_file(
+            get_url(server),
+            path_file,
+            chunk_size=1_000,
+            max_resumes=0,
+        )
+    assert not path_file.exists()
+    assert path_file.with_name("file.zip.part").stat().st_size == server.drop_after
+
+    actual_hash = fryer.requests.download_file(get_url(server), path_file)
+    assert actual_hash == hashlib.sha256(server.content).hexdigest()
+    assert path_file.read_bytes() == server.content
+    assert server.requests[-1]["Range"] == f"bytes={server.drop_after}-"
+
+
+def test_download_file_restarts_when_changed(server, temp_dir):
+    server.num_drops = 1
+    path_file = temp_dir / "file.zip"
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        fryer.requests.download_file(get_url(server), path_file, max_resumes=0)
+
+    server.content = bytes(reversed(server.content))
+    server.etag = '"etag-2"'
+    actual_hash = fryer.requests.download_file(get_url(server), path_file)
+    assert actual_hash == hashlib.sha256(server.content).hexdigest()
+    assert path_file.read_bytes() == server.content
+
+
+def test_download_file_without_range_support(server, temp_dir):
+    server.num_drops = 2
+    server.support_range = False
+    path_file = temp_dir / "file.zip"
+    fryer.requests.download_file(get_url(server), path_file)
+    assert path_file.read_bytes() == server.content
+    assert len(server.requests) == 3
+
+
+def test_download_file_complete_part(server, temp_dir):
+    path_file = temp_dir / "file.zip"
+    path_file.with_name("file.zip.part").write_bytes(server.content)
+    path_file.with_name("file.zip.part.json").write_text(
+        json.dumps(
+            {
+                "etag": server.etag,
+                "last_modified": None,
+                "content_length": len(server.content),
+            },
+        ),
+    )
+    actual_hash = fryer.requests.download_file(get_url(server), path_file)
+    assert actual_hash == hashlib.sha256(server.content).hexdigest()
+    assert path_file.read_bytes() == server.content
+    assert sorted(temp_dir.iterdir()) == [
+        path_file,
+        path_file.with_name("file.zip.http.json"),
+    ]
+
+
+def write_part(path_file, content, content_length, etag):
+    path_file.with_name(f"{path_file.name}.part").write_bytes(content)
+    path_file.with_name(f"{path_file.name}.part.json").write_text(
+        json.dumps(
+            {"etag": etag, "last_modified": None, "content_length": content_length},
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("size_part", "content_length", "range_shift"),
+    [
+        # The first response had no Content-Length, so the size is not known
+        (10_000, None, 0),
+        # The range sent does not start at the end of the part
+        (10_000, 256 * 400, 1),
+        # The 416 is for a different size than the part
+        (256 * 400 + 10, 256 * 400 + 10, 0),
+    ],
+)
+def test_download_file_restarts_when_range_does_not_match(
+    size_part,
+    content_length,
+    range_shift,
+    server,
+    temp_dir,
+):
+    server.range_shift = range_shift
+    path_file = temp_dir / "file.zip"
+    write_part(path_file, bytes(size_part), content_length, server.etag)
+    actual_hash = fryer.requests.download_file(get_url(server), path_file)
+    assert actual_hash == hashlib.sha256(server.content).hexdigest()
+    assert path_file.read_bytes() == server.content
+    assert [request.get("Range") for request in server.requests] == [
+        f"bytes={size_part}-",
+        None,
+    ]
+    assert sorted(temp_dir.iterdir()) == [
+        path_file,
+        path_file.with_name("file.zip.http.json"),
+    ]
+
+
+def test_download_file_restarts_once(server, temp_dir):
+    # The range is wrong after the restart too, so the download fails
+    server.range_shift = 1
+    server.num_drops = 2
+    path_file = temp_dir / "file.zip"
+    write_part(path_file, bytes(10_000), len(server.content), server.etag)
+    with pytest.raises(ValueError, match="Did not read response correctly"):
+        fryer.requests.download_file(get_url(server), path_file, chunk_size=1_000)
+    assert [request.get("Range") for request in server.requests] == [
+        "bytes=10000-",
+        None,
+        "bytes=10000-",
+    ]
+
+
+def test_get_if_modified():
+    validators = {
+        "etag": '"etag-1"',
+        "last_modified": "Mon, 14 Mar 2022 00:00:00 GMT",
+        "content_length": 7,
+    }
+    with requests_mock.Mocker() as mocker:
+        mocker.get("https://test.com/file.csv", status_code=304)
+        assert (
+            fryer.requests.get_if_modified(
+                "https://test.com/file.csv",
+                validators=validators,
+            )
+            is None
+        )
+        assert mocker.last_request.headers["If-None-Match"] == '"etag-1"'
+        assert (
+            mocker.last_request.headers["If-Modified-Since"]
+            == "Mon, 14 Mar 2022 00:00:00 GMT"
+        )
+
+        mocker.get("https://test.com/file.csv", content=b"content")
+        response = fryer.requests.get_if_modified(
+            "https://test.com/file.csv",
+            validators=None,
+        )
+        assert response.content == b"content"
+        assert "If-None-Match" not in mocker.last_request.headers
+
+
+def test_download_file_if_modified(server, temp_dir):
+    server.support_range = False
+    path_file = temp_dir / "file.zip"
+    assert fryer.requests.download_file_if_modified(get_url(server), path_file)
+    assert fryer.requests.read_validators(path_file)["etag"] == server.etag
+
+    # Unchanged so the previous file is moved rather than downloaded
+    path_file_new = temp_dir / "file_new.zip"
+    assert not fryer.requests.download_file_if_modified(
+        get_url(server),
+        path_file_new,
+        path_file_previous=path_file,
+    )
+    assert server.requests[-1]["If-None-Match"] == server.etag
+    assert sorted(temp_dir.iterdir()) == [
+        path_file_new,
+        path_file_new.with_name("file_new.zip.http.json"),
+    ]
+    assert path_file_new.read_bytes() == server.content
+
+    # Changed so it is downloaded by the conditional request, with the arguments
+    server.content = bytes(reversed(server.content))
+    server.etag = '"etag-2"'
+    num_requests = len(server.requests)
+    assert fryer.requests.download_file_if_modified(
+        get_url(server),
+        path_file_new,
+        params={"key": "value"},
+    )
+    assert path_file_new.read_bytes() == server.content
+    assert fryer.requests.read_validators(path_file_new)["etag"] == server.etag
+    assert len(server.requests) == num_requests + 1
+    assert server.requests[-1]["path"] == "/file.zip?key=value"
+
+
+def test_download_file_if_modified_without_validators(server, temp_dir):
+    # Downloaded before the validators were stored
+    path_file = temp_dir / "file.zip"
+    path_file.write_bytes(server.content)
+    path_file_new = temp_dir / "file_new.zip"
+    assert not fryer.requests.download_file_if_modified(
+        get_url(server),
+        path_file_new,
+        path_file_previous=path_file,
+    )
+    assert [request["method"] for request in server.requests] == ["HEAD"]
+    assert sorted(temp_dir.iterdir()) == [
+        path_file_new,
+        path_file_new.with_name("file_new.zip.http.json"),
+    ]
+    assert fryer.requests.read_validators(path_file_new)["etag"] == server.etag
+
+    # A different size is a different file
+    path_file_new.write_bytes(server.content[:-1])
+    path_validators = path_file_new.with_name("file_new.zip.http.json")
+    path_validators.unlink()
+    assert fryer.requests.download_file_if_modified(get_url(server), path_file_new)
+    assert path_file_new.read_bytes() == server.content
+    assert [request["method"] for request in server.requests] == [
+        "HEAD",
+        "HEAD",
+        "GET",
+    ]
@@ -0,0 +1,62 @@
+import numpy as np
+import polars as pl
+import pytest
+
+import fryer.sketch
+
+
+@pytest.mark.parametrize("q", [0, 0.1, 0.5, 0.9, 1])
+def test_quantile(q):
+    values = np.random.default_rng(0).lognormal(12, 0.6, 10_000)
+    sketch = fryer.sketch.from_values(values)
+    expected = np.quantile(values, q, method="lower")
+    assert fryer.sketch.quantile(sketch, q) == pytest.approx(expected, rel=0.01)
+
+
+def test_quantile_empty():
+    assert fryer.sketch.quantile(b"", 0.5) is None
+    assert fryer.sketch.quantile(fryer.sketch.from_values([0, -1]), 0.5) is None
+    with pytest.raises(ValueError, match="should be between 0 and 1"):
+        fryer.sketch.quantile(fryer.sketch.from_values([1]), 1.5)
+
+
+def test_merge():
+    values = np.random.default_rng(0).lognormal(12, 0.6, 1_000)
+    sketch = fryer.sketch.from_values(values)
+    assert (
+        fryer.sketch.merge(
+            [
+                fryer.sketch.from_values(values[:300]),
+                fryer.sketch.from_values(values[300:]),
+            ],
+        )
+        == sketch
+    )
+    assert fryer.sketch.merge([]) == b""
+
+
+def test_sketch_by_and_merge_by():
+    df = pl.DataFrame(
+        {
+            "area": ["A", "A", "B", "B", "B"],
+            "month": [1, 2, 1, 1, 2],
+            "price": [100.0, 200.0, 300.0, 0.0, 500.0],
+        },
+    )
+    df_sketches = fryer.sketch.sketch_by(df, value="price", by=["area", "month"])
+    assert df_sketches.select("area", "month", "count").rows() == [
+        ("A", 1, 1),
+        ("A", 2, 1),
+        ("B", 1, 1),
+        ("B", 2, 1),
+    ]
+
+    df_merged = fryer.sketch.merge_by(df_sketches, by=["month"])
+    assert df_merged.get_column("count").to_list() == [2, 2]
+    assert df_merged.get_column("sketch").to_list() == [
+        fryer.sketch.from_values([100, 300]),
+        fryer.sketch.from_values([200, 500]),
+    ]
+    assert fryer.sketch.merge_by(df_sketches, by=[]).get_column("sketch").item() == (
+        fryer.sketch.from_values(df.get_column("price"))
+    )